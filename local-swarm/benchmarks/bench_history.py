@@ -0,0 +1,108 @@
+"""
+Memory/time benchmark: starting a run on a long conversation.
+
+`Swarm.run` used to `copy.deepcopy` the whole `messages` list (and the
+context variables) on every call; it now wraps them in a `History` that
+shares the caller's messages and only records new ones. This replays a
+REPL-style session where each user turn passes the full accumulated
+conversation, and reports time and peak allocated memory per turn.
+
+    python benchmarks/bench_history.py --messages 1000
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm.history import History  # noqa: E402
+
+
+def make_conversation(n: int) -> list:
+    messages = []
+    for i in range(n):
+        if i % 3 == 0:
+            messages.append({"role": "user", "content": f"question {i} " * 20})
+        elif i % 3 == 1:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": "",
+                    "sender": "Agent",
+                    "tool_calls": [
+                        {
+                            "id": f"call_{i}",
+                            "type": "function",
+                            "function": {
+                                "name": "get_account_resources",
+                                "arguments": json.dumps({"address": "0x" + "ab" * 32}),
+                            },
+                        }
+                    ],
+                }
+            )
+        else:
+            messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": f"call_{i - 1}",
+                    "tool_name": "get_account_resources",
+                    "content": json.dumps({"balance": i, "modules": ["coin"] * 10}),
+                }
+            )
+    return messages
+
+
+def deepcopy_start(messages, context_variables):
+    context_variables = copy.deepcopy(context_variables)
+    history = copy.deepcopy(messages)
+    history.append({"role": "assistant", "content": "ok"})
+    return history[len(messages):]
+
+
+def history_start(messages, context_variables):
+    context_variables = dict(context_variables)
+    history = History(messages)
+    history.append({"role": "assistant", "content": "ok"})
+    return history.new
+
+
+def measure(start, messages, context_variables, turns):
+    tracemalloc.start()
+    begin = time.perf_counter()
+    for _ in range(turns):
+        start(messages, context_variables)
+    elapsed = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds_per_turn": elapsed / turns, "peak_bytes": peak}
+
+
+def run(n_messages: int = 1000, turns: int = 20) -> dict:
+    messages = make_conversation(n_messages)
+    context_variables = {"user_id": "u-1", "profile": {"tier": "gold", "tags": ["a"] * 50}}
+    return {
+        "deepcopy": measure(deepcopy_start, messages, context_variables, turns),
+        "history": measure(history_start, messages, context_variables, turns),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, result in run(args.messages, args.turns).items():
+        print(
+            f"{name:<10} {result['seconds_per_turn'] * 1e6:10.1f} us/turn  "
+            f"peak {result['peak_bytes'] / 1024:10.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
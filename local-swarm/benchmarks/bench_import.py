@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark: the cost of `import swarm` in a fresh interpreter.
+
+Runs `python -X importtime -c "import swarm"` `repeat` times and reports the
+median cumulative import time of the package, the wall time of the whole
+interpreter start, and the modules that cost the most. With `--budget-ms`
+it exits non-zero when the import takes longer, so CI can hold the line.
+
+    python benchmarks/bench_import.py --repeat 10 --budget-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# modules the runtime core must not import eagerly
+HEAVY = ("openai", "tiktoken", "numpy", "instructor", "tqdm", "multiprocessing")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Maps module name to (self, cumulative) microseconds."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def import_once(module: str) -> tuple:
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return parse_importtime(result.stderr), wall, heavy
+
+
+def run(repeat: int = 10, module: str = "swarm", top: int = 5) -> dict:
+    cumulative, walls = [], []
+    for _ in range(repeat):
+        timings, wall, heavy = import_once(module)
+        cumulative.append(timings[module][1] / 1e6)
+        walls.append(wall)
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "import_seconds": statistics.median(cumulative),
+        "interpreter_seconds": statistics.median(walls),
+        "modules": len(timings),
+        "heavy_modules": len(heavy),
+        "heavy": heavy,
+        "slowest": {name: self_us / 1e6 for name, (self_us, _) in slowest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--module", default="swarm")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median import takes longer")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.module)
+    import_ms = results["import_seconds"] * 1000
+    print(f"import {args.module:<12} {import_ms:8.1f} ms median "
+          f"({results['modules']} modules)")
+    print(f"interpreter start   {results['interpreter_seconds'] * 1000:8.1f} ms median")
+    print(f"heavy modules       {', '.join(results['heavy']) or 'none'}")
+    for name, seconds in results["slowest"].items():
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms self")
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        sys.exit(f"import took {import_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: accumulating a long streamed answer into one message.
+
+Compares `merge_chunk` (repeated `str +=` on dict values, quadratic in the
+output length) with `StreamAccumulator` (fragments joined once) on a stream
+of content deltas followed by a tool call with fragmented arguments.
+
+    python benchmarks/bench_merge.py --deltas 5000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm.util import StreamAccumulator, merge_chunk  # noqa: E402
+
+
+def make_deltas(n: int) -> list:
+    deltas = [{"role": "assistant", "content": ""}]
+    deltas += [{"content": f"token{i} "} for i in range(n)]
+    deltas.append({"tool_calls": [{"index": 0, "id": "call_0", "type": "function",
+                                   "function": {"name": "submit", "arguments": ""}}]})
+    deltas += [{"tool_calls": [{"index": 0, "function": {"arguments": f'"a{i}",'}}]}
+               for i in range(n // 10)]
+    return deltas
+
+
+def merge_chunk_path(deltas: list) -> dict:
+    message = {
+        "content": "",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+        ),
+    }
+    for delta in deltas:
+        merge_chunk(message, delta)
+    return message
+
+
+def accumulator_path(deltas: list) -> dict:
+    accumulator = StreamAccumulator("Agent")
+    for delta in deltas:
+        accumulator.add(delta)
+    return accumulator.message()
+
+
+def run(deltas: int = 5000, repeat: int = 3) -> dict:
+    stream = make_deltas(deltas)
+    results = {}
+    for name, fn in (("merge_chunk", merge_chunk_path), ("accumulator", accumulator_path)):
+        best = float("inf")
+        for _ in range(repeat):
+            copies = copy.deepcopy(stream)  # merge_chunk consumes its deltas
+            start = time.perf_counter()
+            fn(copies)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {"seconds": best, "deltas_per_second": len(stream) / best}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deltas", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, result in run(args.deltas, args.repeat).items():
+        print(f"{name:<12} {result['seconds'] * 1000:10.2f} ms  "
+              f"{result['deltas_per_second']:12,.0f} deltas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+End-to-end benchmark: the Swarm run loop against a local stub upstream.
+
+Measures turns/s of `Swarm.run` (a tool call plus a final answer per run),
+delta throughput of `run_and_stream` on a long streamed answer, and peak
+Python memory per concurrent conversation under `run_many`. The upstream is
+`swarm.stub_server` in a subprocess, so only client-side cost is measured.
+
+    python benchmarks/bench_runtime.py --runs 200 --deltas 2000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm import Swarm, Agent  # noqa: E402
+from swarm.transport import Transport  # noqa: E402
+
+from stub import stub_upstream  # noqa: E402
+
+
+def get_balance(address: str) -> str:
+    """Returns the balance of an account."""
+    return f"{address}: 42 APT"
+
+
+def bench_run(runs: int) -> dict:
+    script = [
+        {"tool_calls": [{"name": "get_balance", "arguments": {"address": "0xabc"}}]},
+        "The balance is 42 APT.",
+    ]
+    with stub_upstream(script) as base_url:
+        agent = Agent(base_url=base_url, functions=[get_balance])
+        client = Swarm(transport=Transport())
+        messages = [{"role": "user", "content": "What is my balance?"}]
+        client.run(agent, messages)  # warm up the connection pool
+        start = time.perf_counter()
+        turns = 0
+        for _ in range(runs):
+            # a turn is one completion: count assistant messages, not tool results
+            turns += sum(
+                1 for message in client.run(agent, messages).messages
+                if message["role"] == "assistant"
+            )
+        elapsed = time.perf_counter() - start
+    return {"turns_per_second": turns / elapsed, "seconds_per_run": elapsed / runs}
+
+
+def bench_stream(deltas: int, repeat: int) -> dict:
+    script = ["token " * deltas]
+    with stub_upstream(script) as base_url:
+        agent = Agent(base_url=base_url)
+        client = Swarm(transport=Transport())
+        messages = [{"role": "user", "content": "Write a long answer."}]
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = sum(
+                1 for chunk in client.run(agent, messages, stream=True)
+                if "content" in chunk
+            )
+            best = min(best, time.perf_counter() - start)
+    return {"deltas": count, "seconds": best, "deltas_per_second": count / best}
+
+
+def bench_memory(concurrency: int, history: int) -> dict:
+    # a slow upstream keeps `concurrency` conversations in flight at once
+    with stub_upstream(ttft=0.2) as base_url:
+        agent = Agent(base_url=base_url)
+        client = Swarm(client=httpx.Client(
+            limits=httpx.Limits(max_connections=concurrency)))
+        conversations = [
+            [{"role": "user", "content": f"message {i} " * 20} for i in range(history)]
+            for _ in range(concurrency * 2)
+        ]
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        results = list(client.run_many(agent, conversations, max_concurrency=concurrency))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    assert not any(result.error for result in results)
+    return {
+        "peak_bytes_per_conversation": (peak - baseline) / concurrency,
+        "conversations_per_second": len(results) / elapsed,
+    }
+
+
+def run(runs: int = 200, deltas: int = 2000, concurrency: int = 32,
+        history: int = 50, repeat: int = 3) -> dict:
+    return {
+        "run": bench_run(runs),
+        "stream": bench_stream(deltas, repeat),
+        "memory": bench_memory(concurrency, history),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--deltas", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--history", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.runs, args.deltas, args.concurrency, args.history, args.repeat)
+    print(f"run      {results['run']['turns_per_second']:10,.0f} turns/s")
+    print(f"stream   {results['stream']['deltas_per_second']:10,.0f} deltas/s")
+    print(f"memory   {results['memory']['peak_bytes_per_conversation'] / 1024:10.1f} "
+          f"KiB peak per concurrent conversation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Serving benchmark: `swarm.serve` under many concurrent sessions.
+
+Each of `sessions` clients holds one conversation and sends `turns`
+streamed turns back to back, against a server admitting at most
+`max_concurrency` turns at a time. Measures turns/s through the server and
+the time to the first streamed delta, which includes queueing. The upstream
+is `swarm.stub_server` in a subprocess; the server runs on its own thread.
+
+    python benchmarks/bench_serve.py --sessions 64 --turns 5 --max-concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm import Agent  # noqa: E402
+from swarm.serve import SwarmServer  # noqa: E402
+
+from stub import stub_upstream  # noqa: E402
+
+
+async def converse(client: httpx.AsyncClient, url: str, turns: int, first_deltas: list):
+    for turn in range(turns):
+        start = time.perf_counter()
+        first = None
+        async with client.stream("POST", url, json={"content": f"turn {turn}"}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if first is None and line == "event: delta":
+                    first = time.perf_counter() - start
+        first_deltas.append(first)
+
+
+async def load(base_url: str, sessions: int, turns: int) -> list:
+    first_deltas = []
+    limits = httpx.Limits(max_connections=sessions)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await asyncio.gather(*(
+            converse(client, f"{base_url}/sessions/bench-{i}/messages", turns, first_deltas)
+            for i in range(sessions)
+        ))
+    return first_deltas
+
+
+def run(sessions: int = 64, turns: int = 5, max_concurrency: int = 32,
+        ttft: float = 0.05, tokens: int = 50) -> dict:
+    with stub_upstream(["token " * tokens], ttft=ttft) as upstream:
+        agent = Agent(base_url=upstream)
+        with SwarmServer(agent, port=0, max_concurrency=max_concurrency) as server:
+            asyncio.run(load(server.base_url, 1, 1))  # warm up the upstream pool
+            start = time.perf_counter()
+            first_deltas = asyncio.run(load(server.base_url, sessions, turns))
+            elapsed = time.perf_counter() - start
+            stats = server.stats.as_dict()
+    first_deltas.sort()
+    return {
+        "turns_per_second": len(first_deltas) / elapsed,
+        "first_delta_p50_seconds": statistics.median(first_deltas),
+        "first_delta_p95_seconds": first_deltas[int(len(first_deltas) * 0.95) - 1],
+        "mean_queue_wait_seconds": stats["mean_queue_wait"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.turns, args.max_concurrency, args.ttft, args.tokens)
+    print(f"throughput    {results['turns_per_second']:10,.1f} turns/s")
+    print(f"first delta   {results['first_delta_p50_seconds'] * 1000:10.1f} ms p50, "
+          f"{results['first_delta_p95_seconds'] * 1000:.1f} ms p95")
+    print(f"queue wait    {results['mean_queue_wait_seconds'] * 1000:10.1f} ms mean")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark: decoding a chat completion SSE stream.
+
+Compares the original line-based path (`iter_lines` + `startswith` + `strip`
++ `json.loads` per line) with `swarm.sse.ChatStreamDecoder` on raw byte
+chunks, using `json.loads`, the scanner-based `stdlib_loads` fallback and the
+fast backend (`orjson`) when installed.
+
+    python benchmarks/bench_sse.py --deltas 5000 --chunk-size 1024
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm.sse import ChatStreamDecoder, fast_loads, stdlib_loads  # noqa: E402
+
+
+def make_stream(n_deltas: int, chunk_size: int) -> list:
+    lines = []
+    for i in range(n_deltas):
+        delta = {"content": f"token{i} "}
+        if i == 0:
+            delta["role"] = "assistant"
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    body = "".join(lines).encode()
+    return [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+
+def line_path(chunks: list) -> int:
+    response = httpx.Response(200, content=iter(chunks))
+    count = 0
+    for line in response.iter_lines():
+        if not line:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if line.startswith('data: '):
+            json_str = line[6:].strip()
+            if json_str == "[DONE]":
+                continue
+            chunk = json.loads(json_str)
+            if "choices" in chunk:
+                chunk["choices"][0]["delta"]
+                count += 1
+    return count
+
+
+def decoder_path(chunks: list, loads) -> int:
+    decoder = ChatStreamDecoder(loads=loads)
+    count = 0
+    for raw in chunks:
+        for event in decoder.feed(raw):
+            if event.index == 0:
+                count += 1
+    return count + len(decoder.flush())
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(deltas: int = 5000, chunk_size: int = 1024, repeat: int = 5) -> dict:
+    chunks = make_stream(deltas, chunk_size)
+    cases = {
+        "iter_lines+json": lambda: line_path(chunks),
+        "sse_decoder+json": lambda: decoder_path(chunks, json.loads),
+        "sse_decoder+stdlib": lambda: decoder_path(chunks, stdlib_loads),
+    }
+    if fast_loads is not stdlib_loads:
+        cases["sse_decoder+fast"] = lambda: decoder_path(chunks, fast_loads)
+
+    results = {}
+    for name, fn in cases.items():
+        assert fn() == deltas, name
+        seconds = bench(fn, repeat)
+        results[name] = {"seconds": seconds, "deltas_per_second": deltas / seconds}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deltas", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.deltas, args.chunk_size, args.repeat)
+    baseline = results["iter_lines+json"]["seconds"]
+    for name, result in results.items():
+        print(
+            f"{name:<22} {result['seconds'] * 1000:8.2f} ms  "
+            f"{result['deltas_per_second']:12,.0f} deltas/s  "
+            f"x{baseline / result['seconds']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: tool schema building for agents with many tools.
+
+Measures `function_to_json` per function, compiling an agent's tool list
+cold (`compile_tools` cache cleared) and memoized, and building a full
+request body for an agent with `--tools` functions.
+
+    python benchmarks/bench_tools.py --tools 60
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from swarm import Agent  # noqa: E402
+from swarm.core import build_request  # noqa: E402
+from swarm.tools import _compile, compile_tools  # noqa: E402
+from swarm.util import function_to_json  # noqa: E402
+
+
+def make_tools(n: int) -> list:
+    tools = []
+    for i in range(n):
+        namespace = {}
+        exec(
+            f"def tool_{i}(address: str, amount: int, memo: str = '', dry_run: bool = False,"
+            f" context_variables: dict = None):\n"
+            f"    '''Tool number {i}: transfers `amount` to `address`.'''\n"
+            f"    return address\n",
+            namespace,
+        )
+        tools.append(namespace[f"tool_{i}"])
+    return tools
+
+
+def bench(fn, repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run(tools: int = 60, repeat: int = 5, number: int = 200) -> dict:
+    functions = make_tools(tools)
+    agent = Agent(functions=functions)
+    history = [{"role": "user", "content": "hi"}]
+
+    def cold_compile():
+        _compile.cache_clear()
+        compile_tools(functions)
+
+    compile_tools(functions)
+    return {
+        "function_to_json": {
+            "seconds_per_tool": bench(
+                lambda: [function_to_json(f) for f in functions], repeat, number) / tools,
+        },
+        "compile_tools": {
+            "cold_seconds": bench(cold_compile, repeat, number),
+            "memoized_seconds": bench(lambda: compile_tools(functions), repeat, number),
+        },
+        "build_request": {
+            "seconds": bench(
+                lambda: build_request(agent, history, {}, None, False), repeat, number),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tools", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.tools, args.repeat, args.number)
+    print(f"function_to_json       {results['function_to_json']['seconds_per_tool'] * 1e6:8.2f} us/tool")
+    print(f"compile_tools (cold)   {results['compile_tools']['cold_seconds'] * 1e6:8.2f} us")
+    print(f"compile_tools (cached) {results['compile_tools']['memoized_seconds'] * 1e6:8.2f} us")
+    print(f"build_request          {results['build_request']['seconds'] * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
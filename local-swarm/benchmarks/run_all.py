@@ -0,0 +1,121 @@
+"""
+Runs every benchmark and writes the results to a JSON file.
+
+Each metric is stored under a flat `bench.case.metric` key, with the git
+commit, Python version and platform, so two result files can be compared:
+
+    python benchmarks/run_all.py                       # results/<commit>.json
+    python benchmarks/run_all.py --quick --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import bench_history  # noqa: E402
+import bench_import  # noqa: E402
+import bench_merge  # noqa: E402
+import bench_runtime  # noqa: E402
+import bench_serve  # noqa: E402
+import bench_sse  # noqa: E402
+import bench_tools  # noqa: E402
+
+# (module, full-size kwargs, --quick kwargs)
+BENCHMARKS = {
+    "runtime": (bench_runtime, {}, {"runs": 50, "deltas": 500, "concurrency": 8}),
+    "sse": (bench_sse, {}, {"deltas": 1000, "repeat": 3}),
+    "merge": (bench_merge, {}, {"deltas": 1000}),
+    "tools": (bench_tools, {}, {"number": 20}),
+    "history": (bench_history, {}, {"n_messages": 300, "turns": 5}),
+    "serve": (bench_serve, {}, {"sessions": 16, "turns": 2, "max_concurrency": 8}),
+    "import": (bench_import, {}, {"repeat": 3}),
+}
+
+# metrics where a larger value is better; all others are costs
+HIGHER_IS_BETTER = ("per_second",)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def run(names=None, quick: bool = False) -> dict:
+    metrics = {}
+    for name, (module, full, quick_kwargs) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        metrics.update(flatten(module.run(**(quick_kwargs if quick else full)), name))
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "metrics": metrics,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """Rows of (metric, baseline, current, speedup); speedup > 1 is better."""
+    rows = []
+    for name, value in current["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if not old or not value:
+            continue
+        better_up = any(marker in name for marker in HIGHER_IS_BETTER)
+        rows.append((name, old, value, value / old if better_up else old / value))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help=f"subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for CI")
+    parser.add_argument("--output", help="default: benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="a previous results file to compare against")
+    args = parser.parse_args()
+
+    results = run(args.names, args.quick)
+    output = args.output or os.path.join(HERE, "results", f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"wrote {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"{'metric':<50} {'baseline':>14} {'current':>14} {'speedup':>8}")
+        for name, old, new, speedup in compare(results, baseline):
+            print(f"{name:<50} {old:>14.6g} {new:>14.6g} {speedup:>7.2f}x")
+    else:
+        for name, value in results["metrics"].items():
+            print(f"{name:<50} {value:>14.6g}")
+
+
+if __name__ == "__main__":
+    main()
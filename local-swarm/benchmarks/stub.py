@@ -0,0 +1,38 @@
+"""
+Runs `swarm.stub_server` in a subprocess for the benchmarks, so the
+upstream does not share the benchmark's GIL or show up in its memory
+measurements.
+"""
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+@contextlib.contextmanager
+def stub_upstream(script=None, ttft: float = 0.0, token_delay: float = 0.0):
+    """Yields the base URL of a stub server replaying `script` forever."""
+    args = [sys.executable, "-m", "swarm.stub_server", "--port", "0",
+            "--ttft", str(ttft), "--token-delay", str(token_delay)]
+    script_file = None
+    if script is not None:
+        script_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump(script, script_file)
+        script_file.close()
+        args += ["--script", script_file.name, "--cycle"]
+
+    process = subprocess.Popen(args, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("stub server failed to start")
+        yield line.rsplit(" ", 1)[-1].strip()
+    finally:
+        process.terminate()
+        process.wait()
+        if script_file is not None:
+            os.unlink(script_file.name)
@@ -1,8 +1,10 @@
 import json
 
 from swarm import Agent
+from swarm.tool_cache import cached_tool
 
 
+@cached_tool(ttl=300)
 def get_weather(location, time="now"):
     """Get the current weather in a given location. Location MUST be a city."""
     return json.dumps({"location": location, "temperature": "65", "time": time})
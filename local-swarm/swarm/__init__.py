@@ -1,4 +1,6 @@
 from .core import Swarm
-from .types import Agent, Response
+from .async_core import AsyncSwarm
+from .process_pool import cpu_bound
+from .types import Agent, BatchResult, Response
 
-__all__ = ["Swarm", "Agent", "Response"]
+__all__ = ["Swarm", "AsyncSwarm", "Agent", "Response", "BatchResult", "cpu_bound"]
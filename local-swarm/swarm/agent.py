@@ -2,6 +2,9 @@ from typing import Any, Callable, Dict, List, Optional, Union
 import httpx
 import json
 
+from .transport import get_default_transport
+
+
 class Agent:
     def __init__(
         self,
@@ -12,6 +15,7 @@ class Agent:
         instructions: Optional[str] = None,
         functions: Optional[List[Callable]] = None,
         context_variables: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.Client] = None,
     ):
         self.name = name
         self.model = model
@@ -20,7 +24,7 @@ class Agent:
         self.instructions = instructions
         self.functions = functions or []
         self.context_variables = context_variables or {}
-        self.client = httpx.Client()
+        self.client = client or get_default_transport().client
 
     def chat(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
         headers = {
@@ -0,0 +1,423 @@
+# Standard library imports
+import asyncio
+import inspect
+from typing import Callable, Iterable, List
+
+import httpx
+
+# Local imports
+from .cache import CompletionCache
+from .coalesce import Coalescer
+from .context import ContextManager
+from .core import (
+    CLOSE,
+    SEND,
+    SLEEP,
+    RunState,
+    StreamTurn,
+    SwarmBase,
+    Turn,
+    to_tool_calls,
+)
+from .sse import ChatStreamDecoder
+from .ratelimit import RateLimiter
+from .retry import CircuitBreakerRegistry, RetryPolicy
+from .router import Router
+from .store import ConversationStore
+from .tracing import SpanHandler
+from .transport import Transport, get_default_transport
+from .util import debug_print
+from .types import (
+    Agent,
+    AgentFunction,
+    ChatCompletionMessageToolCall,
+    Response,
+)
+
+
+async def _replay(deltas: List[dict]):
+    for delta in deltas:
+        yield delta
+
+
+class AsyncSwarm(SwarmBase):
+    """
+    asyncio counterpart of `Swarm`, built on `httpx.AsyncClient`.
+
+    Runs the same turn loop as `Swarm` (handoffs, context_variables,
+    max_turns, execute_tools) but never blocks the event loop, so a single
+    process can drive many conversations concurrently. Agent functions may be
+    plain functions or `async def` coroutines; plain functions are run in a
+    worker thread. With `parallel_tool_execution=True`, the tool calls of a
+    single turn are awaited concurrently with `asyncio.gather`. Routing,
+    retries and bookkeeping are `SwarmBase`'s, shared with `Swarm`; with a
+    `store`, its (short, synchronous) writes happen on the event loop.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient = None,
+        parallel_tool_execution: bool = False,
+        early_tool_dispatch: bool = False,
+        transport: Transport = None,
+        retry_policy: RetryPolicy = None,
+        circuit_breakers: CircuitBreakerRegistry = None,
+        cache: CompletionCache = None,
+        context_manager: ContextManager = None,
+        hooks: Iterable[SpanHandler] = None,
+        router: Router = None,
+        rate_limiter: RateLimiter = None,
+        coalescer: Coalescer = None,
+        store: ConversationStore = None,
+    ):
+        super().__init__(
+            parallel_tool_execution=parallel_tool_execution,
+            early_tool_dispatch=early_tool_dispatch,
+            retry_policy=retry_policy,
+            circuit_breakers=circuit_breakers,
+            cache=cache,
+            context_manager=context_manager,
+            hooks=hooks,
+            router=router,
+            rate_limiter=rate_limiter,
+            coalescer=coalescer,
+            store=store,
+        )
+        self._client = client
+        self.transport = transport or get_default_transport()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # the shared pool hands out one client per running event loop
+        return self._client or self.transport.async_client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def carry_out(self, flow, stream: bool = False):
+        """Async version of `Swarm.carry_out`."""
+        outcome = None
+        try:
+            while True:
+                try:
+                    action, value = flow.send(outcome)
+                except StopIteration as done:
+                    return done.value
+                outcome = None
+                if action == SEND:
+                    try:
+                        outcome = await self.client.send(value, stream=stream)
+                    except httpx.TransportError as e:
+                        outcome = e
+                elif action == SLEEP:
+                    await asyncio.sleep(value)
+                elif action == CLOSE:
+                    await value.aclose()
+        finally:
+            # if the I/O raised or was cancelled, the flow still cleans up after itself
+            flow.close()
+
+    async def send_chat_completion(
+        self, agent: Agent, data: dict, stream: bool = False
+    ) -> httpx.Response:
+        """Async version of `Swarm.send_chat_completion`."""
+        return await self.carry_out(self.request_flow(agent, data), stream)
+
+    async def send_to(
+        self,
+        base_url: str,
+        api_key: str,
+        content: bytes,
+        stream: bool = False,
+        retry_policy: RetryPolicy = None,
+        tokens: int = 0,
+    ) -> httpx.Response:
+        """Async version of `Swarm.send_to`."""
+        return await self.carry_out(
+            self.retry_flow(base_url, api_key, content, retry_policy, tokens), stream)
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> dict:
+        turn = Turn(self, agent, history, context_variables, model_override, stream, debug)
+        debug_print(debug, "Getting chat completion for...:", turn.data["messages"])
+        if turn.cached is not None:
+            return turn.served_from_cache()
+
+        if self.coalescer is not None:
+            completion, coalesced = await self.coalescer.acall(
+                turn.coalesce_key(), lambda: self.request_completion(agent, turn.data))
+        else:
+            completion, coalesced = await self.request_completion(agent, turn.data), False
+        return turn.completed(completion, coalesced)
+
+    async def request_completion(self, agent: Agent, data: dict) -> dict:
+        """Async version of `Swarm.request_completion`."""
+        return self.read_completion(await self.send_chat_completion(agent, data))
+
+    async def aiter_deltas(
+        self, response: httpx.Response, debug: bool = False, usage: dict = None
+    ):
+        """Async version of `Swarm.iter_deltas`."""
+        decoder = ChatStreamDecoder()
+        async for raw in response.aiter_bytes():
+            for delta in self.stream_deltas(decoder.feed(raw), response, usage):
+                yield delta
+        for delta in self.stream_deltas(decoder.flush(), response, usage):
+            yield delta
+        if decoder.errors:
+            debug_print(debug, f"Skipped {decoder.errors} malformed stream chunks.")
+
+    async def call_function(self, func: AgentFunction, args: dict):
+        if inspect.iscoroutinefunction(func):
+            return await func(**args)
+        raw_result = await asyncio.to_thread(func, **args)
+        # sync wrappers around coroutines (e.g. functools.partial) still work
+        if inspect.isawaitable(raw_result):
+            raw_result = await raw_result
+        return raw_result
+
+    def submit_tool_call(self, func: AgentFunction, args: dict) -> asyncio.Task:
+        return asyncio.ensure_future(self.call_function(func, args))
+
+    async def finish_tool_calls(
+        self, started: List[tuple], debug: bool, on_message: Callable = None
+    ) -> Response:
+        """Async version of `Swarm.finish_tool_calls`."""
+        raw_results = []
+        errors = {}
+        for i, (call, task) in enumerate(started):
+            raw_result = None
+            if task is not None:
+                try:
+                    raw_result = await task
+                except Exception as e:
+                    errors[i] = e
+            raw_results.append(raw_result)
+            if on_message is not None and i not in errors:
+                on_message(self.collect_tool_results([call], [raw_result], debug))
+        if errors:
+            raise errors[min(errors)]
+        return self.collect_tool_results(
+            [call for call, _ in started], raw_results, debug)
+
+    async def execute_tool_calls(self, calls: List[tuple], on_result: Callable = None) -> List:
+        """
+        Async version of `Swarm.execute_tool_calls`: awaits the prepared tool
+        calls concurrently, calling `on_result(i, raw_result)` as each one
+        finishes, and re-raises the error of the earliest failing tool call
+        once all calls have finished.
+        """
+        async def call(i, func, args):
+            raw_result = await self.call_function(func, args) if func else None
+            if on_result is not None:
+                on_result(i, raw_result)
+            return raw_result
+
+        raw_results = await asyncio.gather(
+            *(call(i, func, args) for i, (_, func, args) in enumerate(calls)),
+            return_exceptions=True,
+        )
+        for raw_result in raw_results:
+            # re-raise the error of the earliest failing tool call
+            if isinstance(raw_result, BaseException):
+                raise raw_result
+        return raw_results
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        agent_name: str = None,
+        tool_timeout: float = None,
+        on_message: Callable = None,
+    ) -> Response:
+        """Async version of `Swarm.handle_tool_calls`."""
+        calls = self.prepare_tool_calls(
+            tool_calls, functions, context_variables, debug, agent_name, tool_timeout)
+        on_result = self.result_callback(calls, debug, on_message)
+
+        if self.parallel_tool_execution and len(calls) > 1:
+            raw_results = await self.execute_tool_calls(calls, on_result)
+        else:
+            raw_results = []
+            for i, (_, func, args) in enumerate(calls):
+                raw_results.append(await self.call_function(func, args) if func else None)
+                if on_result is not None:
+                    on_result(i, raw_results[-1])
+
+        return self.collect_tool_results(calls, raw_results, debug)
+
+    async def aresume(
+        self,
+        conversation_id: str,
+        agents: Iterable[Agent],
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> Response:
+        """Async version of `Swarm.resume`."""
+        agent, context_variables, pending, caller, finished = self.resume_point(
+            conversation_id, agents, execute_tools, debug)
+        if finished:
+            return Response(messages=[], agent=agent, context_variables=context_variables)
+
+        added = []
+        if pending:
+            partial_response = await self.handle_tool_calls(
+                to_tool_calls(pending), caller.functions, context_variables, debug,
+                caller.name, caller.tool_timeout,
+                self.tool_recorder(conversation_id, agent, context_variables),
+            )
+            context_variables.update(partial_response.context_variables)
+            agent = partial_response.agent or agent
+            self.save(conversation_id, (), agent, context_variables)
+            added = partial_response.messages
+
+        response = await self.arun(
+            agent, [], context_variables, model_override, debug=debug,
+            max_turns=max_turns, execute_tools=execute_tools,
+            conversation_id=conversation_id,
+        )
+        response.messages = added + response.messages
+        return response
+
+    async def arun_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        conversation_id: str = None,
+    ):
+        run = RunState(self, agent, messages, context_variables, conversation_id, stream=True)
+
+        while run.running(max_turns):
+            turn = StreamTurn(
+                self, run.active_agent, run.history, run.context_variables,
+                model_override, debug, execute_tools)
+
+            response = None
+            try:
+                if turn.sends:
+                    response = await self.send_chat_completion(
+                        run.active_agent, turn.data, stream=True)
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise self.api_error(response)
+                    if turn.leading:
+                        # upstream is read at its own pace; the leader replays
+                        # the flight like its followers
+                        self.coalescer.apump(turn.coalesce_key(), turn.flight,
+                                             self.aiter_deltas(response, debug, turn.usage),
+                                             response.aclose)
+                        response, turn.pumping = None, True
+
+                yield {"delim": "start"}
+
+                if turn.cached is not None:
+                    deltas = _replay(turn.cached)
+                elif turn.flight is not None:
+                    deltas = turn.flight.asubscribe()
+                else:
+                    deltas = self.aiter_deltas(response, debug, turn.usage)
+                async for delta in deltas:
+                    yield turn.emit(delta)
+                    turn.add(delta)
+            except BaseException as e:
+                running = turn.fail(e)
+                if running and not isinstance(e, GeneratorExit):
+                    await asyncio.gather(*running, return_exceptions=True)
+                raise
+            finally:
+                if response is not None:
+                    await response.aclose()
+
+            yield {"delim": "end"}
+            message = turn.message()
+            run.add_message(message)
+
+            if not message["tool_calls"] or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            # handle function calls, updating context_variables, and switching agents
+            if turn.dispatch is not None:
+                partial_response = await self.finish_tool_calls(
+                    turn.dispatch.dispatch_rest(message["tool_calls"]), debug,
+                    run.tool_recorder())
+            else:
+                partial_response = await self.handle_tool_calls(
+                    to_tool_calls(message["tool_calls"]), run.active_agent.functions,
+                    run.context_variables, debug, run.active_agent.name,
+                    run.active_agent.tool_timeout, run.tool_recorder(),
+                )
+            run.add_tool_results(partial_response)
+
+        yield {"response": run.response()}
+
+    async def arun(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        conversation_id: str = None,
+    ) -> Response:
+        run = RunState(self, agent, messages, context_variables, conversation_id, stream=False)
+
+        while run.running(max_turns):
+
+            # get completion with current history, agent
+            completion = await self.get_chat_completion(
+                agent=run.active_agent,
+                history=run.history,
+                context_variables=run.context_variables,
+                model_override=model_override,
+                stream=False,
+                debug=debug,
+            )
+            message = completion["choices"][0]["message"]
+            debug_print(debug, "Received completion:", message)
+            message["sender"] = run.active_agent.name
+            run.add_message(message)
+
+            if not message.get("tool_calls") or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            # handle function calls, updating context_variables, and switching agents
+            partial_response = await self.handle_tool_calls(
+                to_tool_calls(message["tool_calls"]),
+                run.active_agent.functions,
+                run.context_variables,
+                debug,
+                run.active_agent.name,
+                run.active_agent.tool_timeout,
+                run.tool_recorder(),
+            )
+            run.add_tool_results(partial_response)
+
+        return run.response()
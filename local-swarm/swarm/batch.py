@@ -0,0 +1,133 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List
+
+from .types import Agent, BatchResult
+from .util import debug_print
+
+
+class BatchStats:
+    """
+    Aggregate throughput of a `Swarm.run_many` batch, updated as results
+    come in.
+    """
+
+    def __init__(self):
+        self.conversations = 0
+        self.errors = 0
+        self.turns = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def conversations_per_second(self) -> float:
+        return self.conversations / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "conversations": self.conversations,
+            "errors": self.errors,
+            "turns": self.turns,
+            "elapsed": self.elapsed,
+            "conversations_per_second": self.conversations_per_second,
+            "turns_per_second": self.turns_per_second,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.conversations} conversations ({self.errors} errors), "
+            f"{self.turns} turns in {self.elapsed:.2f}s: "
+            f"{self.conversations_per_second:.2f} conversations/s, "
+            f"{self.turns_per_second:.2f} turns/s"
+        )
+
+
+class BatchRun:
+    """
+    Iterator over the results of `Swarm.run_many`, in completion order.
+
+    At most `max_concurrency` conversations are in flight at once and
+    `conversations` is consumed lazily, so arbitrarily large batches run in
+    constant memory. Throughput so far is available on `stats`.
+    """
+
+    def __init__(
+        self,
+        swarm,
+        agent: Agent,
+        conversations: Iterable[List],
+        max_concurrency: int,
+        run_kwargs: dict,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.swarm = swarm
+        self.agent = agent
+        self.conversations = conversations
+        self.max_concurrency = max_concurrency
+        self.run_kwargs = run_kwargs
+        self.stats = BatchStats()
+        self._results = self._run()
+
+    def __iter__(self) -> Iterator[BatchResult]:
+        return self
+
+    def __next__(self) -> BatchResult:
+        return next(self._results)
+
+    def _run_one(self, index: int, messages: List) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            response = self.swarm.run(
+                agent=self.agent, messages=messages, **self.run_kwargs)
+        except Exception as e:
+            return BatchResult(
+                index=index, error=e, elapsed=time.perf_counter() - start)
+        turns = sum(1 for m in response.messages if m.get("role") == "assistant")
+        return BatchResult(
+            index=index,
+            response=response,
+            turns=turns,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _run(self) -> Iterator[BatchResult]:
+        items = enumerate(self.conversations)
+        debug = self.run_kwargs.get("debug", False)
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="swarm-batch"
+        ) as executor:
+            pending = set()
+            exhausted = False
+            self.stats.started_at = time.perf_counter()
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self._run_one, *item))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.stats.conversations += 1
+                    self.stats.turns += result.turns
+                    if result.error is not None:
+                        self.stats.errors += 1
+                        debug_print(
+                            debug, f"Conversation {result.index} failed: {result.error}")
+                    yield result
+
+        self.stats.finished_at = time.perf_counter()
+        debug_print(debug, "Batch finished:", self.stats)
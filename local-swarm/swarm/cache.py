@@ -0,0 +1,191 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def request_key(data: dict) -> str:
+    """
+    Canonical hash of a `/chat/completions` request body: model, messages,
+    tools, tool_choice, generation params and the stream flag. Key order and
+    whitespace do not affect the result.
+    """
+    canonical = json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class DiskTier:
+    """
+    sqlite-backed tier of `CompletionCache`. Entries survive restarts; the
+    least recently used ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)"
+        )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def get(self, key: str):
+        row = self._conn.execute(
+            "SELECT value, created FROM completions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute(
+                "UPDATE completions SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        return row
+
+    def put(self, key: str, value: str) -> int:
+        """Stores `value`, returning the number of entries evicted."""
+        now = time.time()
+        inserted = self._conn.execute(
+            "INSERT OR IGNORE INTO completions VALUES (?, ?, ?, ?)", (key, value, now, now)
+        ).rowcount
+        if not inserted:
+            self._conn.execute(
+                "UPDATE completions SET value = ?, created = ?, accessed = ? WHERE key = ?",
+                (value, now, now, key),
+            )
+        self._count += inserted
+        overflow = self._count - self.max_entries
+        if overflow <= 0:
+            return 0
+        self._conn.execute(
+            "DELETE FROM completions WHERE key IN "
+            "(SELECT key FROM completions ORDER BY accessed LIMIT ?)",
+            (overflow,),
+        )
+        self._count -= overflow
+        return overflow
+
+    def delete(self, key: str) -> None:
+        self._count -= self._conn.execute(
+            "DELETE FROM completions WHERE key = ?", (key,)
+        ).rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CompletionCache:
+    """
+    Opt-in cache of chat completion responses, keyed on `request_key`.
+
+    Lookups go to an in-memory LRU tier of `max_entries` first, then to an
+    optional sqlite file at `path` (promoting hits into memory). Entries older
+    than `ttl` seconds are treated as misses and dropped. Non-streaming
+    requests store the completion JSON; streaming requests store the list of
+    deltas so they can be replayed to streaming callers.
+
+    Values are stored serialized, so every hit returns a fresh copy that the
+    caller is free to mutate.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        disk_max_entries: int = 100_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = DiskTier(path, disk_max_entries) if path else None
+        self.stats = CacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    key = staticmethod(request_key)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            if self.disk is not None:
+                row = self.disk.get(key)
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created):
+                        self._remember(key, value, created)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return json.loads(value)
+                    self.disk.delete(key)
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value) -> None:
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, serialized, time.time())
+            if self.disk is not None:
+                self.stats.evictions += self.disk.put(key, serialized)
+
+    def _remember(self, key: str, serialized: str, created: float) -> None:
+        self._memory[key] = (serialized, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,279 @@
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Tuple
+
+from .cache import request_key
+
+
+class LeaderAbandoned(Exception):
+    """Raised to followers when the request is stopped before it finished."""
+
+
+def leader_error(error: BaseException) -> BaseException:
+    # the request being cancelled or closed is not the followers' error
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+        return LeaderAbandoned("the request was stopped before it finished")
+    return error
+
+
+class Flight:
+    """
+    One request in progress. Followers of a plain request wait on `future`;
+    readers of a stream get the deltas `publish`ed by its pump, including
+    those published before they joined.
+    """
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.followers = 0
+        self.deltas = []
+        self.done = False
+        self.error = None
+        self.abandoned = False
+        self._cond = threading.Condition()
+        self._async_waiters = []
+
+    def publish(self, delta: dict) -> None:
+        """Adds one delta of the stream; it must not be mutated afterwards."""
+        with self._cond:
+            self.deltas.append(delta)
+            self._wake()
+
+    def abandon(self) -> None:
+        """Marks that the leader stopped reading; the pump may stop once nobody else reads."""
+        self.abandoned = True
+
+    def close(self, error: BaseException = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._wake()
+
+    def _wake(self) -> None:
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def subscribe(self):
+        """Yields copies of the published deltas as they arrive."""
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.deltas) and not self.done:
+                    self._cond.wait()
+                if i >= len(self.deltas):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                pending = self.deltas[i:]
+            i += len(pending)
+            for delta in pending:
+                yield copy.deepcopy(delta)
+
+    async def asubscribe(self):
+        """Async version of `subscribe`."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            self._async_waiters.append(waiter)
+        try:
+            i = 0
+            while True:
+                with self._cond:
+                    event.clear()
+                    pending = self.deltas[i:]
+                    done, error = self.done, self.error
+                if pending:
+                    i += len(pending)
+                    for delta in pending:
+                        yield copy.deepcopy(delta)
+                elif done:
+                    if error is not None:
+                        raise error
+                    return
+                else:
+                    await event.wait()
+        finally:
+            with self._cond:
+                self._async_waiters.remove(waiter)
+
+
+class CoalesceStats:
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        return self.coalesced / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "sent": self.requests - self.coalesced,
+            "coalesced_rate": self.coalesced_rate,
+        }
+
+
+class Coalescer:
+    """
+    Single-flight layer for chat completions. While a request is in
+    progress, identical requests (same endpoint, key and canonical body,
+    see `request_key`) do not go upstream: their callers wait for the
+    first one's completion, or replay its streamed deltas as they arrive.
+    Nothing is kept once the request has finished; pair with a
+    `CompletionCache` for that.
+
+    Give one to `Swarm(coalescer=...)` or `AsyncSwarm(coalescer=...)`; a
+    coalescer may be shared by several clients. Errors of the leading
+    request are raised to every caller that joined it. The shared request
+    runs apart from the leading caller, so a slow, closed or cancelled
+    leader neither holds back nor fails the others.
+    """
+
+    def __init__(self):
+        self.stats = CoalesceStats()
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+    def key(self, base_url: str, api_key: str, data: dict) -> str:
+        return request_key({"base_url": base_url, "api_key": api_key, "body": data})
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """Returns the flight for `key` and whether the caller leads it."""
+        with self._lock:
+            self.stats.requests += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                return flight, True
+            flight.followers += 1
+            self.stats.coalesced += 1
+            return flight, False
+
+    def finish(self, key: str, flight: Flight, result=None, error: BaseException = None) -> None:
+        """Ends a flight; later identical requests start a new one."""
+        if error is not None:
+            error = leader_error(error)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            followers = flight.followers
+        if followers:
+            if error is not None:
+                flight.future.set_exception(error)
+            else:
+                # followers get copies: callers mutate the completion they receive
+                flight.future.set_result(copy.deepcopy(result))
+        flight.close(error)
+
+    def retire(self, key: str, flight: Flight) -> bool:
+        """Ends `flight` early if nobody follows it; returns whether it did."""
+        with self._lock:
+            if flight.followers or self._flights.get(key) is not flight:
+                return False
+            del self._flights[key]
+            return True
+
+    def pump(self, key: str, flight: Flight, deltas: Iterator[dict],
+             close: Callable[[], None]) -> threading.Thread:
+        """
+        Publishes `deltas` into `flight` from a thread of its own, so the
+        stream advances at upstream pace however the leader consumes it, and
+        calls `close` at the end. The leader reads `flight.subscribe()` like
+        its followers and calls `flight.abandon()` if it stops early.
+        """
+        thread = threading.Thread(target=self._pump, args=(key, flight, deltas, close),
+                                  name="swarm-coalesce-pump", daemon=True)
+        thread.start()
+        return thread
+
+    def _pump(self, key, flight, deltas, close):
+        try:
+            for delta in deltas:
+                flight.publish(delta)
+                if flight.abandoned and self.retire(key, flight):
+                    break  # nobody reads the stream any more
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+        else:
+            self.finish(key, flight)
+        finally:
+            close()
+
+    def apump(self, key: str, flight: Flight, deltas: AsyncIterator[dict],
+              aclose: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        """Async version of `pump`, running as a task of the current loop."""
+        return self._spawn(self._apump(key, flight, deltas, aclose))
+
+    async def _apump(self, key, flight, deltas, aclose):
+        try:
+            async for delta in deltas:
+                flight.publish(delta)
+                if flight.abandoned and self.retire(key, flight):
+                    break
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+        else:
+            self.finish(key, flight)
+        finally:
+            await aclose()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # the loop only keeps weak references to its tasks
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def call(self, key: str, fetch: Callable[[], dict]) -> Tuple[dict, bool]:
+        """
+        Returns `fetch()`, or a copy of the result of the identical call in
+        progress, and whether the result was shared.
+        """
+        flight, leading = self.join(key)
+        if not leading:
+            return copy.deepcopy(flight.future.result()), True
+        try:
+            result = fetch()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result, False
+
+    async def acall(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> Tuple[dict, bool]:
+        """Async version of `call`."""
+        flight, leading = self.join(key)
+        if not leading:
+            return copy.deepcopy(await asyncio.wrap_future(flight.future)), True
+
+        async def fetch_and_finish():
+            try:
+                result = await fetch()
+            except BaseException as e:
+                self.finish(key, flight, error=e)
+                raise
+            self.finish(key, flight, result)
+            return result
+
+        # shielded: cancelling the leader does not cancel the followers' request
+        task = self._spawn(fetch_and_finish())
+        try:
+            return await asyncio.shield(task), False
+        except asyncio.CancelledError:
+            if self.retire(key, flight):
+                task.cancel()
+            else:
+                task.add_done_callback(_retrieve)
+            raise
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # errors reach the followers; keep asyncio from reporting them unretrieved
+    if not task.cancelled():
+        task.exception()
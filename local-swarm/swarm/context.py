@@ -0,0 +1,277 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import Callable, List, Optional, Sequence
+
+# per-message framing overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+
+def message_digest(role: Optional[str], content: Optional[str], tool_calls) -> int:
+    """
+    A cache key for a message's token count. Python caches the hash of a
+    string on the string, so re-counting the same history turn after turn
+    does not re-read multi-megabyte tool outputs.
+    """
+    calls = tuple(
+        (call.get("id"), (call.get("function") or {}).get("name"),
+         (call.get("function") or {}).get("arguments"))
+        for call in tool_calls or ()
+    )
+    return hash((role, content, calls))
+
+
+class TokenCounter:
+    """
+    Counts tokens per message, caching the result under a digest of its
+    role, content and tool calls, so equal messages (such as the system
+    message rebuilt every turn) share one entry and the cache holds no
+    message text. At most `max_cached` entries are kept, least recently used
+    first out.
+
+    Uses `tiktoken` when it is installed and knows `model`, otherwise
+    estimates ~4 characters per token. `tiktoken` is loaded on the first
+    count, not when `swarm` is imported.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini", max_cached: int = 4096):
+        self.model = model
+        self.max_cached = max_cached
+        # message digest -> tokens
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @cached_property
+    def encode(self) -> Optional[Callable[[str], list]]:
+        try:
+            import tiktoken
+        except ImportError:  # optional: fall back to a character heuristic
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model).encode
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base").encode
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encode is not None:
+            return len(self.encode(text))
+        return (len(text) + 3) // 4
+
+    def count(self, message: dict) -> int:
+        content = message.get("content")
+        if content is not None and not isinstance(content, str):
+            content = json.dumps(content)
+        tool_calls = message.get("tool_calls")
+        key = message_digest(message.get("role"), content, tool_calls)
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                return tokens
+
+        tool_calls = json.dumps(tool_calls) if tool_calls else None
+        tokens = MESSAGE_OVERHEAD + self.count_text(content) + self.count_text(tool_calls)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_all(self, messages: Sequence[dict]) -> int:
+        return sum(self.count(m) for m in messages)
+
+
+def group_turns(messages: Sequence[dict]) -> List[List[dict]]:
+    """
+    Splits messages into units that must be kept or dropped together: an
+    assistant message with `tool_calls` plus the tool results answering it,
+    or any other single message. Trimming whole units keeps every
+    tool_call / tool result pair valid.
+    """
+    units = []
+    pending_ids = set()
+    for message in messages:
+        if (
+            message.get("role") == "tool"
+            and units
+            and message.get("tool_call_id") in pending_ids
+        ):
+            units[-1].append(message)
+            pending_ids.discard(message.get("tool_call_id"))
+            continue
+        units.append([message])
+        pending_ids = {
+            tool_call["id"] for tool_call in message.get("tool_calls") or ()
+        }
+    # orphaned tool results (their call was trimmed upstream) are invalid on their own
+    return [unit for unit in units if unit[0].get("role") != "tool"]
+
+
+class TrimStrategy:
+    """Base class: reduce `messages` towards `budget` tokens."""
+
+    def trim(
+        self, messages: List[dict], budget: int, counter: TokenCounter
+    ) -> List[dict]:
+        raise NotImplementedError
+
+
+class CollapseToolOutputs(TrimStrategy):
+    """
+    Truncates large tool outputs, oldest first, leaving the most recent
+    `keep_last` units untouched. Collapsed messages are copies; the history
+    itself is never modified.
+    """
+
+    def __init__(self, max_tokens: int = 200, keep_last: int = 2):
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+
+    def trim(self, messages, budget, counter):
+        units = group_turns(messages)
+        total = counter.count_all(messages)
+        protected = len(units) - self.keep_last
+        for unit in units[:max(protected, 0)]:
+            if total <= budget:
+                break
+            for i, message in enumerate(unit):
+                if message.get("role") != "tool":
+                    continue
+                tokens = counter.count(message)
+                if tokens - MESSAGE_OVERHEAD <= self.max_tokens:
+                    continue
+                content = message.get("content") or ""
+                keep_chars = self.max_tokens * 4
+                collapsed = dict(message)
+                collapsed["content"] = (
+                    f"{content[:keep_chars]}... [truncated {tokens} tokens]"
+                )
+                unit[i] = collapsed
+                total += counter.count(collapsed) - tokens
+        return [message for unit in units for message in unit]
+
+
+class DropOldestTurns(TrimStrategy):
+    """Drops the oldest units until the budget is met, keeping at least `keep_last`."""
+
+    def __init__(self, keep_last: int = 1):
+        self.keep_last = keep_last
+
+    def trim(self, messages, budget, counter):
+        units = group_turns(messages)
+        sizes = [counter.count_all(unit) for unit in units]
+        total = sum(sizes)
+        start = 0
+        while total > budget and len(units) - start > self.keep_last:
+            total -= sizes[start]
+            start += 1
+        return [message for unit in units[start:] for message in unit]
+
+
+class SummarizePrefix(TrimStrategy):
+    """
+    Replaces the oldest units with a single summary message.
+
+    `summarizer(messages) -> str` is called with the dropped prefix (it may
+    well call a model itself). Summaries are memoized on the identity of the
+    prefix, so a long conversation is not re-summarized on every turn.
+    """
+
+    def __init__(
+        self,
+        summarizer: Callable[[List[dict]], str],
+        keep_last: int = 4,
+        summary_tokens: int = 300,
+    ):
+        self.summarizer = summarizer
+        self.keep_last = keep_last
+        self.summary_tokens = summary_tokens
+        self._summaries = OrderedDict()
+
+    def trim(self, messages, budget, counter):
+        units = group_turns(messages)
+        sizes = [counter.count_all(unit) for unit in units]
+        total = sum(sizes)
+        if total <= budget or len(units) <= self.keep_last:
+            return messages
+        target = budget - self.summary_tokens
+        start = 0
+        while start < len(units) - self.keep_last and (total > target or start == 0):
+            total -= sizes[start]
+            start += 1
+
+        prefix = [message for unit in units[:start] for message in unit]
+        key = (id(prefix[0]), id(prefix[-1]), len(prefix))
+        cached = self._summaries.get(key)
+        if cached is not None and cached[0] is prefix[0] and cached[1] is prefix[-1]:
+            summary = cached[2]
+        else:
+            summary = {
+                "role": "system",
+                "content": "Summary of the earlier conversation:\n"
+                + self.summarizer(prefix),
+            }
+            self._summaries[key] = (prefix[0], prefix[-1], summary)
+            if len(self._summaries) > 256:
+                self._summaries.popitem(last=False)
+        return [summary] + [message for unit in units[start:] for message in unit]
+
+
+class ContextManager:
+    """
+    Keeps the messages sent to the model within a token budget.
+
+    The budget is `agent.max_context_tokens` if set, else `budget`; the
+    system prompt and tool schemas count against it. Strategies run in
+    order until the conversation fits. Only the request is trimmed:
+    `Response.messages` and the caller's history are left intact.
+    """
+
+    def __init__(
+        self,
+        budget: int = 16_000,
+        strategies: Optional[List[TrimStrategy]] = None,
+        counter: Optional[TokenCounter] = None,
+    ):
+        self.budget = budget
+        self.strategies = (
+            strategies
+            if strategies is not None
+            else [CollapseToolOutputs(), DropOldestTurns()]
+        )
+        self.counter = counter or TokenCounter()
+        self._tools_tokens = {}
+        self.trimmed_requests = 0
+        self.tokens_saved = 0
+
+    def reserved_tokens(self, system_message: dict, tools: Optional[List[dict]]) -> int:
+        """Tokens taken by the system prompt and tool schemas of a request."""
+        tokens = self.counter.count(system_message)
+        if tools:
+            # compiled tool lists are shared between turns, so key on identity
+            cached = self._tools_tokens.get(id(tools))
+            if cached is None or cached[0] is not tools:
+                cached = (tools, self.counter.count_text(json.dumps(tools)))
+                self._tools_tokens[id(tools)] = cached
+            tokens += cached[1]
+        return tokens
+
+    def fit(
+        self, agent, messages: Sequence[dict], reserved_tokens: int = 0
+    ) -> List[dict]:
+        budget = (getattr(agent, "max_context_tokens", None) or self.budget) - reserved_tokens
+        messages = list(messages)
+        before = self.counter.count_all(messages)
+        if before <= budget:
+            return messages
+
+        for strategy in self.strategies:
+            messages = strategy.trim(messages, budget, self.counter)
+            if self.counter.count_all(messages) <= budget:
+                break
+        self.trimmed_requests += 1
+        self.tokens_saved += before - self.counter.count_all(messages)
+        return messages
@@ -1,95 +1,545 @@
 # Standard library imports
+import asyncio
 import copy
+import inspect
 import json
+import time
 from collections import defaultdict
-from typing import List, Callable, Union
-import httpx
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Iterable, List, Callable, Union
 
 # Package/library imports
-from openai import OpenAI
-
+import httpx
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
+from .batch import BatchRun
+from .cache import CompletionCache
+from .coalesce import Coalescer
+from .context import ContextManager
+from .dispatch import EarlyToolDispatch
+from .history import History, isolate
+from .tools import __CTX_VARS_NAME__, compile_tools
+from .sse import ChatStreamDecoder
+from .store import ConversationStore, pending_tool_calls
+from .ratelimit import RESERVATION, RateLimiter, default_rate_limiter
+from .retry import (
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    RetryPolicy,
+    default_circuit_breakers,
+    default_retry_policy,
+)
+from .router import Router
+from .timeouts import TimeoutStats, resolve_timeout, with_timeout
+from .tracing import HANDOFF, LLM, RUN, Hooks, SpanHandler, llm_attributes
+from .transport import Transport, get_default_transport
+from .usage import UsageStats
+from .util import StreamAccumulator, debug_print
 from .types import (
     Agent,
     AgentFunction,
-    ChatCompletionMessage,
     ChatCompletionMessageToolCall,
     Function,
     Response,
     Result,
 )
 
-__CTX_VARS_NAME__ = "context_variables"
 
+def build_request(
+    agent: Agent,
+    history: Iterable[dict],
+    context_variables: dict,
+    model_override: str,
+    stream: bool,
+    context_manager: ContextManager = None,
+) -> dict:
+    """
+    Builds the JSON body of a `/chat/completions` request for `agent`.
+    Shared by `Swarm` and `AsyncSwarm` so both engines send identical requests.
+    If a `context_manager` is given, the history sent is trimmed to the
+    agent's token budget.
+    """
+    context_variables = defaultdict(str, context_variables)
+    instructions = (
+        agent.instructions(context_variables)
+        if callable(agent.instructions)
+        else agent.instructions
+    )
+    # static instructions first, so the prefix stays identical across users
+    system_messages = [{"role": "system", "content": instructions}]
+    if agent.dynamic_instructions is not None:
+        dynamic = (
+            agent.dynamic_instructions(context_variables)
+            if callable(agent.dynamic_instructions)
+            else agent.dynamic_instructions.format_map(context_variables)
+        )
+        if dynamic:
+            system_messages.append({"role": "system", "content": dynamic})
+    tools = compile_tools(agent.functions).tools
+    if context_manager is not None:
+        reserved = sum(
+            context_manager.reserved_tokens(message, None) for message in system_messages
+        ) + context_manager.reserved_tokens({}, tools)
+        history = context_manager.fit(agent, history, reserved)
+    messages = system_messages
+    messages.extend(history)
 
-class Swarm:
-    def __init__(self, client=None):
-        self.client = httpx.Client()
+    data = {
+        "model": model_override or agent.model,
+        "messages": messages,
+        "tools": tools or None,
+        "tool_choice": agent.tool_choice,
+        "stream": stream,
+        "max_tokens": 150,
+        "temperature": 0.7
+    }
 
-    def get_chat_completion(
+    if tools:
+        data["parallel_tool_calls"] = agent.parallel_tool_calls
+    if stream and agent.stream_usage:
+        # ask for a final usage chunk, which reports cached prompt tokens
+        data["stream_options"] = {"include_usage": True}
+    return data
+
+
+def encode_request(data: dict) -> bytes:
+    """
+    Serializes a request body canonically (sorted keys, no whitespace), so
+    equal requests are byte-identical and share the provider's prompt cache.
+    """
+    return json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def auth_headers(api_key: str) -> dict:
+    headers = {"Content-Type": "application/json"}
+    # local endpoints need no key, and "Bearer " alone is not a valid header
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def to_tool_calls(raw_tool_calls: List[dict]) -> List[ChatCompletionMessageToolCall]:
+    """
+    Converts tool calls from a raw completion message into typed objects.
+    """
+    return [
+        ChatCompletionMessageToolCall(
+            id=tool_call["id"],
+            type=tool_call.get("type") or "function",
+            function=Function(
+                arguments=tool_call["function"]["arguments"],
+                name=tool_call["function"]["name"],
+            ),
+        )
+        for tool_call in raw_tool_calls
+    ]
+
+
+def call_tool(func: AgentFunction, args: dict):
+    """Calls a tool function, running it to completion if it is async."""
+    raw_result = func(**args)
+    if inspect.isawaitable(raw_result):
+        raw_result = asyncio.run(raw_result)
+    return raw_result
+
+
+async def acall_tool(func: AgentFunction, args: dict):
+    """Like `call_tool`, awaiting the result on the running loop."""
+    raw_result = func(**args)
+    if inspect.isawaitable(raw_result):
+        raw_result = await raw_result
+    return raw_result
+
+
+# actions yielded by the request flows of `SwarmBase`, carried out by the engines
+SLEEP, SEND, CLOSE = "sleep", "send", "close"
+
+
+class Turn:
+    """
+    One model turn of a run, shared by both engines: builds the request,
+    looks it up in the cache and reports the turn to the hooks. The engines
+    only send the request and read the reply.
+    """
+
+    def __init__(
         self,
+        engine: "SwarmBase",
         agent: Agent,
         history: List,
         context_variables: dict,
         model_override: str,
         stream: bool,
         debug: bool,
-    ) -> ChatCompletionMessage:
-        context_variables = defaultdict(str, context_variables)
-        instructions = (
-            agent.instructions(context_variables)
-            if callable(agent.instructions)
-            else agent.instructions
-        )
-        messages = [{"role": "system", "content": instructions}] + history
-        debug_print(debug, "Getting chat completion for...:", messages)
-
-        tools = [function_to_json(f) for f in agent.functions]
-        # hide context_variables from model
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
-
-        data = {
-            "model": model_override or agent.model,
-            "messages": messages,
-            "tools": tools or None,
-            "tool_choice": agent.tool_choice,
-            "stream": stream,
-            "max_tokens": 150,
-            "temperature": 0.7
-        }
-
-        if tools:
-            data["parallel_tool_calls"] = agent.parallel_tool_calls
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {agent.api_key}"
-        }
-
-        response = self.client.post(
-            agent.base_url + "/chat/completions",
-            headers=headers,
-            json=data
+    ):
+        self.engine = engine
+        self.agent = agent
+        self.debug = debug
+        self.start = time.perf_counter()
+        self.data = build_request(
+            agent, history, context_variables, model_override, stream,
+            engine.context_manager)
+        self.build_time = time.perf_counter() - self.start
+        cache = engine.cache
+        self.cache_key = cache.key(self.data) if cache is not None else None
+        # the cached completion, or for a stream its deltas
+        self.cached = cache.get(self.cache_key) if self.cache_key is not None else None
+
+    def coalesce_key(self) -> str:
+        return self.engine.coalescer.key(self.agent.base_url, self.agent.api_key, self.data)
+
+    def report(self, usage: dict, ttft: float = None, chunks: int = 0,
+               cached: bool = False, **attributes) -> None:
+        """Emits the turn's `llm` span."""
+        if self.engine.hooks:
+            duration = time.perf_counter() - self.start
+            self.engine.hooks.emit(
+                LLM, self.data["model"], self.agent.name, duration, **attributes,
+                **llm_attributes(usage, self.build_time, duration, ttft, chunks, cached))
+
+    def served_from_cache(self) -> dict:
+        debug_print(self.debug, "Completion served from cache.")
+        self.report(self.cached.get("usage"), cached=True)
+        return self.cached
+
+    def completed(self, completion: dict, coalesced: bool) -> dict:
+        """Reports and caches a completion received for the turn."""
+        if coalesced:
+            debug_print(self.debug, "Completion shared with an identical in-flight request.")
+        self.report(completion.get("usage"), coalesced=coalesced)
+        if self.cache_key is not None and not coalesced:
+            self.engine.cache.put(self.cache_key, completion)
+        return completion
+
+
+class StreamTurn(Turn):
+    """
+    A streamed `Turn`. Identical streams in progress are joined instead of
+    re-sent, and with `early_tool_dispatch` each tool call starts as soon
+    as its arguments are complete. The engine feeds every delta it yields
+    through `emit` and `add`.
+    """
+
+    def __init__(
+        self,
+        engine: "SwarmBase",
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        execute_tools: bool,
+    ):
+        super().__init__(engine, agent, history, context_variables, model_override, True, debug)
+        self.accumulator = StreamAccumulator(agent.name)
+        self.dispatch = None
+        if engine.early_tool_dispatch and execute_tools:
+            self.dispatch = EarlyToolDispatch(
+                self.accumulator,
+                lambda raw: engine.prepare_tool_calls(
+                    to_tool_calls(raw), agent.functions, context_variables,
+                    debug, agent.name, agent.tool_timeout),
+                engine.submit_tool_call,
+            )
+        self.usage = {}
+        self.ttft = None
+        self.chunks = 0
+        self.recorded = [] if self.cache_key is not None and self.cached is None else None
+        self.flight, self.leading, self.pumping = None, False, False
+        if self.cached is not None:
+            debug_print(debug, "Replaying completion from cache.")
+        elif engine.coalescer is not None:
+            self.flight, self.leading = engine.coalescer.join(self.coalesce_key())
+            if not self.leading:
+                debug_print(debug, "Joining an identical in-flight stream.")
+
+    @property
+    def sends(self) -> bool:
+        """Whether this turn sends its request, rather than replaying a stream."""
+        return self.cached is None and (self.flight is None or self.leading)
+
+    def emit(self, delta: dict) -> dict:
+        """Records a delta and readies it to be yielded to the caller."""
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+        self.chunks += 1
+        if self.recorded is not None:
+            self.recorded.append(copy.deepcopy(delta))
+        if delta.get("role") == "assistant":
+            delta["sender"] = self.agent.name
+        return delta
+
+    def add(self, delta: dict) -> None:
+        """Merges a delta, once yielded, into the turn's message."""
+        delta.pop("role", None)
+        delta.pop("sender", None)
+        self.accumulator.add(delta)
+        if self.dispatch is not None:
+            self.dispatch.add(delta)
+
+    def fail(self, error: BaseException) -> list:
+        """
+        Releases the turn's flight after `error`, and returns the tool calls
+        started early, which must not outlive the failed turn.
+        """
+        if self.pumping:
+            self.flight.abandon()
+        elif self.leading:
+            self.engine.coalescer.finish(self.coalesce_key(), self.flight, error=error)
+        return self.dispatch.abandon() if self.dispatch is not None else []
+
+    def message(self) -> dict:
+        """Caches and reports the finished stream, and returns its message."""
+        if self.recorded is not None:
+            self.engine.cache.put(self.cache_key, self.recorded)
+        self.report(
+            self.usage, self.ttft, self.chunks, cached=self.cached is not None,
+            coalesced=self.flight is not None and not self.leading)
+        message = self.accumulator.message()
+        debug_print(self.debug, "Received completion:", message)
+        return message
+
+
+class RunState:
+    """
+    The bookkeeping of one run, shared by the turn loops of both engines:
+    the history, active agent and context variables, the stored
+    conversation, if any, and the `run` span.
+    """
+
+    def __init__(
+        self,
+        engine: "SwarmBase",
+        agent: Agent,
+        messages: List,
+        context_variables: dict,
+        conversation_id: str,
+        stream: bool,
+    ):
+        self.engine = engine
+        self.agent = agent
+        self.active_agent = agent
+        self.conversation_id = conversation_id
+        self.stream = stream
+        # the run's own copy: its changes never leak back to the caller
+        self.context_variables = isolate(context_variables)
+        self.history = engine.open_history(
+            conversation_id, messages, agent, self.context_variables)
+        self.start = time.perf_counter()
+        self.turns = self.handoffs = 0
+
+    def running(self, max_turns: int) -> bool:
+        return len(self.history.new) < max_turns and self.active_agent is not None
+
+    def add_message(self, message: dict) -> None:
+        """Adds the model's message of a turn."""
+        self.turns += 1
+        self.history.append(message)
+        self.engine.save(
+            self.conversation_id, [message], self.active_agent, self.context_variables)
+
+    def tool_recorder(self) -> Callable:
+        return self.engine.tool_recorder(
+            self.conversation_id, self.active_agent, self.context_variables)
+
+    def add_tool_results(self, partial_response: Response) -> None:
+        """Applies the tool results of a turn, handing off if they say so."""
+        self.history.extend(partial_response.messages)
+        self.context_variables.update(partial_response.context_variables)
+        if partial_response.agent:
+            self.handoffs += 1
+            if self.engine.hooks:
+                self.engine.hooks.emit(
+                    HANDOFF, partial_response.agent.name, self.active_agent.name, 0.0)
+            self.active_agent = partial_response.agent
+        # the tool messages are already recorded; move the checkpoint
+        self.engine.save(self.conversation_id, (), self.active_agent, self.context_variables)
+
+    def response(self) -> Response:
+        """Ends the run."""
+        self.engine.save(
+            self.conversation_id, (), self.active_agent, self.context_variables, done=True)
+        if self.engine.hooks:
+            self.engine.hooks.emit(
+                RUN, self.agent.name, self.agent.name, time.perf_counter() - self.start,
+                turns=self.turns, handoffs=self.handoffs, stream=self.stream)
+        return Response(
+            messages=self.history.new,
+            agent=self.active_agent,
+            context_variables=self.context_variables,
         )
 
+
+class SwarmBase:
+    """
+    What `Swarm` and `AsyncSwarm` share: request building, routing and
+    retries, usage accounting, tool call bookkeeping and conversation
+    storage. Routing and retries are generators ("flows") that yield the
+    I/O to do -- `(SLEEP, seconds)`, `(SEND, request)` or
+    `(CLOSE, response)` -- and are sent the outcome of each `SEND`, so the
+    engines only carry the I/O out, blocking or with `await`.
+    """
+
+    # the engine's HTTP client; the flows build their requests with it
+    client = None
+
+    def __init__(
+        self,
+        parallel_tool_execution: bool = False,
+        early_tool_dispatch: bool = False,
+        retry_policy: RetryPolicy = None,
+        circuit_breakers: CircuitBreakerRegistry = None,
+        cache: CompletionCache = None,
+        context_manager: ContextManager = None,
+        hooks: Iterable[SpanHandler] = None,
+        router: Router = None,
+        rate_limiter: RateLimiter = None,
+        coalescer: Coalescer = None,
+        store: ConversationStore = None,
+    ):
+        self.retry_policy = retry_policy or default_retry_policy
+        self.circuit_breakers = circuit_breakers or default_circuit_breakers
+        self.cache = cache
+        self.coalescer = coalescer
+        self.store = store
+        self.context_manager = context_manager
+        self.router = router
+        self.rate_limiter = (
+            rate_limiter if rate_limiter is not None else default_rate_limiter)
+        self.usage = UsageStats()
+        self.tool_timeouts = TimeoutStats()
+        self.hooks = Hooks(hooks)
+        self.parallel_tool_execution = parallel_tool_execution
+        # streaming only: start each tool call as soon as its arguments are complete
+        self.early_tool_dispatch = early_tool_dispatch
+
+    def request_flow(self, agent: Agent, data: dict):
+        """
+        The flow of `send_chat_completion`: POSTs `data` to the agent's
+        endpoint, or with a `router` to the best of its endpoints, failing
+        over to the next one when an endpoint is down.
+        """
+        content = encode_request(data)
+        tokens = self.rate_limiter.estimate(data, content) if self.rate_limiter.enabled else 0
+        if self.router is None:
+            return (yield from self.retry_flow(
+                agent.base_url, agent.api_key, content, tokens=tokens))
+
+        endpoints = self.router.plan()
+        for i, endpoint in enumerate(endpoints):
+            last = i == len(endpoints) - 1
+            policy = self.retry_policy if last else self.router.failover_policy
+            api_key = endpoint.api_key or agent.api_key
+            start = self.router.begin(endpoint)
+            ok = False
+            # every attempt is ended, also when it raises or is cancelled
+            try:
+                try:
+                    response = yield from self.retry_flow(
+                        endpoint.base_url, api_key, content, policy, tokens)
+                except (httpx.TransportError, CircuitOpenError) as e:
+                    if last:
+                        raise
+                    self.router.record_failover(type(e).__name__)
+                    continue
+                ok = not self.router.fails_over(response)
+            finally:
+                self.router.end(endpoint, start, ok=ok)
+            if ok or last:
+                return response
+            self.router.record_failover(str(response.status_code))
+            yield CLOSE, response
+
+    def retry_flow(
+        self,
+        base_url: str,
+        api_key: str,
+        content: bytes,
+        retry_policy: RetryPolicy = None,
+        tokens: int = 0,
+    ):
+        """
+        The flow of `send_to`: POSTs an encoded request to `base_url`,
+        retrying transient failures according to `retry_policy` (default:
+        the client's) and failing fast with `CircuitOpenError` while the
+        endpoint's circuit is open. Each attempt first reserves one request
+        and `tokens` of the key's rate limit, waiting if over budget.
+        """
+        retry_policy = retry_policy or self.retry_policy
+        breaker = self.circuit_breakers.get(base_url)
+        request = self.client.build_request(
+            "POST", base_url + "/chat/completions", headers=auth_headers(api_key),
+            content=content)
+        attempt = 0
+        while True:
+            trial = breaker.before_request()
+            # a trial cancelled before its outcome is recorded must not hold the slot
+            try:
+                reservation = self.rate_limiter.reserve(base_url, api_key, tokens)
+                if reservation is not None and reservation.delay:
+                    yield SLEEP, reservation.delay
+                outcome = yield SEND, request
+                if isinstance(outcome, httpx.TransportError):
+                    if reservation is not None:
+                        reservation.refund()
+                    delay = retry_policy.after_attempt(breaker, attempt, error=outcome)
+                    if delay is None:
+                        raise outcome
+                else:
+                    if reservation is not None:
+                        if outcome.status_code == 200:
+                            # corrected from the reported usage by `settle`
+                            outcome.extensions[RESERVATION] = reservation
+                        else:
+                            reservation.refund()
+                    delay = retry_policy.after_attempt(breaker, attempt, response=outcome)
+                    if delay is None:
+                        return outcome
+                    yield CLOSE, outcome
+            finally:
+                breaker.release_trial(trial)
+            yield SLEEP, delay
+            attempt += 1
+
+    def api_error(self, response: httpx.Response) -> Exception:
+        """The error raised for a failed request; the body must have been read."""
+        print(f"API 请求失败，状态码：{response.status_code}")
+        print(f"响应内容：{response.text}")
+        return Exception(f"API request failed with status {response.status_code}: {response.text}")
+
+    def read_completion(self, response: httpx.Response) -> dict:
+        """Parses the response to a non-streaming request, recording its usage."""
         if response.status_code != 200:
-            print(f"API 请求失败，状态码：{response.status_code}")
-            print(f"响应内容：{response.text}")
-            raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+            raise self.api_error(response)
 
         try:
-            return response.json()
+            completion = response.json()
         except json.JSONDecodeError as e:
             print(f"JSON 解析错误：{str(e)}")
             print(f"响应内容：{response.text}")
             raise
 
+        self.usage.record(completion.get("usage"))
+        self.rate_limiter.settle(response, completion.get("usage"))
+        return completion
+
+    def stream_deltas(self, events: Iterable, response: httpx.Response, usage: dict = None):
+        """
+        Yields the `delta` of the first choice of every decoded stream event.
+        Usage reported by the stream is recorded, and also stored into
+        `usage`, if given.
+        """
+        for event in events:
+            if event.usage:
+                self.usage.record(event.usage)
+                self.rate_limiter.settle(response, event.usage)
+                if usage is not None:
+                    usage.update(event.usage)
+            if event.index == 0:
+                yield event.delta
+
     def handle_function_result(self, result, debug) -> Result:
         match result:
             case Result() as result:
@@ -108,22 +558,68 @@ class Swarm:
                     debug_print(debug, error_message)
                     raise TypeError(error_message)
 
-    def handle_tool_calls(
+    def prepare_tool_calls(
         self,
         tool_calls: List[ChatCompletionMessageToolCall],
         functions: List[AgentFunction],
         context_variables: dict,
         debug: bool,
-    ) -> Response:
-        function_map = {f.__name__: f for f in functions}
-        partial_response = Response(
-            messages=[], agent=None, context_variables={})
-
+        agent_name: str = None,
+        tool_timeout: float = None,
+    ) -> List[tuple]:
+        """
+        Resolves each tool call to a `(tool_call, func, args)` triple, in
+        tool_call order. `func` is None when the tool does not exist. `func`
+        is wrapped to enforce its time limit (its own `tool_timeout`, else
+        the agent's) and, with hooks registered, to emit a `tool` span.
+        """
+        compiled = compile_tools(functions)
+        function_map = compiled.function_map
+        calls = []
         for tool_call in tool_calls:
             name = tool_call.function.name
             # handle missing tool case, skip to next tool
             if name not in function_map:
                 debug_print(debug, f"Tool {name} not found in function map.")
+                calls.append((tool_call, None, None))
+                continue
+            args = json.loads(tool_call.function.arguments)
+            debug_print(
+                debug, f"Processing tool call: {name} with arguments {args}")
+
+            func = function_map[name]
+            timeout = resolve_timeout(func, tool_timeout)
+            if timeout is not None:
+                func = with_timeout(
+                    func, name, timeout, self.tool_timeouts,
+                    lambda name, timeout=timeout: debug_print(
+                        debug, f"Tool {name} timed out after {timeout}s."),
+                )
+            if self.hooks:
+                func = self.hooks.wrap_tool(func, name, agent_name)
+            # pass context_variables to agent functions
+            if name in compiled.takes_context:
+                args[__CTX_VARS_NAME__] = context_variables
+            if debug and getattr(func, "tool_cache", None) is not None:
+                if func.tool_cache.contains(args):
+                    debug_print(debug, f"Tool {name}: serving cached result.")
+            calls.append((tool_call, func, args))
+        return calls
+
+    def collect_tool_results(
+        self, calls: List[tuple], raw_results: List, debug: bool
+    ) -> Response:
+        """
+        Turns raw function results into tool messages. Results are applied in
+        tool_call order regardless of how they were executed: later calls win
+        on conflicting context_variables keys, and the last handoff wins.
+        """
+        partial_response = Response(
+            messages=[], agent=None, context_variables={})
+
+        for (tool_call, func, _), raw_result in zip(calls, raw_results):
+            name = tool_call.function.name
+            if func is None:
                 partial_response.messages.append(
                     {
                         "role": "tool",
@@ -133,15 +629,6 @@ class Swarm:
                     }
                 )
                 continue
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
-
-            func = function_map[name]
-            # pass context_variables to agent functions
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-            raw_result = function_map[name](**args)
 
             result: Result = self.handle_function_result(raw_result, debug)
             partial_response.messages.append(
@@ -158,6 +645,382 @@ class Swarm:
 
         return partial_response
 
+    def result_callback(self, calls: List[tuple], debug: bool, on_message: Callable) -> Callable:
+        """
+        The `on_result(i, raw_result)` callback of `execute_tool_calls`
+        that passes the partial response of each call to `on_message`.
+        """
+        if on_message is None:
+            return None
+        return lambda i, raw_result: on_message(
+            self.collect_tool_results(calls[i:i + 1], [raw_result], debug))
+
+    def open_history(
+        self, conversation_id: str, messages: List, agent: Agent, context_variables: dict
+    ) -> History:
+        """
+        The history of a run. With a `store` and a `conversation_id`, it is
+        the stored conversation followed by `messages`, which are recorded
+        as its next messages.
+        """
+        if self.store is None or conversation_id is None:
+            return History(messages)
+        stored = self.store.load(conversation_id)
+        self.store.record(conversation_id, messages, agent.name, context_variables)
+        stored.extend(messages)
+        return History(stored)
+
+    def save(
+        self,
+        conversation_id: str,
+        messages: Iterable[dict],
+        agent: Agent,
+        context_variables: dict,
+        done: bool = False,
+    ) -> None:
+        """Records a completed step of a stored conversation."""
+        if self.store is not None and conversation_id is not None:
+            self.store.record(conversation_id, messages, agent.name, context_variables, done)
+
+    def tool_recorder(
+        self, conversation_id: str, agent: Agent, context_variables: dict
+    ) -> Callable:
+        """
+        With a store, an `on_message` callback for `handle_tool_calls` that
+        records each tool message as soon as its call finished, so a run
+        interrupted mid-batch resumes without re-running finished calls.
+        """
+        if self.store is None or conversation_id is None:
+            return None
+        context_variables = dict(context_variables)
+
+        def record(partial_response: Response) -> None:
+            nonlocal agent
+            context_variables.update(partial_response.context_variables)
+            agent = partial_response.agent or agent
+            self.save(conversation_id, partial_response.messages, agent, context_variables)
+
+        return record
+
+    def resume_point(
+        self, conversation_id: str, agents: Iterable[Agent], execute_tools: bool, debug: bool
+    ) -> tuple:
+        """
+        Where `resume` picks a stored conversation up: the checkpointed agent
+        and context variables, the tool calls to run first with the agent that
+        made them, and whether the run already finished.
+        """
+        checkpoint = self.store.checkpoint(conversation_id)
+        if checkpoint is None:
+            raise KeyError(f"No stored conversation {conversation_id!r}")
+        agents = {agent.name: agent for agent in agents}
+        agent = agents[checkpoint.agent]
+        messages = self.store.load(conversation_id)
+        last = messages[-1] if messages else {}
+
+        pending = pending_tool_calls(messages)
+        if pending and not checkpoint.done and not execute_tools:
+            raise ValueError(
+                f"Conversation {conversation_id!r} has {len(pending)} tool calls "
+                "without a result; resume it with execute_tools=True")
+        if pending and execute_tools:
+            debug_print(debug, f"Resuming {len(pending)} unfinished tool calls.")
+            # the calls belong to the agent that made them, even if a handoff
+            # earlier in the batch already moved the checkpoint on
+            caller = next(m for m in reversed(messages) if m.get("role") == "assistant")
+            caller = agents.get(caller.get("sender"), agent)
+            return agent, checkpoint.context_variables, pending, caller, False
+        finished = checkpoint.done or (last.get("role") == "assistant" and not pending)
+        return agent, checkpoint.context_variables, [], None, finished
+
+
+class Swarm(SwarmBase):
+    def __init__(
+        self,
+        client: httpx.Client = None,
+        parallel_tool_execution: bool = False,
+        max_tool_workers: int = None,
+        early_tool_dispatch: bool = False,
+        transport: Transport = None,
+        retry_policy: RetryPolicy = None,
+        circuit_breakers: CircuitBreakerRegistry = None,
+        cache: CompletionCache = None,
+        context_manager: ContextManager = None,
+        hooks: Iterable[SpanHandler] = None,
+        router: Router = None,
+        rate_limiter: RateLimiter = None,
+        coalescer: Coalescer = None,
+        store: ConversationStore = None,
+    ):
+        super().__init__(
+            parallel_tool_execution=parallel_tool_execution,
+            early_tool_dispatch=early_tool_dispatch,
+            retry_policy=retry_policy,
+            circuit_breakers=circuit_breakers,
+            cache=cache,
+            context_manager=context_manager,
+            hooks=hooks,
+            router=router,
+            rate_limiter=rate_limiter,
+            coalescer=coalescer,
+            store=store,
+        )
+        # an explicit client wins; otherwise share the (default) transport's pool
+        self.client = client or (transport or get_default_transport()).client
+        self.max_tool_workers = max_tool_workers
+        self._tool_executor = None
+
+    def carry_out(self, flow, stream: bool = False):
+        """Does the I/O of a request flow, blocking, and returns its result."""
+        outcome = None
+        try:
+            while True:
+                try:
+                    action, value = flow.send(outcome)
+                except StopIteration as done:
+                    return done.value
+                outcome = None
+                if action == SEND:
+                    try:
+                        outcome = self.client.send(value, stream=stream)
+                    except httpx.TransportError as e:
+                        outcome = e
+                elif action == SLEEP:
+                    time.sleep(value)
+                elif action == CLOSE:
+                    value.close()
+        finally:
+            # if the I/O raised, the flow still cleans up after itself
+            flow.close()
+
+    def send_chat_completion(
+        self, agent: Agent, data: dict, stream: bool = False
+    ) -> httpx.Response:
+        """
+        POSTs `data` to the agent's `/chat/completions` endpoint, or with a
+        `router` to the best of its endpoints, failing over to the next one
+        when an endpoint is down. Waits for the key's rate limit budget
+        first, if one is configured. With `stream=True` the body is left
+        unread and the caller must close the response.
+        """
+        return self.carry_out(self.request_flow(agent, data), stream)
+
+    def send_to(
+        self,
+        base_url: str,
+        api_key: str,
+        content: bytes,
+        stream: bool = False,
+        retry_policy: RetryPolicy = None,
+        tokens: int = 0,
+    ) -> httpx.Response:
+        """POSTs an encoded request to `base_url`; see `SwarmBase.retry_flow`."""
+        return self.carry_out(
+            self.retry_flow(base_url, api_key, content, retry_policy, tokens), stream)
+
+    def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> dict:
+        turn = Turn(self, agent, history, context_variables, model_override, stream, debug)
+        debug_print(debug, "Getting chat completion for...:", turn.data["messages"])
+        if turn.cached is not None:
+            return turn.served_from_cache()
+
+        if self.coalescer is not None:
+            completion, coalesced = self.coalescer.call(
+                turn.coalesce_key(), lambda: self.request_completion(agent, turn.data))
+        else:
+            completion, coalesced = self.request_completion(agent, turn.data), False
+        return turn.completed(completion, coalesced)
+
+    def request_completion(self, agent: Agent, data: dict) -> dict:
+        """Sends a non-streaming request and returns the parsed completion."""
+        return self.read_completion(self.send_chat_completion(agent, data))
+
+    def iter_deltas(
+        self, response: httpx.Response, debug: bool = False, usage: dict = None
+    ):
+        """
+        Yields the `delta` of the first choice of every chunk in a streaming
+        completion response, decoding the raw bytes incrementally. Usage
+        reported by the stream is also stored into `usage`, if given.
+        """
+        decoder = ChatStreamDecoder()
+        for raw in response.iter_bytes():
+            yield from self.stream_deltas(decoder.feed(raw), response, usage)
+        yield from self.stream_deltas(decoder.flush(), response, usage)
+        if decoder.errors:
+            debug_print(debug, f"Skipped {decoder.errors} malformed stream chunks.")
+
+    @property
+    def tool_executor(self) -> ThreadPoolExecutor:
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=self.max_tool_workers, thread_name_prefix="swarm-tool"
+            )
+        return self._tool_executor
+
+    def submit_tool_call(self, func: AgentFunction, args: dict) -> Future:
+        """Starts one prepared tool call on the tool thread pool."""
+        return self.tool_executor.submit(call_tool, func, args)
+
+    def finish_tool_calls(
+        self, started: List[tuple], debug: bool, on_message: Callable = None
+    ) -> Response:
+        """
+        Waits for `(call, future)` pairs from `EarlyToolDispatch` and merges
+        their results like `handle_tool_calls`, re-raising the error of the
+        earliest failing tool call.
+        """
+        raw_results = []
+        errors = {}
+        for i, (call, future) in enumerate(started):
+            raw_result = None
+            if future is not None:
+                try:
+                    raw_result = future.result()
+                except Exception as e:
+                    errors[i] = e
+            raw_results.append(raw_result)
+            if on_message is not None and i not in errors:
+                on_message(self.collect_tool_results([call], [raw_result], debug))
+        if errors:
+            raise errors[min(errors)]
+        return self.collect_tool_results(
+            [call for call, _ in started], raw_results, debug)
+
+    def execute_tool_calls(self, calls: List[tuple], on_result: Callable = None) -> List:
+        """
+        Runs prepared tool calls concurrently: sync functions on the tool
+        thread pool, `async def` functions gathered on one event loop, both
+        through `call_tool`. If any call raises, the error of the earliest
+        failing tool call is re-raised once all calls have finished. `on_result(i, raw_result)` is called for
+        each successful call as soon as it is collected.
+        """
+        raw_results = [None] * len(calls)
+        errors = {}
+        futures = {}
+        coroutines = {}
+        for i, (_, func, args) in enumerate(calls):
+            if func is None:
+                if on_result is not None:
+                    on_result(i, None)
+                continue
+            if inspect.iscoroutinefunction(func):
+                coroutines[i] = (func, args)
+            else:
+                futures[i] = self.submit_tool_call(func, args)
+
+        if coroutines:
+            async def gather():
+                # created inside the gather, so errors raised by the call
+                # itself are collected like any other tool error
+                return await asyncio.gather(
+                    *(acall_tool(func, args) for func, args in coroutines.values()),
+                    return_exceptions=True)
+
+            for i, outcome in zip(coroutines, asyncio.run(gather())):
+                if isinstance(outcome, BaseException):
+                    errors[i] = outcome
+                else:
+                    raw_results[i] = outcome
+                    if on_result is not None:
+                        on_result(i, outcome)
+
+        indices = {future: i for i, future in futures.items()}
+        for future in as_completed(indices):
+            i = indices[future]
+            try:
+                raw_results[i] = future.result()
+            except Exception as e:
+                errors[i] = e
+            else:
+                if on_result is not None:
+                    on_result(i, raw_results[i])
+
+        if errors:
+            raise errors[min(errors)]
+        return raw_results
+
+    def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        agent_name: str = None,
+        tool_timeout: float = None,
+        on_message: Callable = None,
+    ) -> Response:
+        """
+        Runs the tool calls and merges their results. `on_message`, if given,
+        is called with the partial response of each call as soon as it
+        finished, in completion order.
+        """
+        calls = self.prepare_tool_calls(
+            tool_calls, functions, context_variables, debug, agent_name, tool_timeout)
+        on_result = self.result_callback(calls, debug, on_message)
+
+        if self.parallel_tool_execution and len(calls) > 1:
+            raw_results = self.execute_tool_calls(calls, on_result)
+        else:
+            raw_results = []
+            for i, (_, func, args) in enumerate(calls):
+                raw_results.append(call_tool(func, args) if func else None)
+                if on_result is not None:
+                    on_result(i, raw_results[-1])
+
+        return self.collect_tool_results(calls, raw_results, debug)
+
+    def resume(
+        self,
+        conversation_id: str,
+        agents: Iterable[Agent],
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> Response:
+        """
+        Continues the interrupted run of a stored conversation from its last
+        completed step: stored model turns and tool results are reused, only
+        the tool calls without a stored result are run, and the loop goes on
+        with the checkpointed agent (looked up by name in `agents`) and
+        context variables. `Response.messages` holds what the resumed run
+        added. Tool calls without a result cannot be sent back to the model,
+        so resuming them with `execute_tools=False` raises `ValueError`.
+        """
+        agent, context_variables, pending, caller, finished = self.resume_point(
+            conversation_id, agents, execute_tools, debug)
+        if finished:
+            return Response(messages=[], agent=agent, context_variables=context_variables)
+
+        added = []
+        if pending:
+            partial_response = self.handle_tool_calls(
+                to_tool_calls(pending), caller.functions, context_variables, debug,
+                caller.name, caller.tool_timeout,
+                self.tool_recorder(conversation_id, agent, context_variables),
+            )
+            context_variables.update(partial_response.context_variables)
+            agent = partial_response.agent or agent
+            self.save(conversation_id, (), agent, context_variables)
+            added = partial_response.messages
+
+        response = self.run(
+            agent, [], context_variables, model_override, debug=debug,
+            max_turns=max_turns, execute_tools=execute_tools,
+            conversation_id=conversation_id,
+        )
+        response.messages = added + response.messages
+        return response
+
     def run_and_stream(
         self,
         agent: Agent,
@@ -167,117 +1030,72 @@ class Swarm:
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        conversation_id: str = None,
     ):
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
+        run = RunState(self, agent, messages, context_variables, conversation_id, stream=True)
 
-            # 获取流式响应
-            response = self.client.post(
-                agent.base_url + "/chat/completions",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {agent.api_key}"
-                },
-                json={
-                    "model": model_override or agent.model,
-                    "messages": [{"role": "system", "content": agent.instructions}] + history,
-                    "tools": [function_to_json(f) for f in agent.functions],
-                    "stream": True,
-                    "max_tokens": 150,
-                    "temperature": 0.7
-                },
-                timeout=30.0
-            )
+        while run.running(max_turns):
+            turn = StreamTurn(
+                self, run.active_agent, run.history, run.context_variables,
+                model_override, debug, execute_tools)
 
-            if response.status_code != 200:
-                print(f"API 请求失败，状态码：{response.status_code}")
-                print(f"响应内容：{response.text}")
-                raise Exception(f"API request failed with status {response.status_code}: {response.text}")
+            # 获取流式响应
+            response = None
+            try:
+                if turn.sends:
+                    response = self.send_chat_completion(run.active_agent, turn.data, stream=True)
+                    if response.status_code != 200:
+                        response.read()
+                        raise self.api_error(response)
+                    if turn.leading:
+                        # upstream is read at its own pace; the leader replays
+                        # the flight like its followers
+                        self.coalescer.pump(turn.coalesce_key(), turn.flight,
+                                            self.iter_deltas(response, debug, turn.usage),
+                                            response.close)
+                        response, turn.pumping = None, True
 
-            yield {"delim": "start"}
+                yield {"delim": "start"}
 
-            # 处理流式响应
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                if isinstance(line, bytes):
-                    line = line.decode('utf-8')
-                if line.startswith('data: '):
-                    try:
-                        json_str = line[6:].strip()  # 去掉 "data: " 前缀
-                        if json_str == "[DONE]":
-                            continue
-                        chunk = json.loads(json_str)
-                        if "choices" in chunk:
-                            delta = chunk["choices"][0]["delta"]
-                            if "role" in delta and delta["role"] == "assistant":
-                                delta["sender"] = active_agent.name
-                            yield delta
-                            delta.pop("role", None)
-                            delta.pop("sender", None)
-                            merge_chunk(message, delta)
-                    except json.JSONDecodeError as e:
-                        print(f"JSON 解析错误：{str(e)}")
-                        print(f"响应行内容：{line}")
-                        continue
+                # 处理流式响应 (or replay it from the cache)
+                if turn.cached is not None:
+                    deltas = turn.cached
+                elif turn.flight is not None:
+                    deltas = turn.flight.subscribe()
+                else:
+                    deltas = self.iter_deltas(response, debug, turn.usage)
+                for delta in deltas:
+                    yield turn.emit(delta)
+                    turn.add(delta)
+            except BaseException as e:
+                wait(turn.fail(e))
+                raise
+            finally:
+                if response is not None:
+                    response.close()
 
             yield {"delim": "end"}
-
-            message["tool_calls"] = list(message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
-            debug_print(debug, "Received completion:", message)
-            history.append(message)
+            message = turn.message()
+            run.add_message(message)
 
             if not message["tool_calls"] or not execute_tools:
                 debug_print(debug, "Ending turn.")
                 break
 
-            # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
+            # handle function calls, updating context_variables, and switching agents
+            if turn.dispatch is not None:
+                partial_response = self.finish_tool_calls(
+                    turn.dispatch.dispatch_rest(message["tool_calls"]), debug,
+                    run.tool_recorder())
+            else:
+                partial_response = self.handle_tool_calls(
+                    to_tool_calls(message["tool_calls"]), run.active_agent.functions,
+                    run.context_variables, debug, run.active_agent.name,
+                    run.active_agent.tool_timeout, run.tool_recorder(),
                 )
-                tool_calls.append(tool_call_object)
+            run.add_tool_results(partial_response)
 
-            # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
-            )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        yield {
-            "response": Response(
-                messages=history[init_len:],
-                agent=active_agent,
-                context_variables=context_variables,
-            )
-        }
+        yield {"response": run.response()}
 
     def run(
         self,
@@ -289,6 +1107,7 @@ class Swarm:
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        conversation_id: str = None,
     ) -> Response:
         if stream:
             return self.run_and_stream(
@@ -299,45 +1118,74 @@ class Swarm:
                 debug=debug,
                 max_turns=max_turns,
                 execute_tools=execute_tools,
+                conversation_id=conversation_id,
             )
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
+        run = RunState(self, agent, messages, context_variables, conversation_id, stream=False)
 
-        while len(history) - init_len < max_turns and active_agent:
+        while run.running(max_turns):
 
             # get completion with current history, agent
             completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
+                agent=run.active_agent,
+                history=run.history,
+                context_variables=run.context_variables,
                 model_override=model_override,
                 stream=stream,
                 debug=debug,
             )
-            message = completion.choices[0].message
+            message = completion["choices"][0]["message"]
             debug_print(debug, "Received completion:", message)
-            message.sender = active_agent.name
-            history.append(
-                json.loads(message.model_dump_json())
-            )  # to avoid OpenAI types (?)
+            message["sender"] = run.active_agent.name
+            run.add_message(message)
 
-            if not message.tool_calls or not execute_tools:
+            if not message.get("tool_calls") or not execute_tools:
                 debug_print(debug, "Ending turn.")
                 break
 
             # handle function calls, updating context_variables, and switching agents
             partial_response = self.handle_tool_calls(
-                message.tool_calls, active_agent.functions, context_variables, debug
+                to_tool_calls(message["tool_calls"]),
+                run.active_agent.functions,
+                run.context_variables,
+                debug,
+                run.active_agent.name,
+                run.active_agent.tool_timeout,
+                run.tool_recorder(),
             )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
+            run.add_tool_results(partial_response)
 
-        return Response(
-            messages=history[init_len:],
-            agent=active_agent,
-            context_variables=context_variables,
+        return run.response()
+
+    def run_many(
+        self,
+        agent: Agent,
+        conversations: Iterable[List],
+        max_concurrency: int = 8,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> BatchRun:
+        """
+        Runs many independent conversations through `agent`, at most
+        `max_concurrency` at a time, all sharing this client's connection pool.
+
+        Returns an iterator of `BatchResult`s in completion order; each carries
+        the `index` of its conversation in `conversations`. A failing
+        conversation yields a result with `error` set instead of aborting the
+        batch. Aggregate throughput is available on the iterator's `stats`.
+        """
+        return BatchRun(
+            self,
+            agent,
+            conversations,
+            max_concurrency,
+            dict(
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
+            ),
         )
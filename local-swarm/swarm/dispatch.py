@@ -0,0 +1,99 @@
+import json
+from typing import Callable, Dict, List, Tuple
+
+from .util import StreamAccumulator
+
+
+class EarlyToolDispatch:
+    """
+    Starts the tool calls of a streaming turn while the stream is still open.
+
+    A tool call is complete once a later tool call index has started and
+    its arguments parse as JSON; it is then resolved with
+    `prepare(raw_tool_calls)` (-> `(tool_call, func, args)` triples, see
+    `Swarm.prepare_tool_calls`) and started with `submit(func, args)`,
+    which returns a handle (a future or a task). Calls still pending when
+    the stream ends are started by `dispatch_rest`. Tool calls therefore
+    run concurrently, as with `parallel_tool_execution`. If the stream
+    fails, `abandon` stops the calls already started.
+    """
+
+    def __init__(
+        self,
+        accumulator: StreamAccumulator,
+        prepare: Callable[[List], List[tuple]],
+        submit: Callable[[Callable, dict], object],
+    ):
+        self.accumulator = accumulator
+        self.prepare = prepare
+        self.submit = submit
+        self.started: Dict[str, Tuple[tuple, object]] = {}
+        self._highest = -1
+        self._checked = set()
+
+    def add(self, delta: dict) -> None:
+        """Call after `accumulator.add(delta)` for every delta of the stream."""
+        tool_calls = delta.get("tool_calls")
+        if not tool_calls:
+            return
+        highest = max(tool_call.get("index", 0) for tool_call in tool_calls)
+        if highest <= self._highest:
+            return
+        self._highest = highest
+        for index in sorted(self.accumulator.tool_calls):
+            if index < highest and index not in self._checked:
+                self._checked.add(index)
+                self._start(self.accumulator.tool_call(index))
+
+    def _start(self, raw_tool_call: dict) -> None:
+        if not raw_tool_call["id"]:
+            return  # cannot be matched to the final message; run it afterwards
+        try:
+            json.loads(raw_tool_call["function"]["arguments"] or "{}")
+        except ValueError:
+            return  # incomplete or malformed arguments: leave it to the normal path
+        (call,) = self.prepare([raw_tool_call])
+        _, func, args = call
+        handle = self.submit(func, args) if func is not None else None
+        self.started[raw_tool_call["id"]] = (call, handle)
+
+    def abandon(self) -> List[object]:
+        """
+        Cancels the calls started early whose results will not be collected
+        (the stream failed or was closed). Returns the handles of the calls
+        that could not be cancelled because they are already running.
+        """
+        running = []
+        for _, handle in self.started.values():
+            if handle is None or handle.cancel():
+                continue
+            if handle.done():
+                if not handle.cancelled():
+                    handle.exception()  # retrieved: nobody else will look at it
+            else:
+                running.append(handle)
+        self.started.clear()
+        return running
+
+    def dispatch_rest(self, raw_tool_calls: List[dict]) -> List[Tuple[tuple, object]]:
+        """
+        Returns a `(call, handle)` pair for every tool call of the final
+        message, in order, starting those that were not started early.
+        `handle` is None for unknown tools.
+        """
+        early = [
+            self.started.get(tool_call["id"]) if tool_call["id"] else None
+            for tool_call in raw_tool_calls
+        ]
+        pending = [
+            tool_call for tool_call, pair in zip(raw_tool_calls, early) if pair is None
+        ]
+        prepared = iter(self.prepare(pending) if pending else ())
+        pairs = []
+        for pair in early:
+            if pair is None:
+                call = next(prepared)
+                _, func, args = call
+                pair = (call, self.submit(func, args) if func is not None else None)
+            pairs.append(pair)
+        return pairs
@@ -0,0 +1,64 @@
+import copy
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence
+
+# context values nobody can change in place, so a run may share them
+IMMUTABLE_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+def isolate(context_variables: dict) -> dict:
+    """
+    The run's own copy of `context_variables`. Usually they are scalars,
+    copied shallowly; any nested value (a list, a dict, an object) makes the
+    copy deep, so a tool changing it in place cannot leak into the caller's
+    mapping or into other conversations sharing it.
+    """
+    if all(type(value) in IMMUTABLE_TYPES for value in context_variables.values()):
+        return dict(context_variables)
+    return copy.deepcopy(context_variables)
+
+
+class History(Sequence):
+    """
+    Append-only view of a conversation used inside a run.
+
+    The caller's `messages` are shared, not copied: the run only reads them
+    (and only the first `len(messages)` of them, even if the caller's list
+    grows meanwhile), while everything produced by the run is appended to
+    `new`. Starting a run is therefore O(1) instead of a deep copy of the
+    whole conversation, and `new` is exactly what `Response.messages` returns.
+    """
+
+    __slots__ = ("base", "base_len", "new")
+
+    def __init__(self, base: Sequence[dict]):
+        self.base = base
+        self.base_len = len(base)
+        self.new: List[dict] = []
+
+    def append(self, message: dict) -> None:
+        self.new.append(message)
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        self.new.extend(messages)
+
+    def __len__(self) -> int:
+        return self.base_len + len(self.new)
+
+    def __iter__(self) -> Iterator[dict]:
+        if len(self.base) == self.base_len:
+            yield from self.base
+        else:
+            yield from islice(self.base, self.base_len)
+        yield from self.new
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        if index < self.base_len:
+            return self.base[index]
+        return self.new[index - self.base_len]
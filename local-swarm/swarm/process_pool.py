@@ -0,0 +1,140 @@
+import functools
+import importlib
+import os
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+def _resolve(module: str, qualname: str) -> Callable:
+    obj = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _run_in_worker(module: str, qualname: str, args: tuple, kwargs: dict):
+    # functions travel by reference: the worker imports the decorated
+    # function and calls the original it wraps, not the pool again
+    return _resolve(module, qualname).cpu_bound_target(*args, **kwargs)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class ProcessPool:
+    """
+    A lazily started `ProcessPoolExecutor` for `cpu_bound` agent functions.
+
+    Arguments and results cross the process boundary by pickling, so they
+    must be picklable; `Result` and `Agent` return values are, as long as
+    the agent's functions are defined at module level. With `warm_up=True`
+    every worker is started (and `initializer` run) the first time the pool
+    is used, or on an explicit `warm()`, instead of on the first calls.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        warm_up: bool = False,
+        initializer: Callable = None,
+        initargs: tuple = (),
+        mp_context=None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.warm_up = warm_up
+        self.initializer = initializer
+        self.initargs = initargs
+        self.mp_context = mp_context
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> "ProcessPoolExecutor":
+        if self._executor is None:
+            # imported on first use: multiprocessing is costly to import
+            from concurrent.futures import ProcessPoolExecutor
+
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=self.mp_context,
+                        initializer=self.initializer,
+                        initargs=self.initargs,
+                    )
+                    if self.warm_up:
+                        self._warm(self._executor)
+        return self._executor
+
+    def _warm(self, executor: "ProcessPoolExecutor") -> set:
+        futures = [executor.submit(_ready) for _ in range(self.max_workers)]
+        return {future.result() for future in futures}
+
+    def warm(self) -> set:
+        """Starts every worker now; returns the worker pids that answered."""
+        return self._warm(self.executor)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Calls the `cpu_bound` function `func` in a worker."""
+        return self.executor.submit(
+            _run_in_worker, func.__module__, func.__qualname__, args, kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+default_process_pool = ProcessPool()
+
+
+def configure_process_pool(
+    max_workers: Optional[int] = None,
+    warm_up: bool = False,
+    initializer: Callable = None,
+    initargs: tuple = (),
+) -> ProcessPool:
+    """
+    Sets the size and warm-up of the default pool, shutting down its
+    current workers. Call it before the first `cpu_bound` call.
+    """
+    default_process_pool.shutdown()
+    default_process_pool.max_workers = max_workers or os.cpu_count() or 1
+    default_process_pool.warm_up = warm_up
+    default_process_pool.initializer = initializer
+    default_process_pool.initargs = initargs
+    return default_process_pool
+
+
+def cpu_bound(func: Callable = None, *, pool: ProcessPool = None):
+    """
+    Marks an agent function as CPU-heavy: each call runs in a worker process
+    of `pool` (by default `default_process_pool`) and the caller waits for
+    its result, so it neither blocks other tools on the GIL nor, run in the
+    parallel or async paths, the turn loop.
+
+        @cpu_bound
+        def aggregate_trades(address: str): ...
+
+    The function must be defined at module level (workers import it by
+    name). Its name, signature and docstring are kept, so its tool schema is
+    unchanged.
+    """
+    if func is None:
+        return functools.partial(cpu_bound, pool=pool)
+    if "<locals>" in func.__qualname__:
+        raise TypeError(
+            f"cpu_bound functions must be defined at module level, got {func.__qualname__}")
+
+    @functools.wraps(func)
+    def offloaded(*args, **kwargs):
+        return (pool or default_process_pool).submit(offloaded, *args, **kwargs).result()
+
+    offloaded.cpu_bound_target = func
+    return offloaded
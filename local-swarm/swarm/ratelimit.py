@@ -0,0 +1,179 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# where `SwarmBase.retry_flow` leaves a successful request's reservation for `settle`
+RESERVATION = "swarm_rate_limit_reservation"
+
+
+class TokenBucket:
+    """
+    A bucket refilled at `per_minute / 60` units per second, holding at most
+    one minute's worth. Takes may drive it negative: the taker then waits
+    until the deficit is refilled, so callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float, now: float) -> float:
+        """Takes `amount`; returns the seconds to wait before using it."""
+        self._refill(now)
+        self.level -= amount
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+    def give(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Reservation:
+    """One request's share of a key's budgets, to be corrected from `usage`."""
+
+    __slots__ = ("limit", "tokens", "delay")
+
+    def __init__(self, limit: "KeyLimit", tokens: int, delay: float):
+        self.limit = limit
+        self.tokens = tokens
+        self.delay = delay
+
+    def settle(self, actual_tokens: int) -> None:
+        """Corrects the token budget by the difference to the real usage."""
+        self.limit.adjust(self.tokens - actual_tokens)
+        self.tokens = actual_tokens
+
+    def refund(self) -> None:
+        """Returns the tokens of a request the upstream did not process."""
+        self.settle(0)
+
+
+class KeyLimit:
+    """The requests-per-minute and tokens-per-minute budgets of one key."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def reserve(self, tokens: int) -> Reservation:
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self._requests is not None:
+                delay = self._requests.take(1, now)
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.take(tokens, now))
+            if delay:
+                self.waits += 1
+                self.wait_time += delay
+        return Reservation(self, tokens, delay)
+
+    def adjust(self, tokens: int) -> None:
+        if self._tokens is None or not tokens:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if tokens > 0:
+                self._tokens.give(tokens, now)
+            else:
+                self._tokens.take(-tokens, now)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+            }
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets per `(base_url,
+    api_key)`, shared by every client using the limiter (by default all
+    clients in the process use `default_rate_limiter`).
+
+    A request over budget is not rejected: it reserves its share right away
+    and waits until the budget has refilled, so concurrent callers are
+    served first come, first served. Its tokens are estimated before the
+    call (about 4 bytes per prompt token, plus `max_tokens`, or
+    `default_completion_tokens` without it) and corrected from the
+    upstream's `usage` afterwards. Keys without a configured limit are
+    never delayed.
+    """
+
+    def __init__(self, default_completion_tokens: int = 512):
+        self.default_completion_tokens = default_completion_tokens
+        self.limits: Dict[Tuple[str, str], KeyLimit] = {}
+
+    def configure(
+        self,
+        base_url: str,
+        api_key: str = "",
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+    ) -> KeyLimit:
+        """Sets the budgets of one key; `rpm=None, tpm=None` removes them."""
+        key = (base_url.rstrip("/"), api_key)
+        if rpm is None and tpm is None:
+            self.limits.pop(key, None)
+            return None
+        self.limits[key] = limit = KeyLimit(rpm, tpm)
+        return limit
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any key is limited; requests skip the estimate otherwise."""
+        return bool(self.limits)
+
+    def estimate(self, data: dict, content: bytes) -> int:
+        completion = (
+            data.get("max_tokens")
+            or data.get("max_completion_tokens")
+            or self.default_completion_tokens
+        )
+        return len(content) // 4 + completion
+
+    def reserve(self, base_url: str, api_key: str, tokens: int) -> Optional[Reservation]:
+        """Reserves budget for one request, or returns None for unlimited keys."""
+        limit = self.limits.get((base_url.rstrip("/"), api_key))
+        return limit.reserve(tokens) if limit is not None else None
+
+    def settle(self, response: httpx.Response, usage: Optional[dict]) -> None:
+        """Corrects the reservation of `response` from the reported `usage`."""
+        reservation = response.extensions.get(RESERVATION)
+        if reservation is None or not usage:
+            return
+        total = usage.get("total_tokens") or (
+            (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0))
+        reservation.settle(total)
+
+    def as_dict(self) -> dict:
+        return {
+            f"{base_url} ({api_key[:6] + '...' if api_key else 'no key'})": limit.as_dict()
+            for (base_url, api_key), limit in self.limits.items()
+        }
+
+
+default_rate_limiter = RateLimiter()
+
+
+def configure_rate_limit(
+    base_url: str, api_key: str = "", rpm: Optional[float] = None, tpm: Optional[float] = None
+) -> KeyLimit:
+    """Sets the budgets of one key on the process-wide `default_rate_limiter`."""
+    return default_rate_limiter.configure(base_url, api_key, rpm, tpm)
@@ -0,0 +1,289 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an endpoint's circuit is open."""
+
+    def __init__(self, base_url: str, retry_in: float):
+        self.base_url = base_url
+        self.retry_in = retry_in
+        super().__init__(
+            f"Circuit open for {base_url}: failing fast for another {retry_in:.1f}s"
+        )
+
+
+class RetryStats:
+    """Counters shared by every client using the same `RetryPolicy`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.gave_up = 0
+        self.reasons = Counter()
+
+    def record_retry(self, reason: str) -> None:
+        with self._lock:
+            self.retries += 1
+            self.reasons[reason] += 1
+
+    def record_give_up(self) -> None:
+        with self._lock:
+            self.gave_up += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "reasons": dict(self.reasons),
+        }
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff for chat completion requests.
+
+    A request is retried on transport errors (connect failures, timeouts) and
+    on the status codes in `retry_statuses`, up to `max_attempts` attempts in
+    total. The n-th retry waits a random time in
+    `[0, min(max_delay, base_delay * multiplier ** n)]` ("full jitter"),
+    unless the response carries a `Retry-After` header, which is honored as
+    long as it is no longer than `max_retry_after` (otherwise the request is
+    not retried).
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        multiplier: float = 2.0,
+        max_delay: float = 20.0,
+        max_retry_after: float = 60.0,
+        retry_statuses: Iterable[int] = RETRYABLE_STATUS_CODES,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.stats = RetryStats()
+
+    def is_retryable(self, response: httpx.Response) -> bool:
+        return response.status_code in self.retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        cap = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return random.uniform(0, cap)
+
+    def next_delay(
+        self, attempt: int, response: Optional[httpx.Response] = None
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying after the `attempt`-th attempt
+        (0-based) failed, or None if the request should not be retried.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                return retry_after
+        return self.backoff(attempt)
+
+    def after_attempt(
+        self,
+        breaker: "CircuitBreaker",
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> Optional[float]:
+        """
+        Records the outcome of the `attempt`-th attempt (0-based) on `breaker`
+        and in `stats`. Returns the delay before the next attempt, or None if
+        the outcome is final: a success, a non-retryable response, or retries
+        exhausted.
+        """
+        if error is not None:
+            breaker.record_failure()
+            reason = type(error).__name__
+            delay = self.next_delay(attempt)
+        else:
+            if is_upstream_failure(response):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if response.status_code == 200 or not self.is_retryable(response):
+                return None
+            reason = str(response.status_code)
+            delay = self.next_delay(attempt, response)
+
+        if delay is None:
+            self.stats.record_give_up()
+        else:
+            self.stats.record_retry(reason)
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a `Retry-After` header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of one upstream `base_url`.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast with `CircuitOpenError` for `reset_timeout` seconds.
+    Then a single trial request is let through (half-open): success closes
+    the circuit, failure re-opens it. A trial that ends without an outcome
+    (cancelled, timed out, abandoned) must hand its slot back with
+    `release_trial`. A `failure_threshold` of None disables the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        base_url: str,
+        failure_threshold: Optional[int] = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.base_url = base_url
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trials = 0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def before_request(self) -> Optional[int]:
+        """
+        Raises `CircuitOpenError` if the request must not be sent. Returns a
+        trial id if the request is the half-open trial, else None.
+        """
+        if self.failure_threshold is None:
+            return None
+        with self._lock:
+            if self._state == self.CLOSED:
+                return None
+            waited = time.monotonic() - self._opened_at
+            if self._state == self.OPEN and waited >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trials += 1
+                return self._trials
+            self.rejected += 1
+            raise CircuitOpenError(
+                self.base_url, max(0.0, self.reset_timeout - waited))
+
+    def release_trial(self, trial: Optional[int]) -> None:
+        """
+        Frees the slot of `trial` if it ended without recording an outcome,
+        so the next request can be the trial; the circuit stays half-open.
+        """
+        with self._lock:
+            if trial is not None and trial == self._trials and self._trial_in_flight:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        if self.failure_threshold is None:
+            return
+        with self._lock:
+            self.consecutive_failures += 1
+            trial_failed = self._state == self.HALF_OPEN
+            self._trial_in_flight = False
+            if trial_failed or (
+                self._state == self.CLOSED
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.trips += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    """One `CircuitBreaker` per `base_url`, created on first use."""
+
+    def __init__(self, failure_threshold: Optional[int] = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(base_url)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    base_url,
+                    CircuitBreaker(base_url, self.failure_threshold, self.reset_timeout),
+                )
+        return breaker
+
+    def states(self) -> Dict[str, dict]:
+        return {url: breaker.as_dict() for url, breaker in self._breakers.items()}
+
+
+def is_upstream_failure(response: httpx.Response) -> bool:
+    """Whether a response says something about upstream health (429 / 5xx)."""
+    return response.status_code == 429 or response.status_code >= 500
+
+
+default_retry_policy = RetryPolicy()
+default_circuit_breakers = CircuitBreakerRegistry()
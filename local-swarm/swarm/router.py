@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import Counter, deque
+from typing import Iterable, List, Optional
+
+import httpx
+
+from .retry import RetryPolicy
+
+LATENCY = "latency"
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+STRATEGIES = (LATENCY, WEIGHTED_ROUND_ROBIN, LEAST_OUTSTANDING)
+
+# responses that say "this endpoint or key cannot serve you right now"; other
+# errors (400, 404, ...) would fail the same way everywhere and are returned
+FAILOVER_STATUS_CODES = frozenset({401, 403, 408, 429, 500, 502, 503, 504})
+
+
+class Endpoint:
+    """
+    One OpenAI-compatible endpoint and its rolling health. Samples older
+    than `max_age` seconds are ignored, so an endpoint that is not used any
+    more is measured afresh instead of being judged on stale numbers.
+
+    Attributes:
+        base_url (str): E.g. `https://api.example.com/v1`.
+        api_key (str): Key for this endpoint; empty to use the agent's.
+        weight (float): Share of traffic under weighted round-robin.
+        outstanding (int): Requests sent and not yet answered.
+    """
+
+    def __init__(self, base_url: str, api_key: str = "", weight: float = 1.0,
+                 window: int = 50, max_age: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.weight = weight
+        self.max_age = max_age
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        # (time.monotonic(), value) pairs
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._current_weight = 0.0
+        self._failed_at = float("-inf")
+        self._trial = False
+
+    def _recent(self, samples: deque) -> list:
+        since = time.monotonic() - self.max_age
+        return [value for at, value in samples if at >= since]
+
+    @property
+    def samples(self) -> int:
+        """Number of request outcomes in the window."""
+        return len(self._recent(self._outcomes))
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Mean of the last `window` successful request latencies."""
+        latencies = self._recent(self._latencies)
+        return sum(latencies) / len(latencies) if latencies else None
+
+    @property
+    def error_rate(self) -> float:
+        """Share of failures among the last `window` requests."""
+        outcomes = self._recent(self._outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+        }
+
+    def __repr__(self):
+        return f"Endpoint({self.base_url!r}, weight={self.weight})"
+
+
+class Router:
+    """
+    Spreads chat completion requests over several endpoints (`Endpoint`s or
+    plain base URLs). Give one to `Swarm(router=...)` or
+    `AsyncSwarm(router=...)`; it then replaces every agent's `base_url`
+    (and, for endpoints with a key, its `api_key`).
+
+    Each request goes to the best healthy endpoint under `strategy`:
+
+    - `latency`: lowest rolling latency; endpoints without recent samples
+      are tried first, so idle endpoints are re-measured every `max_age`.
+    - `weighted_round_robin`: smooth weighted round-robin over `weight`.
+    - `least_outstanding`: fewest requests in flight, then lowest latency.
+
+    An endpoint is unhealthy while its error rate over the last `window`
+    requests exceeds `max_error_rate` (after `min_samples` requests);
+    unhealthy endpoints are only used once every healthy one has failed.
+    After `cooldown` seconds without a failure, one request is sent to an
+    unhealthy endpoint first, as a trial: if it succeeds, the endpoint's
+    error history is cleared and it is healthy again.
+    A request that fails with a transport error, an open circuit or one of
+    `FAILOVER_STATUS_CODES` is re-sent, unchanged, to the next endpoint in
+    the same turn. Every endpoint but the last is tried `failover_attempts`
+    times; the last one gets the client's full retry policy.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[Endpoint],
+        strategy: str = LATENCY,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        failover_attempts: int = 1,
+        cooldown: float = 30.0,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        self.endpoints: List[Endpoint] = [
+            Endpoint(e) if isinstance(e, str) else e for e in endpoints]
+        if not self.endpoints:
+            raise ValueError("Router needs at least one endpoint")
+        self.strategy = strategy
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.failover_policy = RetryPolicy(max_attempts=failover_attempts)
+        self.failovers = Counter()
+        self._lock = threading.Lock()
+
+    def healthy(self, endpoint: Endpoint) -> bool:
+        return (
+            endpoint.samples < self.min_samples
+            or endpoint.error_rate <= self.max_error_rate
+        )
+
+    def plan(self) -> List[Endpoint]:
+        """The endpoints to try for one request, best first."""
+        with self._lock:
+            healthy = [e for e in self.endpoints if self.healthy(e)]
+            unhealthy = [e for e in self.endpoints if not self.healthy(e)]
+            by_latency = lambda e: (e.latency is not None, e.latency or 0.0)
+            if self.strategy == LATENCY:
+                healthy.sort(key=by_latency)
+            elif self.strategy == LEAST_OUTSTANDING:
+                healthy.sort(key=lambda e: (e.outstanding, by_latency(e)))
+            elif healthy:
+                total = sum(e.weight for e in healthy)
+                for e in healthy:
+                    e._current_weight += e.weight
+                chosen = max(healthy, key=lambda e: e._current_weight)
+                chosen._current_weight -= total
+                healthy.remove(chosen)
+                healthy = [chosen] + sorted(healthy, key=by_latency)
+            unhealthy.sort(key=lambda e: e.error_rate)
+            now = time.monotonic()
+            for e in unhealthy:
+                if not e._trial and now - e._failed_at >= self.cooldown:
+                    # half-open: one request may prove the endpoint is back
+                    e._trial = True
+                    unhealthy.remove(e)
+                    return [e] + healthy + unhealthy
+            return healthy + unhealthy
+
+    def begin(self, endpoint: Endpoint) -> float:
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        return time.perf_counter()
+
+    def end(self, endpoint: Endpoint, start: float, ok: bool) -> None:
+        """Records the outcome of a request started with `begin`."""
+        now = time.monotonic()
+        with self._lock:
+            endpoint.outstanding -= 1
+            if endpoint._trial and ok:
+                endpoint._outcomes.clear()
+            endpoint._trial = False
+            endpoint._outcomes.append((now, ok))
+            if ok:
+                endpoint._latencies.append((now, time.perf_counter() - start))
+            else:
+                endpoint.errors += 1
+                endpoint._failed_at = now
+
+    def fails_over(self, response: httpx.Response) -> bool:
+        return response.status_code in FAILOVER_STATUS_CODES
+
+    def record_failover(self, reason: str) -> None:
+        with self._lock:
+            self.failovers[reason] += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "failovers": dict(self.failovers),
+                "endpoints": {e.base_url: e.as_dict() for e in self.endpoints},
+            }
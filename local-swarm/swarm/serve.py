@@ -0,0 +1,508 @@
+"""
+An HTTP front end that serves one agent to many concurrent conversations.
+
+    python -m swarm.serve examples.weather_agent.agents:weather_agent --port 8080
+
+Each conversation is a session, addressed by an id the caller chooses:
+
+    POST   /sessions/<id>/messages   {"content": "..."} runs one turn and streams
+                                     the `run_and_stream` deltas as server-sent
+                                     events ({"stream": false} returns JSON)
+    GET    /sessions/<id>            the stored conversation
+    DELETE /sessions/<id>
+    GET    /stats                    admission counters
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .async_core import AsyncSwarm
+from .store import ConversationStore
+from .types import Agent
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Content Too Large", 502: "Bad Gateway", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """A request that is answered with `status` before it is dispatched."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """
+    The state of one conversation between turns.
+
+    Attributes:
+        messages (list): The conversation so far.
+        agent (str): Name of the agent that answered last.
+        context_variables (dict): Context variables after the last turn.
+    """
+
+    __slots__ = ("messages", "agent", "context_variables")
+
+    def __init__(self, messages: List[dict], agent: Optional[str], context_variables: dict):
+        self.messages = messages
+        self.agent = agent
+        self.context_variables = context_variables
+
+
+class MemorySessions:
+    """Sessions kept in process memory; they are lost when the server stops."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def save(self, session_id: str, messages: List[dict], agent: str,
+             context_variables: dict) -> None:
+        """Appends a turn's messages and sets the session's state after it."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session([], None, {})
+        session.messages.extend(messages)
+        session.agent = agent
+        session.context_variables = context_variables
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class StoredSessions:
+    """Sessions kept in a `ConversationStore`, so they survive restarts."""
+
+    def __init__(self, store: ConversationStore):
+        self.store = store
+
+    def get(self, session_id: str) -> Optional[Session]:
+        checkpoint = self.store.checkpoint(session_id)
+        if checkpoint is None:
+            return None
+        return Session(self.store.load(session_id), checkpoint.agent,
+                       checkpoint.context_variables)
+
+    def save(self, session_id: str, messages: List[dict], agent: str,
+             context_variables: dict) -> None:
+        self.store.record(session_id, messages, agent, context_variables, done=True)
+
+    def delete(self, session_id: str) -> bool:
+        found = self.store.checkpoint(session_id) is not None
+        self.store.delete(session_id)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.store.conversations())
+
+
+class ServeStats:
+    def __init__(self):
+        self.active = 0
+        self.queued = 0
+        self.max_active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait = 0.0
+
+    def as_dict(self) -> dict:
+        started = self.completed + self.failed
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_active": self.max_active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "mean_queue_wait": self.queue_wait / started if started else 0.0,
+        }
+
+
+class Request:
+    __slots__ = ("method", "path", "headers", "body")
+
+    def __init__(self, method: str, path: str, headers: dict, body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int) -> Optional[Request]:
+    """
+    Reads one HTTP/1.1 request, or returns None at the end of the connection.
+    Raises `HTTPError` for a malformed `Content-Length` or a body larger
+    than `max_body` bytes, before reading the body.
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length") or "0"
+    if not length.isdigit():
+        raise HTTPError(400, "invalid Content-Length")
+    length = int(length)
+    if length > max_body:
+        raise HTTPError(413, f"request body over {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def dumps(payload) -> bytes:
+    # context variables may hold anything; the wire gets its string form
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def sse_event(event: str, payload) -> bytes:
+    return b"event: %s\ndata: %s\n\n" % (event.encode("ascii"), dumps(payload))
+
+
+def response_payload(session_id: str, response) -> dict:
+    return {
+        "session_id": session_id,
+        "agent": response.agent.name if response.agent else None,
+        "messages": response.messages,
+        "context_variables": response.context_variables,
+    }
+
+
+class SwarmServer:
+    """
+    Serves `agent` over HTTP to many conversations at once, on one event
+    loop with an `AsyncSwarm` client.
+
+    At most `max_concurrency` turns run at a time; further turns wait in
+    arrival order, and once `max_queue` of them are waiting new ones are
+    rejected with `503`; turns waiting for an earlier turn of their session
+    count as waiting too. Turns of the same session run one after another.
+    Request bodies over `max_body` bytes are rejected with `413`.
+    Session state lives in `sessions` (`MemorySessions` by default, or
+    `StoredSessions` over a `ConversationStore`); a handed-off agent is
+    found again by name among `agent` and `agents`. A turn is saved only
+    once it has finished: if its caller disconnects, it is dropped.
+
+    Like `StubServer`, the socket is bound on construction (`base_url` is
+    known right away); `start()` serves on a background thread and
+    `serve_forever()` on the calling one.
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        agents: Iterable[Agent] = (),
+        client: AsyncSwarm = None,
+        sessions=None,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_concurrency: int = 64,
+        max_queue: int = 1024,
+        max_turns: int = float("inf"),
+        max_body: int = 1 << 20,
+    ):
+        self.agent = agent
+        self.agents = {a.name: a for a in agents}
+        self.agents[agent.name] = agent
+        self.client = client or AsyncSwarm()
+        self.sessions = sessions if sessions is not None else MemorySessions()
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_turns = max_turns
+        self.max_body = max_body
+        self.stats = ServeStats()
+        self._socket = socket.create_server((host, port), backlog=1024)
+        self._session_locks: Dict[str, list] = {}
+        self._loop = None
+        self._stopping = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SwarmServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="swarm-serve", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves on the calling thread until `stop()` or interrupted."""
+        asyncio.run(self.serve())
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+        self._socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        connections = set()
+
+        async def handle(reader, writer):
+            task = asyncio.current_task()
+            connections.add(task)
+            try:
+                await self.handle_connection(reader, writer)
+            except asyncio.CancelledError:
+                pass  # the server is stopping
+            finally:
+                connections.discard(task)
+
+        server = await asyncio.start_server(handle, sock=self._socket)
+        self._ready.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            for task in list(connections):
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+            self._loop = None
+
+    async def handle_connection(self, reader, writer) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, self.max_body)
+                except HTTPError as e:
+                    # the body is left unread, so the connection cannot go on
+                    await self.send_json(writer, e.status, {"error": str(e)},
+                                         {"Connection": "close"})
+                    break
+                if request is None:
+                    break
+                await self.dispatch(request, writer)
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: Request, writer) -> None:
+        parts = request.path.strip("/").split("/")
+        if parts == ["health"] and request.method == "GET":
+            return await self.send_json(writer, 200, {"status": "ok"})
+        if parts == ["stats"] and request.method == "GET":
+            return await self.send_json(
+                writer, 200, {**self.stats.as_dict(), "sessions": len(self.sessions)})
+        if len(parts) == 2 and parts[0] == "sessions":
+            if request.method == "GET":
+                return await self.get_session(parts[1], writer)
+            if request.method == "DELETE":
+                found = self.sessions.delete(parts[1])
+                return await self.send_json(writer, 200 if found else 404, {"deleted": found})
+            return await self.send_json(writer, 405, {"error": "method not allowed"})
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages":
+            if request.method != "POST":
+                return await self.send_json(writer, 405, {"error": "method not allowed"})
+            return await self.post_messages(parts[1], request, writer)
+        await self.send_json(writer, 404, {"error": f"no route {request.path}"})
+
+    async def get_session(self, session_id: str, writer) -> None:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return await self.send_json(writer, 404, {"error": "no such session"})
+        await self.send_json(writer, 200, {
+            "session_id": session_id,
+            "agent": session.agent,
+            "messages": session.messages,
+            "context_variables": session.context_variables,
+        })
+
+    async def post_messages(self, session_id: str, request: Request, writer) -> None:
+        try:
+            body = json.loads(request.body or b"{}")
+            messages = body.get("messages") or [{"role": "user", "content": body["content"]}]
+        except (ValueError, KeyError, AttributeError):
+            return await self.send_json(
+                writer, 400, {"error": 'expected {"content": ...} or {"messages": [...]}'})
+
+        # a turn waits for a slot, or for the earlier turns of its session
+        lock = self._session_locks.get(session_id)
+        if (self._slots.locked() or lock is not None) and self.stats.queued >= self.max_queue:
+            self.stats.rejected += 1
+            return await self.send_json(
+                writer, 503, {"error": "server busy"}, {"Retry-After": "1"})
+
+        if lock is None:
+            lock = self._session_locks[session_id] = [asyncio.Lock(), 0]
+        lock[1] += 1
+        queued = time.perf_counter()
+        self.stats.queued += 1
+        waiting = True
+        try:
+            async with lock[0]:
+                try:
+                    await self._slots.acquire()
+                finally:
+                    waiting = False
+                    self.stats.queued -= 1
+                self.stats.queue_wait += time.perf_counter() - queued
+                self.stats.active += 1
+                self.stats.max_active = max(self.stats.max_active, self.stats.active)
+                try:
+                    await self.run_turn(session_id, messages, body, writer)
+                finally:
+                    self.stats.active -= 1
+                    self._slots.release()
+        finally:
+            if waiting:
+                self.stats.queued -= 1
+            lock[1] -= 1
+            if not lock[1]:
+                del self._session_locks[session_id]
+
+    async def run_turn(self, session_id: str, messages: List[dict], body: dict, writer) -> None:
+        session = self.sessions.get(session_id)
+        agent = self.agent
+        history = []
+        context_variables = {}
+        if session is not None:
+            agent = self.agents.get(session.agent, self.agent)
+            history = session.messages
+            context_variables = dict(session.context_variables)
+        context_variables.update(body.get("context_variables") or {})
+
+        stream = body.get("stream", True)
+        chunks = self.client.arun_and_stream(
+            agent, history + messages, context_variables, max_turns=self.max_turns)
+        response = None
+        if stream:
+            await self.start_stream(writer)
+        try:
+            async for chunk in chunks:
+                if "response" in chunk:
+                    response = chunk["response"]
+                elif stream:
+                    # send before resuming: the engine reuses the delta afterwards
+                    await self.send_chunk(writer, sse_event("delta", chunk))
+        except (ConnectionError, asyncio.CancelledError):
+            self.stats.failed += 1
+            await chunks.aclose()
+            raise
+        except Exception as e:
+            self.stats.failed += 1
+            if not stream:
+                return await self.send_json(writer, 502, {"error": str(e)})
+            await self.send_chunk(writer, sse_event("error", {"error": str(e)}))
+            return await self.send_chunk(writer, b"")
+
+        self.sessions.save(session_id, messages + response.messages,
+                           response.agent.name, response.context_variables)
+        self.stats.completed += 1
+        payload = response_payload(session_id, response)
+        if not stream:
+            return await self.send_json(writer, 200, payload)
+        await self.send_chunk(writer, sse_event("response", payload))
+        await self.send_chunk(writer, b"")
+
+    async def send_json(self, writer, status: int, payload: dict, headers: dict = None) -> None:
+        data = dumps(payload)
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(data)}",
+        ]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def start_stream(self, writer) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        await writer.drain()
+
+    async def send_chunk(self, writer, data: bytes) -> None:
+        """Writes one chunk of a chunked body; `b""` ends the body."""
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+
+def load_agent(target: str):
+    """
+    Resolves `module:attribute` to an agent, plus every `Agent` defined in
+    the module (the agents it may hand off to).
+    """
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    agent = getattr(module, attribute or "agent")
+    agents = [value for value in vars(module).values() if isinstance(value, Agent)]
+    return agent, agents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("target", help="the agent to serve, as module:attribute")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=64,
+                        help="turns run at the same time")
+    parser.add_argument("--max-queue", type=int, default=1024,
+                        help="turns waiting for a slot before new ones get 503")
+    parser.add_argument("--max-turns", type=int, default=None)
+    parser.add_argument("--max-body", type=int, default=1 << 20,
+                        help="largest request body in bytes; larger ones get 413")
+    parser.add_argument("--store", help="sqlite file for sessions (default: in memory)")
+    args = parser.parse_args(argv)
+
+    agent, agents = load_agent(args.target)
+    sessions = StoredSessions(ConversationStore(args.store)) if args.store else None
+    server = SwarmServer(
+        agent,
+        agents,
+        sessions=sessions,
+        host=args.host,
+        port=args.port,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        max_turns=args.max_turns or float("inf"),
+        max_body=args.max_body,
+    )
+    print(f"Swarm server listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import json
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+_scan_once = json.JSONDecoder().scan_once
+
+
+def stdlib_loads(data: bytes):
+    """
+    `json.loads` for one stream chunk, calling the C scanner directly. This
+    skips the encoding detection and whitespace regexes of `json.loads`,
+    which cost more than the parse itself for small chunks.
+    """
+    text = data.decode("utf-8")
+    try:
+        obj, end = _scan_once(text, 0)
+    except StopIteration:
+        return json.loads(text)  # leading whitespace, or raises properly
+    if end != len(text) and text[end:].strip():
+        raise json.JSONDecodeError("Extra data", text, end)
+    return obj
+
+
+try:
+    import orjson
+
+    fast_loads = orjson.loads
+except ImportError:  # pragma: no cover - depends on the environment
+    fast_loads = stdlib_loads
+
+_DONE = b"[DONE]"
+
+
+class ServerSentEvent(NamedTuple):
+    event: str
+    data: bytes
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+
+class ChunkDelta(NamedTuple):
+    """
+    One `choices[i].delta` from a chat completion stream chunk. Usage-only
+    chunks (sent when `stream_options.include_usage` is set) have no choices
+    and are reported with `index=None` and an empty delta.
+    """
+
+    index: Optional[int]
+    delta: dict
+    finish_reason: Optional[str] = None
+    usage: Optional[dict] = None
+
+
+class SSEDecoder:
+    """
+    Incremental `text/event-stream` decoder working on raw byte chunks.
+
+    Follows the SSE framing rules: `\\n`, `\\r\\n` and `\\r` line endings, one
+    optional space after the field colon, comment lines starting with `:`,
+    multi-line `data:` fields joined with `\\n`, and events dispatched on a
+    blank line. Chunks may split lines (and `\\r\\n` pairs) anywhere.
+
+    Input is cut into whole events with a single `split` per chunk; the
+    common single-line `data: ...` event never goes through per-line parsing.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._last_id = None
+
+    def _blocks(self, chunk: bytes) -> List[bytes]:
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if b"\r" in buffer:
+            # a trailing \r may be the first half of a \r\n split across chunks
+            tail = b""
+            if buffer.endswith(b"\r"):
+                buffer, tail = buffer[:-1], b"\r"
+            buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            blocks = buffer.split(b"\n\n")
+            self._buffer = blocks.pop() + tail
+        else:
+            blocks = buffer.split(b"\n\n")
+            self._buffer = blocks.pop()
+        return blocks
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        events = []
+        for block in self._blocks(chunk):
+            event = self._parse(block)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def feed_data(self, chunk: bytes) -> List[bytes]:
+        """
+        Like `feed`, but returns only the `data` of each event. This is the
+        hot path for chat completion streams.
+        """
+        datas = []
+        for block in self._blocks(chunk):
+            if block.startswith(b"data: ") and b"\n" not in block:
+                datas.append(block[6:])
+                continue
+            event = self._parse(block)
+            if event is not None:
+                datas.append(event.data)
+        return datas
+
+    def flush(self) -> List[ServerSentEvent]:
+        """Dispatches an event left unterminated when the stream ends."""
+        block, self._buffer = self._buffer, b""
+        event = self._parse(block.replace(b"\r", b"\n").rstrip(b"\n"))
+        return [event] if event is not None else []
+
+    def _parse(self, block: bytes) -> Optional[ServerSentEvent]:
+        data = []
+        event_type = ""
+        event_id = None
+        retry = None
+        for line in block.split(b"\n"):
+            if not line:
+                # an empty line inside a block (e.g. "\n\n\n") ends an event
+                # without data, which is discarded
+                if not data:
+                    event_type = ""
+                continue
+            if line.startswith(b":"):
+                continue  # comment / keep-alive
+            name, sep, value = line.partition(b":")
+            if sep and value.startswith(b" "):
+                value = value[1:]
+            if name == b"data":
+                data.append(value)
+            elif name == b"event":
+                event_type = value.decode("utf-8")
+            elif name == b"id":
+                event_id = value.decode("utf-8")
+            elif name == b"retry" and value.isdigit():
+                retry = int(value)
+
+        if event_id is not None:
+            self._last_id = event_id
+        if not data:
+            return None
+        return ServerSentEvent(
+            event_type or "message", b"\n".join(data), self._last_id, retry)
+
+
+class ChatStreamDecoder:
+    """
+    Decodes a chat completion SSE stream into `ChunkDelta`s.
+
+    JSON is parsed with `orjson` when it is installed, else with
+    `stdlib_loads` (or with the `loads` given). Malformed chunks are skipped
+    and counted in `errors`.
+    """
+
+    def __init__(self, loads: Callable[[bytes], object] = None):
+        self.loads = loads or fast_loads
+        self.sse = SSEDecoder()
+        self.done = False
+        self.errors = 0
+
+    def feed(self, chunk: bytes) -> List[ChunkDelta]:
+        return self._decode(self.sse.feed_data(chunk))
+
+    def flush(self) -> List[ChunkDelta]:
+        return self._decode([event.data for event in self.sse.flush()])
+
+    def _decode(self, datas: Iterable[bytes]) -> List[ChunkDelta]:
+        deltas = []
+        for data in datas:
+            if data == _DONE:
+                self.done = True
+                continue
+            try:
+                chunk = self.loads(data)
+            except ValueError:
+                self.errors += 1
+                continue
+            if not isinstance(chunk, dict):
+                self.errors += 1
+                continue
+            usage = chunk.get("usage")
+            choices = chunk.get("choices")
+            if not choices:
+                if usage:
+                    deltas.append(ChunkDelta(None, {}, None, usage))
+                continue
+            for choice in choices:
+                deltas.append(
+                    ChunkDelta(
+                        choice.get("index", 0),
+                        choice.get("delta") or {},
+                        choice.get("finish_reason"),
+                        usage,
+                    )
+                )
+        return deltas
+
+
+def iter_chunk_deltas(byte_chunks: Iterable[bytes], loads=None):
+    """Yields `ChunkDelta`s from an iterable of raw response byte chunks."""
+    decoder = ChatStreamDecoder(loads)
+    for raw in byte_chunks:
+        yield from decoder.feed(raw)
+    yield from decoder.flush()
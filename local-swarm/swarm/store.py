@@ -0,0 +1,184 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class Checkpoint:
+    """
+    Where a stored conversation's last run stood after its last completed step.
+
+    Attributes:
+        agent (str): Name of the active agent.
+        context_variables (dict): Context variables at that point.
+        done (bool): Whether the run ended (final answer or `max_turns`).
+        length (int): Number of stored messages.
+    """
+
+    __slots__ = ("agent", "context_variables", "done", "length")
+
+    def __init__(self, agent: str, context_variables: dict, done: bool, length: int):
+        self.agent = agent
+        self.context_variables = context_variables
+        self.done = done
+        self.length = length
+
+
+class ConversationStore:
+    """
+    Append-only sqlite log of conversations, keyed by conversation id.
+
+    Messages are only ever inserted, one row each with a per-conversation
+    sequence number, so appending costs the same whatever the length of the
+    conversation, and `tail(n)` reads only the last `n` rows. Every
+    `record` call appends its messages and moves the conversation's
+    `Checkpoint` in one transaction: after a crash the store holds a
+    prefix of the conversation and a checkpoint that matches it.
+
+    Give one to `Swarm(store=...)` or `AsyncSwarm(store=...)` and pass
+    `conversation_id=` to `run`/`arun`; see `Swarm.resume` to continue a
+    run that was interrupted. Each
+    conversation must have one writer at a time.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives process crashes; only power loss can drop the last commits
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, message TEXT NOT NULL, "
+            "PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "conversation_id TEXT PRIMARY KEY, agent TEXT, context_variables TEXT, "
+            "done INTEGER NOT NULL, length INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lengths: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _length(self, conversation_id: str) -> int:
+        length = self._lengths.get(conversation_id)
+        if length is None:
+            row = self._conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            length = self._lengths[conversation_id] = 0 if row[0] is None else row[0] + 1
+        return length
+
+    def record(
+        self,
+        conversation_id: str,
+        messages: Iterable[dict] = (),
+        agent: Optional[str] = None,
+        context_variables: Optional[dict] = None,
+        done: bool = False,
+    ) -> int:
+        """
+        Appends `messages` and, if `agent` is given, sets the checkpoint,
+        atomically. Returns the conversation's new length.
+        """
+        rows = [
+            json.dumps(message, ensure_ascii=False, default=str) for message in messages
+        ]
+        with self._lock:
+            start = self._length(conversation_id)
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, message) VALUES (?, ?, ?)",
+                    [(conversation_id, start + i, row) for i, row in enumerate(rows)],
+                )
+                if agent is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                        (conversation_id, agent,
+                         json.dumps(context_variables or {}, ensure_ascii=False, default=str),
+                         int(done), start + len(rows), time.time()),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._lengths[conversation_id] = start + len(rows)
+            return start + len(rows)
+
+    def append(self, conversation_id: str, *messages: dict) -> int:
+        """Appends messages without moving the checkpoint."""
+        return self.record(conversation_id, messages)
+
+    def load(self, conversation_id: str) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def tail(self, conversation_id: str, n: int) -> List[dict]:
+        """The last `n` messages, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+                (conversation_id, n),
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def length(self, conversation_id: str) -> int:
+        with self._lock:
+            return self._length(conversation_id)
+
+    def checkpoint(self, conversation_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT agent, context_variables, done, length FROM checkpoints "
+                "WHERE conversation_id = ?", (conversation_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        agent, context_variables, done, length = row
+        return Checkpoint(agent, json.loads(context_variables), bool(done), length)
+
+    def conversations(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT conversation_id FROM messages").fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            self._conn.execute("DELETE FROM checkpoints WHERE conversation_id = ?", (conversation_id,))
+            self._lengths.pop(conversation_id, None)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pending_tool_calls(messages: List[dict]) -> List[dict]:
+    """
+    Tool calls of the last assistant message that have no tool result yet,
+    e.g. because the worker running them crashed.
+    """
+    answered = set()
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            answered.add(message.get("tool_call_id"))
+        elif message.get("role") == "assistant":
+            return [
+                tool_call for tool_call in message.get("tool_calls") or []
+                if tool_call["id"] not in answered
+            ]
+        else:
+            return []
+    return []
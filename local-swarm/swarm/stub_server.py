@@ -0,0 +1,371 @@
+"""
+A local OpenAI-compatible `/chat/completions` server for tests, load tests
+and latency experiments, with no network access or API key needed.
+
+    python -m swarm.stub_server --port 8000 --ttft 0.3 --token-delay 0.02
+
+then point agents at it with `Agent(base_url="http://127.0.0.1:8000/v1")`.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, List, Optional
+
+_TOKEN_RE = re.compile(r"\s*\S+|\s+")
+
+
+def split_tokens(text: str) -> List[str]:
+    """Splits text into word-sized "tokens" that join back to `text`."""
+    return _TOKEN_RE.findall(text or "")
+
+
+def estimate_tokens(data) -> int:
+    return (len(json.dumps(data)) + 3) // 4
+
+
+class StubReply:
+    """
+    One scripted reply.
+
+    Attributes:
+        content (str): Assistant text, streamed word by word.
+        tool_calls (list): `{"name", "arguments", "id"?}` dicts; `arguments`
+            may be a dict or a JSON string.
+        status (int): If set (and not 200), the request fails with this
+            status instead of answering.
+        retry_after (float): `Retry-After` header sent with an error status.
+        disconnect_after (int): Drop the connection after this many content
+            tokens of a stream, without finishing it.
+        usage (dict): Usage to report instead of the estimated one, e.g. to
+            simulate cached prompt tokens.
+    """
+
+    def __init__(
+        self,
+        content: Optional[str] = None,
+        tool_calls: Optional[List[dict]] = None,
+        status: int = 200,
+        retry_after: Optional[float] = None,
+        disconnect_after: Optional[int] = None,
+        usage: Optional[dict] = None,
+    ):
+        self.content = content
+        self.tool_calls = [
+            {
+                "id": call.get("id") or f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": (
+                        call.get("arguments", "{}")
+                        if isinstance(call.get("arguments", "{}"), str)
+                        else json.dumps(call["arguments"])
+                    ),
+                },
+            }
+            for call in tool_calls or ()
+        ]
+        self.status = status
+        self.retry_after = retry_after
+        self.disconnect_after = disconnect_after
+        self.usage = usage
+
+    @classmethod
+    def coerce(cls, reply) -> "StubReply":
+        if isinstance(reply, cls):
+            return reply
+        if isinstance(reply, str):
+            return cls(content=reply)
+        return cls(**reply)
+
+
+def completion_payload(reply: StubReply, model: str = "stub-model", usage: dict = None) -> dict:
+    """The JSON body of a non-streamed completion answering with `reply`."""
+    message = {"role": "assistant", "content": reply.content}
+    if reply.tool_calls:
+        message["tool_calls"] = reply.tool_calls
+    payload = {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if reply.tool_calls else "stop",
+        }],
+    }
+    if reply.usage or usage:
+        payload["usage"] = reply.usage or usage
+    return payload
+
+
+def echo(body: dict) -> StubReply:
+    """Default responder: echoes the last user message."""
+    for message in reversed(body.get("messages") or []):
+        if message.get("role") == "user":
+            return StubReply(content=f"Echo: {message.get('content')}")
+    return StubReply(content="Echo")
+
+
+class StubServer:
+    """
+    OpenAI-compatible chat completions server running on a background thread.
+
+    Replies come from `script` (a list of `StubReply`s, dicts or strings,
+    consumed in order, or repeated forever with `cycle=True`), then from
+    `responder(body)`, which defaults to echoing the last user message.
+
+    Latency is simulated per request: the first token arrives after `ttft`
+    seconds and every following token after `token_delay` more (a
+    non-streaming reply is sent once all tokens are "generated"). With
+    probability `error_rate` a request fails with `error_status`, carrying
+    `Retry-After: retry_after` if set. Randomness is seeded by `seed`.
+
+    Every request body is kept in `received` (the last `keep_requests`) and
+    counted in `stats`.
+    """
+
+    def __init__(
+        self,
+        script: Optional[Iterable] = None,
+        responder: Optional[Callable[[dict], object]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttft: float = 0.0,
+        token_delay: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        retry_after: Optional[float] = None,
+        cycle: bool = False,
+        seed: Optional[int] = None,
+        keep_requests: int = 1000,
+    ):
+        script = [StubReply.coerce(reply) for reply in script or ()]
+        self._script = itertools.cycle(script) if cycle and script else iter(script)
+        self.responder = responder or echo
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.received = deque(maxlen=keep_requests)
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="swarm-stub-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves on the calling thread until interrupted."""
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def next_reply(self, body: dict) -> StubReply:
+        with self._lock:
+            self.received.append(body)
+            self.stats["requests"] += 1
+            reply = next(self._script, None)
+            inject_error = self.error_rate and self._random.random() < self.error_rate
+        if inject_error:
+            return StubReply(status=self.error_status, retry_after=self.retry_after)
+        if reply is None:
+            reply = StubReply.coerce(self.responder(body))
+        return reply
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes; Nagle + delayed ACKs would add ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub: StubServer = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.send_json(400, {"error": {"message": "invalid JSON body"}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self.send_json(404, {"error": {"message": f"no route {self.path}"}})
+
+        reply = stub.next_reply(body)
+        if reply.status != 200:
+            stub.count("errors")
+            headers = {}
+            if reply.retry_after is not None:
+                headers["Retry-After"] = str(reply.retry_after)
+            return self.send_json(
+                reply.status,
+                {"error": {"message": "injected error", "type": "stub_error"}},
+                headers,
+            )
+
+        tokens = split_tokens(reply.content)
+        usage = reply.usage or {
+            "prompt_tokens": estimate_tokens(body.get("messages")),
+            "completion_tokens": len(tokens)
+            + sum(estimate_tokens(call) for call in reply.tool_calls),
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        model = body.get("model", "stub-model")
+        if body.get("stream"):
+            stub.count("streams")
+            self.stream(stub, reply, tokens, usage, model, body)
+        else:
+            time.sleep(stub.ttft + stub.token_delay * max(len(tokens) - 1, 0))
+            self.send_json(200, completion_payload(reply, model, usage))
+        stub.count("completed")
+
+    def send_json(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def stream(self, stub, reply, tokens, usage, model, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def event(delta=None, finish_reason=None, **extra):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if delta is None else [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                **extra,
+            }
+            self.write_chunk(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+
+        time.sleep(stub.ttft)
+        event({"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(stub.token_delay)
+            if reply.disconnect_after is not None and i >= reply.disconnect_after:
+                stub.count("disconnects")
+                self.close_connection = True
+                return  # no terminating chunk: the client sees a broken stream
+            event({"content": token})
+        for index, call in enumerate(reply.tool_calls):
+            # name first, then the arguments in two fragments, like the real API
+            arguments = call["function"]["arguments"]
+            half = len(arguments) // 2
+            event({"tool_calls": [{
+                "index": index, "id": call["id"], "type": "function",
+                "function": {"name": call["function"]["name"], "arguments": ""},
+            }]})
+            for fragment in (arguments[:half], arguments[half:]):
+                time.sleep(stub.token_delay)
+                event({"tool_calls": [{"index": index, "function": {"arguments": fragment}}]})
+        event({}, "tool_calls" if reply.tool_calls else "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event(usage=usage)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttft", type=float, default=0.0, help="seconds to first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--script", help="JSON file with a list of replies")
+    parser.add_argument("--cycle", action="store_true", help="repeat the script forever")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    server = StubServer(
+        script=script,
+        host=args.host,
+        port=args.port,
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        cycle=args.cycle,
+        seed=args.seed,
+    )
+    print(f"Stub server listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
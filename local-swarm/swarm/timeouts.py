@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from .types import Result
+
+
+def tool_timeout(seconds: float) -> Callable:
+    """
+    Sets the time limit of one agent function, overriding its agent's
+    `tool_timeout`:
+
+        @tool_timeout(10)
+        def get_account_resources(address): ...
+
+    The function itself is returned unchanged.
+    """
+
+    def decorate(func: Callable) -> Callable:
+        func.tool_timeout = seconds
+        return func
+
+    return decorate
+
+
+def resolve_timeout(func: Callable, agent_timeout: Optional[float]) -> Optional[float]:
+    """The function's own `tool_timeout` if set, else the agent's."""
+    timeout = getattr(func, "tool_timeout", None)
+    return timeout if timeout is not None else agent_timeout
+
+
+class TimeoutStats:
+    """Counts of tool calls that hit their time limit, per tool name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_tool: Counter = Counter()
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self.by_tool[name] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_tool.values())
+
+    def as_dict(self) -> Dict[str, object]:
+        with self._lock:
+            return {"total": sum(self.by_tool.values()), "by_tool": dict(self.by_tool)}
+
+
+def timeout_result(name: str, seconds: float, cancelled: bool) -> Result:
+    """The tool message sent to the model in place of a timed-out call's result."""
+    action = "cancelled" if cancelled else "abandoned"
+    return Result(value=json.dumps({
+        "error": "timeout",
+        "tool": name,
+        "timeout_seconds": seconds,
+        "message": f"Tool {name} did not finish within {seconds}s and was {action}. "
+                   "Try again later or continue without its result.",
+    }))
+
+
+def adopt_context(context: contextvars.Context) -> None:
+    """
+    Applies the context variables a call set in `context` (a copy of the
+    caller's) to the caller, as if the call had run in place.
+    """
+    for var, value in context.items():
+        var.set(value)
+
+
+def with_timeout(
+    func: Callable,
+    name: str,
+    seconds: float,
+    stats: TimeoutStats,
+    on_timeout: Callable[[str], None] = None,
+) -> Callable:
+    """
+    Returns `func` limited to `seconds`. On timeout the call returns
+    `timeout_result` so the run continues. `async def` functions are
+    cancelled; sync functions run on a daemon watchdog thread that is
+    abandoned (Python threads cannot be killed) and left to finish on its own.
+    Context variables set by a call that finishes in time reach the caller
+    (e.g. `tool_cache.last_call_hit` for tool spans).
+    """
+
+    def timed_out(cancelled: bool) -> Result:
+        stats.record(name)
+        if on_timeout is not None:
+            on_timeout(name)
+        return timeout_result(name, seconds, cancelled)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def limited(**args):
+            finished = {}
+
+            async def call():
+                try:
+                    return await func(**args)
+                finally:
+                    # `wait_for` runs the call in a task with its own context
+                    finished["context"] = contextvars.copy_context()
+
+            try:
+                return await asyncio.wait_for(call(), seconds)
+            except asyncio.TimeoutError:
+                return timed_out(cancelled=True)
+            finally:
+                if "context" in finished:
+                    adopt_context(finished["context"])
+    else:
+        @functools.wraps(func)
+        def limited(**args):
+            outcome = {}
+            context = contextvars.copy_context()
+
+            def target():
+                try:
+                    outcome["result"] = context.run(func, **args)
+                except BaseException as e:
+                    outcome["error"] = e
+
+            watchdog = threading.Thread(
+                target=target, name=f"swarm-tool-{name}", daemon=True)
+            watchdog.start()
+            watchdog.join(seconds)
+            if watchdog.is_alive():
+                return timed_out(cancelled=False)
+            adopt_context(context)
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome["result"]
+
+    return limited
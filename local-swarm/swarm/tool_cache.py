@@ -0,0 +1,184 @@
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+from .cache import CacheStats
+from .tools import __CTX_VARS_NAME__
+
+_MISSING = object()
+
+# whether the last cached-tool call in this thread / task was a hit
+_last_hit: contextvars.ContextVar = contextvars.ContextVar("swarm_tool_cache_hit", default=None)
+
+
+class ToolCache:
+    """
+    TTL + LRU cache of one agent function's results.
+
+    Keys are the call's arguments after binding them to the signature (so
+    `f(1)`, `f(x=1)` and `f(1, y=default)` share an entry), serialized
+    canonically. `context_variables` is left out of the key unless
+    `context_keys` names the variables the result depends on. Results are
+    stored as returned; exceptions are never cached.
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        ttl: Optional[float] = None,
+        max_entries: int = 256,
+        context_keys: Optional[Sequence[str]] = None,
+    ):
+        self.func = func
+        self.name = func.__name__
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.context_keys = tuple(context_keys) if context_keys is not None else None
+        self.stats = CacheStats()
+        self._signature = inspect.signature(func)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, args: tuple, kwargs: dict) -> str:
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        context_variables = arguments.pop(__CTX_VARS_NAME__, None)
+        if self.context_keys is not None:
+            context_variables = context_variables or {}
+            arguments[__CTX_VARS_NAME__] = {
+                name: context_variables.get(name) for name in self.context_keys
+            }
+        return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=repr)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if self.ttl is None or time.monotonic() - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            return _MISSING
+
+    def contains(self, args: dict) -> bool:
+        """Whether a call with keyword `args` would be served from the cache."""
+        key = self.key((), args)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                self.ttl is None or time.monotonic() - entry[1] <= self.ttl)
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def last_call_hit(func: Callable) -> Optional[bool]:
+    """
+    For a `cached_tool`, whether its last call in the current thread or task
+    was served from the cache; None for other functions.
+    """
+    if getattr(func, "tool_cache", None) is None:
+        return None
+    return _last_hit.get()
+
+
+def forget_last_hit() -> None:
+    """Clears `last_call_hit`, so a call that never reports one reads None."""
+    _last_hit.set(None)
+
+
+class ToolCacheRegistry:
+    """
+    All tool caches of a process, for stats and invalidation. Functions are
+    only ever cached when passed to `cached_tool` (or `wrap`) explicitly;
+    never cache functions with side effects (transfers, emails, writes).
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, ToolCache] = {}
+
+    def wrap(
+        self,
+        func: Callable,
+        ttl: Optional[float] = None,
+        max_entries: int = 256,
+        context_keys: Optional[Sequence[str]] = None,
+    ) -> Callable:
+        cache = ToolCache(func, ttl, max_entries, context_keys)
+        self.caches[f"{func.__module__}.{func.__qualname__}"] = cache
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def cached(*args, **kwargs):
+                key = cache.key(args, kwargs)
+                value = cache.get(key)
+                _last_hit.set(value is not _MISSING)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    cache.put(key, value)
+                return value
+        else:
+            @functools.wraps(func)
+            def cached(*args, **kwargs):
+                key = cache.key(args, kwargs)
+                value = cache.get(key)
+                _last_hit.set(value is not _MISSING)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    cache.put(key, value)
+                return value
+
+        cached.tool_cache = cache
+        return cached
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: cache.stats.as_dict() for name, cache in self.caches.items()}
+
+    def clear(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+
+
+tool_caches = ToolCacheRegistry()
+
+
+def cached_tool(
+    func: Callable = None,
+    *,
+    ttl: Optional[float] = None,
+    max_entries: int = 256,
+    context_keys: Optional[Sequence[str]] = None,
+):
+    """
+    Caches the results of an idempotent, read-only agent function:
+
+        @cached_tool(ttl=300)
+        def get_weather(location): ...
+
+    Usable bare (`@cached_tool`) or with options. The wrapped function keeps
+    its name, signature and docstring, so its tool schema is unchanged.
+    """
+    if func is None:
+        return functools.partial(
+            tool_caches.wrap, ttl=ttl, max_entries=max_entries, context_keys=context_keys)
+    return tool_caches.wrap(func, ttl, max_entries, context_keys)
@@ -0,0 +1,67 @@
+import inspect
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Sequence, Tuple
+
+from .util import function_to_json
+
+__CTX_VARS_NAME__ = "context_variables"
+
+
+class CompiledTools:
+    """
+    Ready-to-use form of an agent's function list.
+
+    Attributes:
+        functions (tuple): The functions this was compiled from.
+        tools (list): Tool schemas to send to the model, sorted by name,
+            with `context_variables` hidden. Shared between requests; do not
+            mutate.
+        function_map (dict): Tool name -> callable.
+        takes_context (frozenset): Names of the functions that accept
+            `context_variables`.
+    """
+
+    __slots__ = ("functions", "tools", "function_map", "takes_context")
+
+    def __init__(self, functions: Tuple[Callable, ...]):
+        self.functions = functions
+        self.tools: List[dict] = []
+        self.function_map: Dict[str, Callable] = {}
+        takes_context = set()
+
+        for func in functions:
+            tool = function_to_json(func)
+            # hide context_variables from model
+            params = tool["function"]["parameters"]
+            params["properties"].pop(__CTX_VARS_NAME__, None)
+            if __CTX_VARS_NAME__ in params["required"]:
+                params["required"].remove(__CTX_VARS_NAME__)
+            self.tools.append(tool)
+
+            self.function_map[func.__name__] = func
+            # the signature (not __code__) also sees through decorators like cached_tool
+            if __CTX_VARS_NAME__ in inspect.signature(func).parameters:
+                takes_context.add(func.__name__)
+
+        self.takes_context: FrozenSet[str] = frozenset(takes_context)
+        # a stable order keeps the request prefix cacheable however the
+        # functions were listed
+        self.tools.sort(key=lambda tool: tool["function"]["name"])
+
+
+@lru_cache(maxsize=1024)
+def _compile(functions: Tuple[Callable, ...]) -> CompiledTools:
+    return CompiledTools(functions)
+
+
+def compile_tools(functions: Sequence[Callable]) -> CompiledTools:
+    """
+    Returns the compiled form of `functions`, memoized on the exact set of
+    function objects. Changing `Agent.functions` (reassigning, appending,
+    reordering) yields a new key, so stale schemas are never reused.
+    """
+    key = tuple(functions)
+    try:
+        return _compile(key)
+    except TypeError:  # unhashable callable objects
+        return CompiledTools(key)
@@ -0,0 +1,255 @@
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+import warnings
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .tool_cache import forget_last_hit, last_call_hit
+
+# span kinds
+LLM = "llm"
+TOOL = "tool"
+HANDOFF = "handoff"
+RUN = "run"
+
+
+class Span:
+    """
+    One timed event of a run.
+
+    Attributes:
+        kind (str): `llm`, `tool`, `handoff` or `run`.
+        name (str): The model, tool name, handoff target or starting agent.
+        agent (str): The agent the event belongs to.
+        start (float): Wall-clock start time (`time.time()`).
+        duration (float): Seconds.
+        attributes (dict): Kind-specific details, e.g. `ttft`, `build_time`,
+            token counts and `tokens_per_second` for LLM calls, `error` for
+            tools, `turns` / `handoffs` for runs.
+    """
+
+    __slots__ = ("kind", "name", "agent", "start", "duration", "attributes")
+
+    def __init__(self, kind, name, agent, start, duration, attributes):
+        self.kind = kind
+        self.name = name
+        self.agent = agent
+        self.start = start
+        self.duration = duration
+        self.attributes = attributes
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "agent": self.agent,
+            "start": self.start,
+            "duration": self.duration,
+            **self.attributes,
+        }
+
+    def __repr__(self):
+        return f"Span({self.kind}, {self.name!r}, agent={self.agent!r}, duration={self.duration:.4f})"
+
+
+SpanHandler = Callable[[Span], None]
+
+
+class Hooks:
+    """
+    The span handlers registered on a client. Emitting is skipped entirely
+    (`if client.hooks:`) when no handler is registered, so an uninstrumented
+    run only pays for a few `perf_counter` calls per model call.
+
+    A handler that raises is reported with a warning and does not affect the run.
+    """
+
+    def __init__(self, handlers: Optional[Iterable[SpanHandler]] = None):
+        self.handlers: List[SpanHandler] = list(handlers or ())
+
+    def __bool__(self) -> bool:
+        return bool(self.handlers)
+
+    def add(self, handler: SpanHandler) -> SpanHandler:
+        self.handlers.append(handler)
+        return handler
+
+    def remove(self, handler: SpanHandler) -> None:
+        self.handlers.remove(handler)
+
+    def emit(self, kind: str, name: str, agent: str, duration: float, **attributes) -> None:
+        span = Span(kind, name, agent, time.time() - duration, duration, attributes)
+        for handler in self.handlers:
+            try:
+                handler(span)
+            except Exception as e:
+                warnings.warn(f"Span handler {handler!r} failed: {e!r}")
+
+    def wrap_tool(self, func: Callable, name: str, agent: str) -> Callable:
+        """Returns `func` wrapped to emit a `tool` span per call."""
+        emit = self.emit
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed(**args):
+                forget_last_hit()
+                start = time.perf_counter()
+                error = None
+                try:
+                    return await func(**args)
+                except Exception as e:
+                    error = repr(e)
+                    raise
+                finally:
+                    emit(TOOL, name, agent, time.perf_counter() - start,
+                         error=error, cached=last_call_hit(func))
+        else:
+            @functools.wraps(func)
+            def timed(**args):
+                forget_last_hit()
+                start = time.perf_counter()
+                error = None
+                try:
+                    return func(**args)
+                except Exception as e:
+                    error = repr(e)
+                    raise
+                finally:
+                    emit(TOOL, name, agent, time.perf_counter() - start,
+                         error=error, cached=last_call_hit(func))
+        return timed
+
+
+def llm_attributes(
+    usage: Optional[dict],
+    build_time: float,
+    duration: float,
+    ttft: Optional[float] = None,
+    chunks: int = 0,
+    cached: bool = False,
+) -> dict:
+    """
+    Attributes of an `llm` span. Without a usage report, streamed chunks
+    stand in for completion tokens. Tokens per second are measured from the
+    first token for streams, over the whole call otherwise.
+    """
+    usage = usage or {}
+    completion_tokens = usage.get("completion_tokens") or chunks
+    generating = duration - ttft if ttft is not None else duration
+    return {
+        "build_time": build_time,
+        "ttft": ttft,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": completion_tokens,
+        "cached_prompt_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+        "tokens_per_second": completion_tokens / generating if generating > 0 else None,
+        "cached": cached,
+    }
+
+
+class JSONLExporter:
+    """Span handler appending one JSON object per span to the file at `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.as_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencySummary:
+    """
+    Span handler aggregating durations into p50 / p95 / p99 per agent (model
+    calls, time to first token, whole runs) and per tool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Dict[str, List[float]]] = defaultdict(
+            lambda: defaultdict(list))
+        self.handoffs = 0
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            if span.kind == HANDOFF:
+                self.handoffs += 1
+            elif span.kind == TOOL:
+                self._samples["tool"][span.name].append(span.duration)
+            else:
+                self._samples[span.kind][span.agent].append(span.duration)
+                ttft = span.attributes.get("ttft")
+                if ttft is not None:
+                    self._samples["ttft"][span.agent].append(ttft)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "LatencySummary":
+        summary = cls()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                attributes = {
+                    key: value for key, value in record.items()
+                    if key not in Span.__slots__
+                }
+                summary(Span(record["kind"], record["name"], record["agent"],
+                             record["start"], record["duration"], attributes))
+        return summary
+
+    def summary(self) -> dict:
+        """`{group: {key: {count, mean, p50, p95, p99}}}`, in seconds."""
+        result = {}
+        with self._lock:
+            for group, by_key in self._samples.items():
+                result[group] = {}
+                for key, values in by_key.items():
+                    values = sorted(values)
+                    result[group][key] = {
+                        "count": len(values),
+                        "mean": sum(values) / len(values),
+                        "p50": percentile(values, 50),
+                        "p95": percentile(values, 95),
+                        "p99": percentile(values, 99),
+                    }
+            result["handoffs"] = self.handoffs
+        return result
+
+    def __str__(self):
+        lines = []
+        for group, by_key in self.summary().items():
+            if group == "handoffs":
+                lines.append(f"handoffs: {by_key}")
+                continue
+            for key, stats in by_key.items():
+                lines.append(
+                    f"{group:>5} {key}: n={stats['count']} "
+                    f"p50={stats['p50'] * 1000:.1f}ms p95={stats['p95'] * 1000:.1f}ms "
+                    f"p99={stats['p99'] * 1000:.1f}ms"
+                )
+        return "\n".join(lines)
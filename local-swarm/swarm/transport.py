@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+from pydantic import BaseModel
+
+
+class TransportConfig(BaseModel):
+    """
+    Connection-pool and timeout settings for the HTTP clients used to reach
+    chat completion endpoints.
+
+    Attributes:
+        max_connections (int): Upper bound on open connections in the pool.
+        max_keepalive_connections (int): Idle connections kept open for reuse.
+        keepalive_expiry (float): Seconds an idle connection is kept alive.
+        http2 (bool): Multiplex requests over HTTP/2 (requires `h2`).
+        connect_timeout (float): Seconds to establish a connection.
+        read_timeout (float): Seconds to wait for each chunk of the response.
+        write_timeout (float): Seconds to send each chunk of the request.
+        pool_timeout (float): Seconds to wait for a free connection.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def client_kwargs(self) -> dict:
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "http2=True requires the 'h2' package: pip install 'httpx[http2]'"
+                )
+        return dict(limits=self.limits(), timeout=self.timeout(), http2=self.http2)
+
+
+class Transport:
+    """
+    A pooled set of HTTP clients shared by every `Swarm`, `AsyncSwarm` and
+    `Agent` that uses it, so connections (and TLS sessions) are reused across
+    conversations instead of being opened per instance.
+
+    The sync client is created once and is safe to use from many threads.
+    `httpx.AsyncClient` connections are bound to the event loop that opened
+    them, so one async client is kept per running loop.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None, **kwargs):
+        self.config = config or TransportConfig(**kwargs)
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self.config.client_kwargs())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self.config.client_kwargs())
+            self._async_clients[loop] = client
+        return client
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_default_transport: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """
+    Returns the process-wide transport used when no client or transport is
+    given explicitly.
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
+
+
+def configure_transport(config: Optional[TransportConfig] = None, **kwargs) -> Transport:
+    """
+    Replaces the process-wide transport, e.g.
+    `configure_transport(max_connections=500, http2=True)`. Clients created
+    from the previous transport keep working until it is closed.
+    """
+    global _default_transport
+    with _default_lock:
+        _default_transport = Transport(config, **kwargs)
+    return _default_transport
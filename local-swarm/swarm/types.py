@@ -1,25 +1,63 @@
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat.chat_completion_message_tool_call import (
-    ChatCompletionMessageToolCall,
-    Function,
-)
-from typing import List, Callable, Union, Optional
+import os
+from typing import List, Callable, Literal, Union, Optional
 
 # Third-party imports
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 AgentFunction = Callable[[], Union[str, "Agent", dict]]
 
+DEFAULT_BASE_URL = "https://openai.a1d.ai/v1"
+
+
+def default_base_url() -> str:
+    # opt-in only: the generic OPENAI_* variables must not move existing agents
+    return os.environ.get("SWARM_BASE_URL") or DEFAULT_BASE_URL
+
+
+class Function(BaseModel):
+    """The function a model asked to call, with its JSON-encoded arguments."""
+
+    name: str
+    arguments: str
+
+
+class ChatCompletionMessageToolCall(BaseModel):
+    """
+    A tool call of an assistant message. Has the same fields as the `openai`
+    type of that name, so the runtime does not need the `openai` package.
+    """
+
+    id: str
+    type: Literal["function"] = "function"
+    function: Function
+
+
+def __getattr__(name: str):
+    # kept importable for old code, without importing `openai` up front
+    if name == "ChatCompletionMessage":
+        from openai.types.chat import ChatCompletionMessage
+
+        return ChatCompletionMessage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class Agent(BaseModel):
     name: str = "Agent"
     model: str = "gpt-4o-mini"
     instructions: Union[str, Callable[[], str]] = "You are a helpful agent."
+    dynamic_instructions: Union[str, Callable[[dict], str], None] = None
     functions: List[AgentFunction] = []
     tool_choice: str = None
     parallel_tool_calls: bool = True
     api_key: str = ""
-    base_url: str = "https://openai.a1d.ai/v1"
+    # SWARM_BASE_URL redirects agents without a base_url, e.g. to a local stub server
+    base_url: str = Field(default_factory=default_base_url)
+    max_context_tokens: Optional[int] = None
+    # seconds each function call may take; see `swarm.timeouts.tool_timeout`
+    tool_timeout: Optional[float] = None
+    # ask streams for a final usage chunk (`stream_options`); not every
+    # OpenAI-compatible backend accepts the field
+    stream_usage: bool = False
 
 
 class Response(BaseModel):
@@ -41,3 +79,24 @@ class Result(BaseModel):
     value: str = ""
     agent: Optional[Agent] = None
     context_variables: dict = {}
+
+
+class BatchResult(BaseModel):
+    """
+    The outcome of one conversation in a `Swarm.run_many` batch.
+
+    Attributes:
+        index (int): Position of the conversation in the input.
+        response (Response): The run's response, unless it failed.
+        error (Exception): The exception raised by the run, if any.
+        turns (int): Number of assistant messages produced.
+        elapsed (float): Wall-clock seconds spent on the run.
+    """
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    index: int
+    response: Optional[Response] = None
+    error: Optional[Exception] = None
+    turns: int = 0
+    elapsed: float = 0.0
@@ -0,0 +1,52 @@
+import threading
+from typing import Optional
+
+
+def cached_prompt_tokens(usage: dict) -> int:
+    """
+    Prompt tokens the provider served from its prefix cache, as reported in
+    `usage.prompt_tokens_details.cached_tokens` (OpenAI) or
+    `usage.prompt_cache_hit_tokens` (DeepSeek-style APIs).
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0
+
+
+class UsageStats:
+    """
+    Token usage reported by the upstream, summed over every completion a
+    client received (cache hits of a `CompletionCache` are not counted).
+    `prompt_cache_rate` is the share of prompt tokens that hit the
+    provider's prefix cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completions = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, usage: Optional[dict]) -> None:
+        if not usage:
+            return
+        with self._lock:
+            self.completions += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.cached_prompt_tokens += cached_prompt_tokens(usage)
+            self.completion_tokens += usage.get("completion_tokens") or 0
+
+    @property
+    def prompt_cache_rate(self) -> float:
+        if not self.prompt_tokens:
+            return 0.0
+        return self.cached_prompt_tokens / self.prompt_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "completions": self.completions,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "prompt_cache_rate": self.prompt_cache_rate,
+        }
@@ -22,10 +22,76 @@ def merge_chunk(final_response: dict, delta: dict) -> None:
     delta.pop("role", None)
     merge_fields(final_response, delta)
 
-    tool_calls = delta.get("tool_calls")
-    if tool_calls and len(tool_calls) > 0:
-        index = tool_calls[0].pop("index")
-        merge_fields(final_response["tool_calls"][index], tool_calls[0])
+    for tool_call in delta.get("tool_calls") or []:
+        index = tool_call.pop("index")
+        merge_fields(final_response["tool_calls"][index], tool_call)
+
+
+class StreamAccumulator:
+    """
+    Builds the final assistant message of a streamed completion.
+
+    Fragments are collected into per-field lists and joined once in
+    `message()`, so accumulating a response is linear in its size (repeated
+    `str +=` copies the whole prefix on every delta). Any number of tool
+    calls, at any indices, may appear in a single delta.
+    """
+
+    _SKIPPED = frozenset({"role", "sender", "tool_calls", "function_call"})
+
+    def __init__(self, sender: str):
+        self.sender = sender
+        self.fields = {"content": []}
+        self.tool_calls = {}
+
+    def add(self, delta: dict) -> None:
+        for key, value in delta.items():
+            if isinstance(value, str) and key not in self._SKIPPED:
+                parts = self.fields.get(key)
+                if parts is None:
+                    parts = self.fields[key] = []
+                parts.append(value)
+
+        for tool_call in delta.get("tool_calls") or ():
+            index = tool_call.get("index", 0)
+            parts = self.tool_calls.get(index)
+            if parts is None:
+                parts = self.tool_calls[index] = {
+                    "id": [], "type": [], "name": [], "arguments": []
+                }
+            if tool_call.get("id"):
+                parts["id"].append(tool_call["id"])
+            if tool_call.get("type"):
+                parts["type"].append(tool_call["type"])
+            function = tool_call.get("function")
+            if function:
+                if function.get("name"):
+                    parts["name"].append(function["name"])
+                if function.get("arguments"):
+                    parts["arguments"].append(function["arguments"])
+
+    def tool_call(self, index: int) -> dict:
+        parts = self.tool_calls[index]
+        return {
+            "function": {
+                "arguments": "".join(parts["arguments"]),
+                "name": "".join(parts["name"]),
+            },
+            "id": "".join(parts["id"]),
+            "type": "".join(parts["type"]),
+        }
+
+    def message(self) -> dict:
+        message = {key: "".join(parts) for key, parts in self.fields.items()}
+        message.update(
+            {
+                "sender": self.sender,
+                "role": "assistant",
+                "function_call": None,
+                "tool_calls": [self.tool_call(i) for i in sorted(self.tool_calls)] or None,
+            }
+        )
+        return message
 
 
 def function_to_json(func) -> dict:
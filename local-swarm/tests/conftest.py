@@ -0,0 +1,43 @@
+"""
+Helpers shared by the tests. Scripted upstreams are `StubServer`s;
+`scripted_transport` stands in for one where a test needs what a real
+server cannot do on cue, such as raising a transport error.
+"""
+import json
+
+import httpx
+
+from swarm.stub_server import StubReply, completion_payload
+
+
+def call(name, id="call_1", **arguments) -> dict:
+    """A scripted reply calling one tool."""
+    return {"tool_calls": [{"name": name, "arguments": arguments, "id": id}]}
+
+
+def calls(*names) -> dict:
+    """A scripted reply calling several tools at once, without arguments."""
+    return {"tool_calls": [{"name": name, "arguments": {}, "id": f"call_{i}"}
+                           for i, name in enumerate(names)]}
+
+
+def scripted_transport(replies, requests: list = None) -> httpx.MockTransport:
+    """
+    An in-process transport for `httpx.Client` or `httpx.AsyncClient` that
+    answers each non-streamed request with the next of `replies`: anything
+    a `StubServer` script accepts, an `httpx.Response`, or an exception to
+    raise. Request bodies are appended to `requests`, if given.
+    """
+    replies = iter(replies)
+
+    def handler(request: httpx.Request):
+        if requests is not None:
+            requests.append(json.loads(request.content))
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        if isinstance(reply, httpx.Response):
+            return reply
+        return httpx.Response(200, json=completion_payload(StubReply.coerce(reply)))
+
+    return httpx.MockTransport(handler)
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+
+from swarm import AsyncSwarm, Agent
+from swarm.stub_server import StubServer
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+def test_arun_with_simple_message():
+    with StubServer(script=[DEFAULT_RESPONSE_CONTENT]) as server:
+        client = AsyncSwarm(client=httpx.AsyncClient())
+        messages = [{"role": "user", "content": "Hello, how are you?"}]
+        response = asyncio.run(client.arun(agent=Agent(base_url=server.base_url), messages=messages))
+
+    assert response.messages[-1]["role"] == "assistant"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert response.messages[-1]["sender"] == "Agent"
+
+
+def test_async_and_sync_functions_with_handoff():
+    calls = []
+
+    async def get_weather(location, context_variables):
+        calls.append(("weather", location, context_variables["user"]))
+        return "It's sunny today."
+
+    def transfer_to_agent2():
+        calls.append(("transfer",))
+        return agent2
+
+    script = [
+        {"tool_calls": [
+            {"name": "get_weather", "arguments": {"location": "San Francisco"}},
+            {"name": "transfer_to_agent2", "arguments": {}},
+        ]},
+        DEFAULT_RESPONSE_CONTENT,
+    ]
+    with StubServer(script=script) as server:
+        agent1 = Agent(name="Test Agent 1", base_url=server.base_url,
+                       functions=[get_weather, transfer_to_agent2])
+        agent2 = Agent(name="Test Agent 2", base_url=server.base_url)
+        client = AsyncSwarm(client=httpx.AsyncClient())
+        response = asyncio.run(
+            client.arun(
+                agent=agent1,
+                messages=[{"role": "user", "content": "hi"}],
+                context_variables={"user": "alice"},
+            )
+        )
+        requests = server.received
+
+    assert calls == [("weather", "San Francisco", "alice"), ("transfer",)]
+    assert response.agent == agent2
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "tool", "assistant"]
+    assert response.messages[-1]["sender"] == "Test Agent 2"
+    # context_variables is never exposed to the model
+    weather_schema = requests[0]["tools"][0]["function"]["parameters"]
+    assert "context_variables" not in weather_schema["properties"]
+
+
+def test_arun_and_stream():
+    with StubServer(script=["Hello world"]) as server:
+        client = AsyncSwarm(client=httpx.AsyncClient())
+
+        async def collect():
+            # deltas are merged in place once consumed, so snapshot them
+            return [
+                dict(chunk)
+                async for chunk in client.arun_and_stream(
+                    agent=Agent(base_url=server.base_url),
+                    messages=[{"role": "user", "content": "hi"}],
+                )
+            ]
+
+        events = asyncio.run(collect())
+
+    assert events[0] == {"delim": "start"}
+    assert events[1]["sender"] == "Agent"
+    assert events[-2] == {"delim": "end"}
+    response = events[-1]["response"]
+    assert response.messages[-1]["content"] == "Hello world"
+
+
+def test_concurrent_conversations_share_one_loop():
+    with StubServer(script=[DEFAULT_RESPONSE_CONTENT], cycle=True, ttft=0.05) as server:
+        client = AsyncSwarm(client=httpx.AsyncClient())
+        agent = Agent(base_url=server.base_url)
+
+        async def run_all():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            responses = await asyncio.gather(
+                *(
+                    client.arun(agent=agent, messages=[{"role": "user", "content": str(i)}])
+                    for i in range(100)
+                )
+            )
+            return responses, loop.time() - start
+
+        responses, elapsed = asyncio.run(run_all())
+
+    assert len(responses) == 100
+    assert elapsed < 2.5
+
+
+def test_parallel_tool_execution():
+    async def slow_async(delay):
+        await asyncio.sleep(float(delay))
+        return delay
+
+    def slow(delay):
+        import time
+
+        time.sleep(float(delay))
+        return delay
+
+    from swarm.core import to_tool_calls
+
+    tool_calls = to_tool_calls(
+        [
+            {"id": "a", "type": "function",
+             "function": {"name": "slow_async", "arguments": '{"delay": "0.2"}'}},
+            {"id": "b", "type": "function",
+             "function": {"name": "slow", "arguments": '{"delay": "0.1"}'}},
+        ]
+    )
+    client = AsyncSwarm(client=httpx.AsyncClient(), parallel_tool_execution=True)
+
+    async def handle():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        response = await client.handle_tool_calls(tool_calls, [slow, slow_async], {}, False)
+        return response, loop.time() - start
+
+    response, elapsed = asyncio.run(handle())
+    assert elapsed < 0.3
+    assert [m["content"] for m in response.messages] == ["0.2", "0.1"]
@@ -0,0 +1,50 @@
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, Agent
+from swarm.stub_server import StubReply, StubServer
+
+
+def echo(body):
+    content = body["messages"][-1]["content"]
+    if content == "boom":
+        return StubReply(status=400)
+    return f"echo: {content}"
+
+
+def test_run_many_keeps_index_and_isolates_errors():
+    conversations = [[{"role": "user", "content": c}] for c in ["a", "boom", "c"]]
+    with StubServer(responder=echo) as server:
+        client = Swarm(client=httpx.Client())
+        batch = client.run_many(Agent(base_url=server.base_url), conversations, max_concurrency=2)
+        results = sorted(batch, key=lambda r: r.index)
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].response.messages[-1]["content"] == "echo: a"
+    assert results[2].response.messages[-1]["content"] == "echo: c"
+    assert results[1].response is None
+    assert "400" in str(results[1].error)
+    assert batch.stats.conversations == 3
+    assert batch.stats.errors == 1
+    assert batch.stats.turns == 2
+
+
+def test_run_many_bounds_concurrency():
+    conversations = ([{"role": "user", "content": str(i)}] for i in range(20))
+    with StubServer(responder=echo, ttft=0.05) as server:
+        client = Swarm(client=httpx.Client())
+        start = time.perf_counter()
+        batch = client.run_many(Agent(base_url=server.base_url), conversations, max_concurrency=10)
+        results = list(batch)
+        elapsed = time.perf_counter() - start
+
+    assert len(results) == 20
+    assert 0.1 <= elapsed < 0.5
+    assert batch.stats.conversations_per_second > 0
+
+
+def test_run_many_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        Swarm().run_many(Agent(), [], max_concurrency=0)
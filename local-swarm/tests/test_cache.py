@@ -0,0 +1,69 @@
+import time
+
+import httpx
+
+from swarm import Swarm, Agent
+from swarm.cache import CompletionCache, request_key
+from swarm.stub_server import StubServer
+
+
+def test_request_key_is_canonical():
+    a = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.7}
+    b = {"temperature": 0.7, "messages": [{"content": "hi", "role": "user"}], "model": "m"}
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key({**a, "temperature": 0.2})
+
+
+def test_run_hits_cache_for_identical_requests():
+    cache = CompletionCache()
+    messages = [{"role": "user", "content": "hi"}]
+    with StubServer(script=["cached"], cycle=True) as server:
+        client = Swarm(client=httpx.Client(), cache=cache)
+        agent = Agent(base_url=server.base_url)
+        first = client.run(agent, messages)
+        second = client.run(agent, messages)
+        client.run(agent, [{"role": "user", "content": "something else"}])
+        requests = server.stats["requests"]
+
+    assert requests == 2
+    assert first.messages == second.messages
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_stream_replays_cached_deltas():
+    messages = [{"role": "user", "content": "hi"}]
+    with StubServer(script=["Hello there"], cycle=True) as server:
+        client = Swarm(client=httpx.Client(), cache=CompletionCache())
+        agent = Agent(base_url=server.base_url)
+
+        def collect():
+            return [dict(e) for e in client.run(agent, messages, stream=True)]
+
+        live, replayed = collect(), collect()
+        requests = server.stats["requests"]
+
+    assert requests == 1
+    assert [e for e in live if "response" not in e] == [
+        e for e in replayed if "response" not in e
+    ]
+    assert replayed[-1]["response"].messages[-1]["content"] == "Hello there"
+
+
+def test_lru_ttl_and_disk_tier(tmp_path):
+    path = str(tmp_path / "completions.sqlite")
+    cache = CompletionCache(max_entries=2, path=path)
+    for key in "abc":
+        cache.put(key, {"value": key})
+    assert cache.stats.evictions == 1  # "a" fell out of memory...
+    assert cache.get("a") == {"value": "a"}  # ...but is still on disk
+    assert cache.stats.disk_hits == 1
+    cache.close()
+
+    reopened = CompletionCache(path=path, ttl=60)
+    assert reopened.get("c") == {"value": "c"}
+
+    expiring = CompletionCache(ttl=0.01)
+    expiring.put("k", [1])
+    time.sleep(0.02)
+    assert expiring.get("k") is None
+    assert expiring.stats.expirations == 1
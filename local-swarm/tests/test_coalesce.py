@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.coalesce import Coalescer, LeaderAbandoned
+from swarm.stub_server import StubServer
+
+OPENER = [{"role": "user", "content": "What should I invest in?"}]
+
+
+def run_concurrently(n, func):
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(n) as pool:
+        return list(pool.map(call, range(n)))
+
+
+def test_identical_requests_share_one_upstream_call():
+    coalescer = Coalescer()
+    with StubServer(script=["Diversify."], cycle=True, ttft=0.3) as server:
+        client = Swarm(client=httpx.Client(), coalescer=coalescer)
+        agent = Agent(base_url=server.base_url)
+        responses = run_concurrently(5, lambda: client.run(agent, OPENER))
+        requests = server.stats["requests"]
+
+    assert requests == 1
+    assert [r.messages[-1]["content"] for r in responses] == ["Diversify."] * 5
+    # every caller gets its own copy
+    assert len({id(r.messages[-1]) for r in responses}) == 5
+    assert coalescer.stats.as_dict()["coalesced"] == 4
+
+
+def test_identical_streams_share_one_upstream_call():
+    coalescer = Coalescer()
+    with StubServer(script=["Index funds are a good start."], cycle=True,
+                    ttft=0.2, token_delay=0.02) as server:
+        client = Swarm(client=httpx.Client(), coalescer=coalescer)
+        agent = Agent(base_url=server.base_url)
+        runs = run_concurrently(3, lambda: list(client.run(agent, OPENER, stream=True)))
+        requests = server.stats["requests"]
+
+    assert requests == 1
+    contents = ["".join(c.get("content") or "" for c in chunks if "content" in c)
+                for chunks in runs]
+    assert contents == ["Index funds are a good start."] * 3
+    assert all(chunks[-1]["response"].messages[-1]["sender"] == "Agent" for chunks in runs)
+    assert coalescer.stats.coalesced == 2
+
+
+def test_finished_requests_are_not_reused():
+    coalescer = Coalescer()
+    with StubServer(script=["a", "b"]) as server:
+        client = Swarm(client=httpx.Client(), coalescer=coalescer)
+        agent = Agent(base_url=server.base_url)
+        first = client.run(agent, OPENER)
+        second = client.run(agent, OPENER)
+    assert (first.messages[-1]["content"], second.messages[-1]["content"]) == ("a", "b")
+    assert coalescer.stats.coalesced == 0
+
+
+def test_async_requests_are_coalesced():
+    coalescer = Coalescer()
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient(), coalescer=coalescer)
+        agent = Agent(base_url=base_url)
+
+        async def stream():
+            return [chunk async for chunk in client.arun_and_stream(agent, OPENER)]
+
+        plain = await asyncio.gather(*(client.arun(agent, OPENER) for _ in range(3)))
+        streamed = await asyncio.gather(*(stream() for _ in range(3)))
+        return plain, streamed
+
+    with StubServer(script=["Bonds."], cycle=True, ttft=0.2) as server:
+        plain, streamed = asyncio.run(main(server.base_url))
+        requests = server.stats["requests"]
+
+    assert [r.messages[-1]["content"] for r in plain] == ["Bonds."] * 3
+    assert [chunks[-1]["response"].messages[-1]["content"] for chunks in streamed] == ["Bonds."] * 3
+    assert requests == 2
+    assert coalescer.stats.coalesced == 4
+
+
+def test_leader_errors_reach_followers():
+    coalescer = Coalescer()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def follower():
+        return coalescer.call("key", lambda: pytest.fail("follower must not fetch"))
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(coalescer.call, "key", fetch)
+        while coalescer.stats.requests < 1:
+            time.sleep(0.001)
+        joined = pool.submit(follower)
+        while coalescer.stats.coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        with pytest.raises(RuntimeError, match="upstream down"):
+            leader.result()
+        with pytest.raises(RuntimeError, match="upstream down"):
+            joined.result()
+
+
+def test_abandoned_stream_fails_followers():
+    coalescer = Coalescer()
+    flight, leading = coalescer.join("key")
+    follower, following = coalescer.join("key")
+    assert leading and not following and follower is flight
+
+    flight.publish({"content": "Hel"})
+    coalescer.finish("key", flight, error=GeneratorExit())
+    deltas = flight.subscribe()
+    assert next(deltas) == {"content": "Hel"}
+    with pytest.raises(LeaderAbandoned):
+        next(deltas)
+
+
+def content_of(chunks):
+    return "".join(c.get("content") or "" for c in chunks if "content" in c)
+
+
+def test_slow_leader_does_not_hold_back_followers():
+    coalescer = Coalescer()
+    resume = threading.Event()
+    with StubServer(script=["Index funds are a good start."], cycle=True,
+                    ttft=0.3, token_delay=0.01) as server:
+        client = Swarm(client=httpx.Client(), coalescer=coalescer)
+        agent = Agent(base_url=server.base_url)
+
+        def slow_leader():
+            chunks = []
+            for chunk in client.run(agent, OPENER, stream=True):
+                chunks.append(chunk)
+                if chunk.get("content"):
+                    resume.wait(5)  # a consumer stuck after the first token
+            return chunks
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(slow_leader)
+            while coalescer.stats.requests < 1:
+                time.sleep(0.001)
+            follower = pool.submit(lambda: list(client.run(agent, OPENER, stream=True)))
+            followed = follower.result(timeout=3)
+            assert not leader.done()
+            resume.set()
+            led = leader.result()
+        requests = server.stats["requests"]
+
+    assert requests == 1
+    assert content_of(followed) == content_of(led) == "Index funds are a good start."
+
+
+def test_closed_leader_does_not_fail_followers():
+    coalescer = Coalescer()
+    with StubServer(script=["Index funds are a good start."], cycle=True,
+                    ttft=0.3, token_delay=0.01) as server:
+        client = Swarm(client=httpx.Client(), coalescer=coalescer)
+        agent = Agent(base_url=server.base_url)
+        leader = client.run(agent, OPENER, stream=True)
+        assert next(leader) == {"delim": "start"}
+        with ThreadPoolExecutor(1) as pool:
+            follower = pool.submit(lambda: list(client.run(agent, OPENER, stream=True)))
+            while coalescer.stats.coalesced < 1:
+                time.sleep(0.001)
+            leader.close()
+            followed = follower.result(timeout=5)
+        requests = server.stats["requests"]
+
+    assert requests == 1
+    assert content_of(followed) == "Index funds are a good start."
+
+
+def test_async_closed_or_cancelled_leader_does_not_fail_followers():
+    coalescer = Coalescer()
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient(), coalescer=coalescer)
+        agent = Agent(base_url=base_url)
+
+        leader = client.arun_and_stream(agent, OPENER)
+        assert await leader.__anext__() == {"delim": "start"}
+        follower = asyncio.create_task(
+            _collect(client.arun_and_stream(agent, OPENER)))
+        while coalescer.stats.coalesced < 1:
+            await asyncio.sleep(0.001)
+        await leader.aclose()
+        streamed = await follower
+
+        plain_leader = asyncio.create_task(client.arun(agent, OPENER))
+        while coalescer.stats.requests < 3:
+            await asyncio.sleep(0.001)
+        plain_follower = asyncio.create_task(client.arun(agent, OPENER))
+        while coalescer.stats.coalesced < 2:
+            await asyncio.sleep(0.001)
+        plain_leader.cancel()
+        plain = await plain_follower
+        return streamed, plain
+
+    with StubServer(script=["Bonds."], cycle=True, ttft=0.3) as server:
+        streamed, plain = asyncio.run(main(server.base_url))
+        requests = server.stats["requests"]
+
+    assert content_of(streamed) == "Bonds."
+    assert plain.messages[-1]["content"] == "Bonds."
+    assert requests == 2
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
@@ -0,0 +1,167 @@
+import json
+
+import httpx
+
+from swarm import Swarm, Agent
+from swarm.context import (
+    CollapseToolOutputs,
+    ContextManager,
+    DropOldestTurns,
+    SummarizePrefix,
+    TokenCounter,
+    group_turns,
+)
+from swarm.stub_server import StubServer
+
+
+def tool_turn(call_id, output):
+    call = {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": call_id, "type": "function",
+             "function": {"name": "lookup", "arguments": "{}"}}
+        ],
+    }
+    return [call, {"role": "tool", "tool_call_id": call_id, "content": output}]
+
+
+def make_conversation(turns=10, size=400):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "x" * size})
+        messages.extend(tool_turn(f"call_{i}", "y" * size))
+        messages.append({"role": "assistant", "content": f"answer {i}"})
+    return messages
+
+
+def assert_pairs_valid(messages):
+    open_calls = set()
+    for message in messages:
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in open_calls
+            open_calls.discard(message["tool_call_id"])
+        else:
+            assert not open_calls, "tool call left without its result"
+            open_calls = {c["id"] for c in message.get("tool_calls") or ()}
+    assert not open_calls
+
+
+def test_counter_caches_per_content():
+    counter = TokenCounter()
+    message = {"role": "user", "content": "hello world"}
+    first = counter.count(message)
+    message_copy = dict(message)
+    assert counter.count(message) == first
+    assert counter.count(message_copy) == first
+    assert len(counter._cache) == 1
+    assert counter.count({"role": "user", "content": "hello there, world"}) > first
+
+
+def test_counter_cache_keys_hold_no_message_text(monkeypatch):
+    counter = TokenCounter()
+    output = "x" * 1_000_000
+    call = {"role": "assistant", "content": None, "tool_calls": [
+        {"id": "call_1", "type": "function",
+         "function": {"name": "dump_abi", "arguments": "{}"}}]}
+    counter.count({"role": "tool", "content": output})
+    first = counter.count(call)
+    assert all(not isinstance(key, (str, tuple)) for key in counter._cache)
+
+    # hits do not serialize the tool calls again
+    dumps = []
+    monkeypatch.setattr(json, "dumps", lambda obj, **kwargs: dumps.append(obj) or "[]")
+    assert counter.count(call) == first
+    assert dumps == []
+    counter.count(dict(call, tool_calls=[dict(call["tool_calls"][0], id="call_2")]))
+    assert len(dumps) == 1  # a different call is a miss
+    assert len(counter._cache) == 3
+
+
+def test_counter_cache_stays_bounded_across_turns():
+    counter = TokenCounter(max_cached=8)
+    for turn in range(100):
+        # a fresh system dict per turn, as `build_request` makes
+        counter.count({"role": "system", "content": "You are a helpful agent."})
+        counter.count({"role": "user", "content": f"message {turn}"})
+    assert len(counter._cache) == 8
+
+
+def test_group_turns_keeps_tool_results_with_their_call():
+    messages = make_conversation(turns=2)
+    units = group_turns(messages)
+    assert [len(unit) for unit in units] == [1, 2, 1, 1, 2, 1]
+    # a tool result whose call is gone is dropped
+    assert group_turns(messages[2:]) == group_turns(messages)[2:]
+
+
+def test_drop_oldest_turns_fits_budget_and_keeps_pairs():
+    counter = TokenCounter()
+    messages = make_conversation()
+    trimmed = DropOldestTurns().trim(messages, 500, counter)
+
+    assert counter.count_all(trimmed) <= 500
+    assert trimmed == messages[-len(trimmed):]
+    assert_pairs_valid(trimmed)
+
+
+def test_collapse_tool_outputs_leaves_history_untouched():
+    counter = TokenCounter()
+    messages = make_conversation(turns=3, size=4000)
+    before = json.dumps(messages)
+    trimmed = CollapseToolOutputs(max_tokens=50, keep_last=2).trim(messages, 100, counter)
+
+    assert json.dumps(messages) == before
+    assert len(trimmed) == len(messages)
+    assert "[truncated" in trimmed[2]["content"]
+    assert trimmed[-2]["content"] == messages[-2]["content"]  # recent units kept
+    assert_pairs_valid(trimmed)
+
+
+def test_summarize_prefix_is_memoized():
+    calls = []
+
+    def summarizer(prefix):
+        calls.append(len(prefix))
+        return "earlier stuff"
+
+    counter = TokenCounter()
+    strategy = SummarizePrefix(summarizer, keep_last=2, summary_tokens=20)
+    messages = make_conversation(turns=4)
+
+    first = strategy.trim(messages, 400, counter)
+    second = strategy.trim(messages, 400, counter)
+
+    assert first[0]["role"] == "system"
+    assert "earlier stuff" in first[0]["content"]
+    assert first == second
+    assert len(calls) == 1
+    assert_pairs_valid(first[1:])
+
+
+def test_context_manager_uses_agent_budget():
+    manager = ContextManager(budget=100_000)
+    messages = make_conversation()
+
+    assert manager.fit(Agent(), messages) == messages
+    assert manager.trimmed_requests == 0
+
+    trimmed = manager.fit(Agent(max_context_tokens=600), messages, reserved_tokens=100)
+    assert manager.counter.count_all(trimmed) <= 500
+    assert manager.trimmed_requests == 1
+    assert manager.tokens_saved > 0
+    assert_pairs_valid(trimmed)
+
+
+def test_run_sends_trimmed_history_but_returns_full_messages():
+    client = Swarm(client=httpx.Client(), context_manager=ContextManager())
+    messages = make_conversation()
+    with StubServer(script=["ok"]) as server:
+        response = client.run(Agent(base_url=server.base_url, max_context_tokens=800), messages)
+        sent = server.received
+
+    sent_messages = sent[0]["messages"]
+    assert sent_messages[0]["role"] == "system"
+    assert len(sent_messages) < len(messages) + 1
+    assert_pairs_valid(sent_messages[1:])
+    assert response.messages[-1]["content"] == "ok"
@@ -1,6 +1,7 @@
 import pytest
+import httpx
 from swarm import Swarm, Agent
-from tests.mock_client import MockOpenAIClient, create_mock_response
+from swarm.stub_server import StubServer
 from unittest.mock import Mock
 import json
 
@@ -8,18 +9,19 @@ DEFAULT_RESPONSE_CONTENT = "sample response content"
 
 
 @pytest.fixture
-def mock_openai_client():
-    m = MockOpenAIClient()
-    m.set_response(
-        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
-    )
-    return m
+def stub_server():
+    with StubServer(responder=lambda body: DEFAULT_RESPONSE_CONTENT) as server:
+        yield server
+
+
+@pytest.fixture
+def client():
+    return Swarm(client=httpx.Client())
 
 
-def test_run_with_simple_message(mock_openai_client: MockOpenAIClient):
-    agent = Agent()
+def test_run_with_simple_message(stub_server: StubServer, client: Swarm):
+    agent = Agent(base_url=stub_server.base_url)
     # set up client and run
-    client = Swarm(client=mock_openai_client)
     messages = [{"role": "user", "content": "Hello, how are you?"}]
     response = client.run(agent=agent, messages=messages)
 
@@ -28,7 +30,7 @@ def test_run_with_simple_message(mock_openai_client: MockOpenAIClient):
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
 
 
-def test_tool_call(mock_openai_client: MockOpenAIClient):
+def test_tool_call(client: Swarm):
     expected_location = "San Francisco"
 
     # set up mock to record function calls
@@ -38,36 +40,32 @@ def test_tool_call(mock_openai_client: MockOpenAIClient):
         get_weather_mock(location=location)
         return "It's sunny today."
 
-    agent = Agent(name="Test Agent", functions=[get_weather])
     messages = [
         {"role": "user", "content": "What's the weather like in San Francisco?"}
     ]
 
-    # set mock to return a response that triggers function call
-    mock_openai_client.set_sequential_responses(
-        [
-            create_mock_response(
-                message={"role": "assistant", "content": ""},
-                function_calls=[
-                    {"name": "get_weather", "args": {"location": expected_location}}
-                ],
-            ),
-            create_mock_response(
-                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
-            ),
-        ]
-    )
+    # script a response that triggers a function call
+    script = [
+        {
+            "content": "",
+            "tool_calls": [
+                {"name": "get_weather", "arguments": {"location": expected_location}}
+            ],
+        },
+        DEFAULT_RESPONSE_CONTENT,
+    ]
 
     # set up client and run
-    client = Swarm(client=mock_openai_client)
-    response = client.run(agent=agent, messages=messages)
+    with StubServer(script=script) as server:
+        agent = Agent(name="Test Agent", functions=[get_weather], base_url=server.base_url)
+        response = client.run(agent=agent, messages=messages)
 
     get_weather_mock.assert_called_once_with(location=expected_location)
     assert response.messages[-1]["role"] == "assistant"
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
 
 
-def test_execute_tools_false(mock_openai_client: MockOpenAIClient):
+def test_execute_tools_false(client: Swarm):
     expected_location = "San Francisco"
 
     # set up mock to record function calls
@@ -77,29 +75,25 @@ def test_execute_tools_false(mock_openai_client: MockOpenAIClient):
         get_weather_mock(location=location)
         return "It's sunny today."
 
-    agent = Agent(name="Test Agent", functions=[get_weather])
     messages = [
         {"role": "user", "content": "What's the weather like in San Francisco?"}
     ]
 
-    # set mock to return a response that triggers function call
-    mock_openai_client.set_sequential_responses(
-        [
-            create_mock_response(
-                message={"role": "assistant", "content": ""},
-                function_calls=[
-                    {"name": "get_weather", "args": {"location": expected_location}}
-                ],
-            ),
-            create_mock_response(
-                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
-            ),
-        ]
-    )
+    # script a response that triggers a function call
+    script = [
+        {
+            "content": "",
+            "tool_calls": [
+                {"name": "get_weather", "arguments": {"location": expected_location}}
+            ],
+        },
+        DEFAULT_RESPONSE_CONTENT,
+    ]
 
     # set up client and run
-    client = Swarm(client=mock_openai_client)
-    response = client.run(agent=agent, messages=messages, execute_tools=False)
+    with StubServer(script=script) as server:
+        agent = Agent(name="Test Agent", functions=[get_weather], base_url=server.base_url)
+        response = client.run(agent=agent, messages=messages, execute_tools=False)
     print(response)
 
     # assert function not called
@@ -115,31 +109,127 @@ def test_execute_tools_false(mock_openai_client: MockOpenAIClient):
     }
 
 
-def test_handoff(mock_openai_client: MockOpenAIClient):
+def test_handoff(client: Swarm):
     def transfer_to_agent2():
         return agent2
 
-    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
-    agent2 = Agent(name="Test Agent 2")
-
-    # set mock to return a response that triggers the handoff
-    mock_openai_client.set_sequential_responses(
-        [
-            create_mock_response(
-                message={"role": "assistant", "content": ""},
-                function_calls=[{"name": "transfer_to_agent2"}],
-            ),
-            create_mock_response(
-                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
-            ),
-        ]
-    )
+    # script a response that triggers the handoff
+    script = [
+        {"content": "", "tool_calls": [{"name": "transfer_to_agent2"}]},
+        DEFAULT_RESPONSE_CONTENT,
+    ]
 
     # set up client and run
-    client = Swarm(client=mock_openai_client)
-    messages = [{"role": "user", "content": "I want to talk to agent 2"}]
-    response = client.run(agent=agent1, messages=messages)
+    with StubServer(script=script) as server:
+        agent1 = Agent(
+            name="Test Agent 1", functions=[transfer_to_agent2], base_url=server.base_url)
+        agent2 = Agent(name="Test Agent 2", base_url=server.base_url)
+        messages = [{"role": "user", "content": "I want to talk to agent 2"}]
+        response = client.run(agent=agent1, messages=messages)
 
     assert response.agent == agent2
     assert response.messages[-1]["role"] == "assistant"
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def make_tool_calls(*calls):
+    from swarm.core import to_tool_calls
+
+    return to_tool_calls(
+        [
+            {
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+            for i, (name, args) in enumerate(calls)
+        ]
+    )
+
+
+def test_parallel_tool_execution_keeps_tool_call_order():
+    import asyncio
+    import time
+    from swarm.types import Result
+
+    agent_a = Agent(name="A")
+    agent_b = Agent(name="B")
+
+    def slow(delay):
+        time.sleep(float(delay))
+        return Result(value=delay, agent=agent_a, context_variables={"k": delay})
+
+    async def slow_async(delay):
+        await asyncio.sleep(float(delay))
+        return Result(value=delay, agent=agent_b, context_variables={"k": delay})
+
+    client = Swarm(parallel_tool_execution=True)
+    tool_calls = make_tool_calls(
+        ("slow", {"delay": "0.2"}),
+        ("missing", {}),
+        ("slow_async", {"delay": "0.2"}),
+        ("slow", {"delay": "0.05"}),
+    )
+    start = time.perf_counter()
+    response = client.handle_tool_calls(
+        tool_calls, [slow, slow_async], {}, debug=False
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.4
+    assert [m["tool_call_id"] for m in response.messages] == [
+        "call_0", "call_1", "call_2", "call_3"
+    ]
+    assert response.messages[1]["content"] == "Error: Tool missing not found."
+    # results are merged in tool_call order: the last call wins
+    assert response.context_variables == {"k": "0.05"}
+    assert response.agent == agent_a
+
+
+def test_parallel_tool_execution_raises_earliest_error():
+    def fails_late():
+        raise ValueError("late")
+
+    def fails_early():
+        raise KeyError("early")
+
+    client = Swarm(parallel_tool_execution=True)
+    tool_calls = make_tool_calls(("fails_early", {}), ("fails_late", {}))
+    with pytest.raises(KeyError):
+        client.handle_tool_calls(tool_calls, [fails_late, fails_early], {}, debug=False)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_tool_calls_run_alike_with_and_without_parallel_execution(parallel):
+    import time
+
+    finished = []
+
+    async def forecast(city):
+        return f"sunny in {city}"
+
+    def get_weather(city):
+        # a sync tool returning an awaitable is awaited in both modes
+        return forecast(city)
+
+    def slow():
+        time.sleep(0.1)
+        finished.append("slow")
+        return "done"
+
+    async def strict():
+        return "never"
+
+    client = Swarm(parallel_tool_execution=parallel)
+    response = client.handle_tool_calls(
+        make_tool_calls(("get_weather", {"city": "Paris"}), ("slow", {})),
+        [get_weather, slow], {}, debug=False)
+    assert [m["content"] for m in response.messages] == ["sunny in Paris", "done"]
+
+    # an async tool failing on its arguments is collected like any tool
+    # error, once the other calls have finished
+    with pytest.raises(TypeError):
+        client.handle_tool_calls(
+            make_tool_calls(("slow", {}), ("strict", {"unexpected": 1})),
+            [slow, strict], {}, debug=False)
+    assert finished == ["slow", "slow"]
@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.dispatch import EarlyToolDispatch
+from swarm.stub_server import StubServer
+from swarm.util import StreamAccumulator
+
+
+def three_lookups():
+    calls = [{"name": "lookup", "arguments": {"key": key}, "id": f"call_{key}"}
+             for key in ("a", "b", "c")]
+    return [{"tool_calls": calls}, "done"]
+
+
+def test_tools_start_while_stream_is_open():
+    started = {}
+
+    def lookup(key):
+        started[key] = time.perf_counter()
+        time.sleep(0.3)
+        return f"value of {key}"
+
+    with StubServer(script=three_lookups(), token_delay=0.1) as server:
+        client = Swarm(client=httpx.Client(), early_tool_dispatch=True)
+        agent = Agent(base_url=server.base_url, functions=[lookup])
+        start = time.perf_counter()
+        stream_ended = None
+        for chunk in client.run(agent, [], stream=True):
+            if chunk.get("delim") == "end" and stream_ended is None:
+                stream_ended = time.perf_counter()
+            if "response" in chunk:
+                response = chunk["response"]
+        elapsed = time.perf_counter() - start
+
+    # a and b were started before the stream finished, c right after it
+    assert started["a"] < started["b"] < stream_ended
+    # stream (~0.6s) + 3 sequential tools (0.9s) would be ~1.5s
+    assert elapsed < 1.2
+    assert [m["content"] for m in response.messages[1:4]] == [
+        "value of a", "value of b", "value of c"]
+    assert response.messages[-1]["content"] == "done"
+
+
+def test_early_dispatch_raises_earliest_error():
+    def lookup(key):
+        raise KeyError(key)
+
+    with StubServer(script=three_lookups(), token_delay=0.01) as server:
+        client = Swarm(client=httpx.Client(), early_tool_dispatch=True)
+        agent = Agent(base_url=server.base_url, functions=[lookup])
+        with pytest.raises(KeyError, match="a"):
+            list(client.run(agent, [], stream=True))
+
+
+def test_async_early_dispatch():
+    async def lookup(key):
+        await asyncio.sleep(0.2)
+        return key.upper()
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient(), early_tool_dispatch=True)
+        agent = Agent(base_url=base_url, functions=[lookup])
+        chunks = [chunk async for chunk in client.arun_and_stream(agent, [])]
+        return chunks[-1]["response"]
+
+    with StubServer(script=three_lookups(), token_delay=0.05) as server:
+        response = asyncio.run(main(server.base_url))
+    assert [m["content"] for m in response.messages[1:4]] == ["A", "B", "C"]
+
+
+def test_failed_stream_stops_early_tool_calls():
+    finished = []
+
+    def lookup(key):
+        time.sleep(0.2)
+        finished.append(key)
+        return key
+
+    with StubServer(script=three_lookups(), token_delay=0.05) as server:
+        client = Swarm(client=httpx.Client(), early_tool_dispatch=True)
+        agent = Agent(base_url=server.base_url, functions=[lookup])
+        stream = client.run(agent, [], stream=True)
+        for chunk in stream:
+            if any(call.get("index") == 2 for call in chunk.get("tool_calls") or ()):
+                break  # a was started early; b would start once this delta is read
+        stream.close()
+        # the running calls were waited for, not left behind
+        assert finished == ["a"]
+
+
+def test_async_failed_stream_cancels_early_tool_calls():
+    started, cancelled = [], []
+
+    async def lookup(key):
+        started.append(key)
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(key)
+            raise
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient(), early_tool_dispatch=True)
+        agent = Agent(base_url=base_url, functions=[lookup])
+        stream = client.arun_and_stream(agent, [])
+        async for chunk in stream:
+            if any(call.get("index") == 2 for call in chunk.get("tool_calls") or ()):
+                await asyncio.sleep(0.05)  # let the early tasks start
+                break
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return list(cancelled)  # before asyncio.run cancels leftover tasks
+
+    with StubServer(script=three_lookups(), token_delay=0.05) as server:
+        cancelled_by_close = asyncio.run(main(server.base_url))
+    assert started == cancelled_by_close == ["a"]
+
+
+def test_incomplete_arguments_are_not_dispatched_early():
+    submitted = []
+    accumulator = StreamAccumulator("Agent")
+    dispatch = EarlyToolDispatch(
+        accumulator,
+        prepare=lambda raw: [(call, "func", call["function"]["arguments"]) for call in raw],
+        submit=lambda func, args: submitted.append(args) or args,
+    )
+    deltas = [
+        {"tool_calls": [{"index": 0, "id": "call_0", "function": {"name": "f", "arguments": '{"x": '}}]},
+        {"tool_calls": [{"index": 1, "id": "call_1", "function": {"name": "f", "arguments": "{}"}}]},
+    ]
+    for delta in deltas:
+        accumulator.add(delta)
+        dispatch.add(delta)
+    assert submitted == []
+
+    pairs = dispatch.dispatch_rest(accumulator.message()["tool_calls"])
+    assert submitted == ['{"x": ', "{}"]
+    assert [call[0]["id"] for call, _ in pairs] == ["call_0", "call_1"]
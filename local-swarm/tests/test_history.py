@@ -0,0 +1,60 @@
+import httpx
+
+from swarm import Swarm, Agent
+from swarm.history import History
+from swarm.stub_server import StubServer
+
+
+def test_history_shares_base_and_records_new():
+    base = [{"role": "user", "content": str(i)} for i in range(3)]
+    history = History(base)
+    history.append({"role": "assistant", "content": "a"})
+    base.append({"role": "user", "content": "late"})  # not part of this run
+
+    assert len(history) == 4
+    assert history[0] is base[0]
+    assert history[-1]["content"] == "a"
+    assert [m["content"] for m in history] == ["0", "1", "2", "a"]
+    assert history[1:3] == base[1:3]
+    assert history.new == [{"role": "assistant", "content": "a"}]
+
+
+def test_run_does_not_copy_or_mutate_caller_state():
+    client = Swarm(client=httpx.Client())
+    messages = [{"role": "user", "content": "hello"}]
+    context_variables = {"user": "alice"}
+    snapshot = [dict(m) for m in messages]
+
+    with StubServer(script=["hi"]) as server:
+        response = client.run(Agent(base_url=server.base_url), messages,
+                              context_variables=context_variables)
+
+    assert messages == snapshot
+    assert response.messages == [{"role": "assistant", "content": "hi", "sender": "Agent"}]
+    assert response.context_variables == context_variables
+    assert response.context_variables is not context_variables
+
+
+def test_nested_context_changes_do_not_leak():
+    def add_to_cart(context_variables, item):
+        context_variables["cart"].append(item)
+        context_variables["user"]["items"] += 1
+        return "added"
+
+    def responder(body):
+        if body["messages"][-1]["role"] == "tool":
+            return "Added."
+        return {"tool_calls": [{"name": "add_to_cart", "arguments": {"item": "tea"}}]}
+
+    context_variables = {"cart": [], "user": {"items": 0}}
+    with StubServer(responder=responder) as server:
+        client = Swarm(client=httpx.Client())
+        agent = Agent(base_url=server.base_url, functions=[add_to_cart])
+        response = client.run(agent, [], context_variables=context_variables)
+        batch = sorted(client.run_many(agent, [[], []], context_variables=context_variables),
+                       key=lambda r: r.index)
+
+    assert response.context_variables == {"cart": ["tea"], "user": {"items": 1}}
+    # neither the caller's mapping nor the other conversations of a batch see it
+    assert context_variables == {"cart": [], "user": {"items": 0}}
+    assert [r.response.context_variables["cart"] for r in batch] == [["tea"], ["tea"]]
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from swarm.core import to_tool_calls
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_import_does_not_load_heavy_dependencies():
+    code = ("import sys, swarm, swarm.serve; "
+            "print(' '.join(m for m in ('openai', 'tiktoken', 'multiprocessing') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_tiktoken_is_loaded_on_first_count(tmp_path):
+    # a stand-in, so the check holds whether or not tiktoken is installed
+    (tmp_path / "tiktoken.py").write_text(
+        "class Encoding:\n    encode = staticmethod(str.split)\n"
+        "def encoding_for_model(model):\n    return Encoding\n")
+    code = ("import sys, swarm; from swarm.context import TokenCounter; "
+            "counter = TokenCounter(); print('tiktoken' in sys.modules); "
+            "counter.count({'role': 'user', 'content': 'hello there'}); "
+            "print('tiktoken' in sys.modules)")
+    env = dict(os.environ, PYTHONPATH=str(tmp_path))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    assert result.stdout.split() == ["False", "True"], result.stderr
+
+
+def test_import_works_without_openai():
+    # a None entry makes any `import openai` raise ImportError
+    code = ("import sys; sys.modules['openai'] = None; "
+            "import swarm, swarm.serve; from swarm.core import to_tool_calls; "
+            "call = to_tool_calls([{'id': 'c', 'function': {'name': 'f', 'arguments': '{}'}}])[0]; "
+            "print(call.function.name)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "f"
+
+
+def test_tool_calls_match_the_openai_type():
+    pytest.importorskip("openai")
+    from openai.types.chat import ChatCompletionMessageToolCall
+
+    raw = [{"id": "call_1", "function": {"name": "get_weather", "arguments": '{"city": "Paris"}'}}]
+    ours = to_tool_calls(raw)[0]
+    assert ours.model_dump() == ChatCompletionMessageToolCall(type="function", **raw[0]).model_dump()
+
+
+def test_openai_message_type_is_still_importable():
+    pytest.importorskip("openai")
+    from swarm.types import ChatCompletionMessage
+
+    assert ChatCompletionMessage.__module__.startswith("openai.")
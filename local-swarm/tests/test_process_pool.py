@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent, cpu_bound
+from swarm.process_pool import ProcessPool
+from swarm.stub_server import StubServer
+from swarm.types import Result
+from swarm.util import function_to_json
+
+pool = ProcessPool(max_workers=2)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shutdown_pool():
+    yield
+    pool.shutdown()
+
+
+@cpu_bound(pool=pool)
+def digest(address: str, context_variables: dict, rounds: int = 1000):
+    """Aggregates the trades of an address."""
+    total = sum(i * i for i in range(rounds))
+    return Result(
+        value=f"{address}: {total} (pid {os.getpid()})",
+        context_variables={"digested": address},
+    )
+
+
+@cpu_bound(pool=pool)
+def transfer_to_trader():
+    return trader
+
+
+@cpu_bound(pool=pool)
+def fail(address: str):
+    raise ValueError(f"no trades for {address}")
+
+
+trader = Agent(name="Trader", functions=[digest])
+
+
+def test_runs_in_another_process():
+    result = digest("0x1", context_variables={})
+    assert result.value.startswith("0x1: 332833500")
+    assert f"(pid {os.getpid()})" not in result.value
+    # Result and Agent values survive the round trip
+    assert result.context_variables == {"digested": "0x1"}
+    agent = transfer_to_trader()
+    assert agent.name == "Trader"
+    assert agent.functions[0] is digest
+
+
+def test_errors_are_raised_in_the_caller():
+    with pytest.raises(ValueError, match="no trades for 0x2"):
+        fail("0x2")
+
+
+def test_schema_is_unchanged():
+    assert function_to_json(digest) == function_to_json(digest.cpu_bound_target)
+
+
+def test_local_functions_are_rejected():
+    with pytest.raises(TypeError, match="module level"):
+        @cpu_bound
+        def local():
+            pass
+
+
+def test_warm_up_starts_every_worker():
+    warm = ProcessPool(max_workers=2, warm_up=True)
+    try:
+        assert len(warm.warm()) >= 1
+        assert warm._executor is not None
+    finally:
+        warm.shutdown()
+
+
+def digest_calls():
+    calls = [{"name": "digest", "arguments": {"address": address}, "id": f"call_{address}"}
+             for address in ("0xa", "0xb")]
+    return [{"tool_calls": calls}, "done"]
+
+
+def test_swarm_run():
+    with StubServer(script=digest_calls()) as server:
+        client = Swarm(client=httpx.Client(), parallel_tool_execution=True)
+        agent = trader.model_copy(update={"base_url": server.base_url})
+        response = client.run(agent, [{"role": "user", "content": "digest"}])
+    assert [m["content"].split(" (")[0] for m in response.messages[1:3]] == [
+        "0xa: 332833500", "0xb: 332833500"]
+    assert response.context_variables == {"digested": "0xb"}
+
+
+def test_async_swarm_run():
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient())
+        agent = trader.model_copy(update={"base_url": base_url})
+        return await client.arun(agent, [{"role": "user", "content": "digest"}])
+
+    with StubServer(script=digest_calls()) as server:
+        response = asyncio.run(main(server.base_url))
+    assert response.messages[1]["content"].startswith("0xa: 332833500")
+    assert response.messages[-1]["content"] == "done"
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.ratelimit import KeyLimit, RateLimiter
+from swarm.stub_server import StubServer
+
+
+def test_requests_over_budget_are_queued_in_order():
+    limit = KeyLimit(rpm=6)  # one request every 10s, bursts of 6
+    delays = [limit.reserve(0).delay for _ in range(8)]
+    assert delays[:6] == [0.0] * 6
+    assert delays[6] == pytest.approx(10, abs=0.1)
+    assert delays[7] == pytest.approx(20, abs=0.1)
+    assert limit.waits == 2
+
+
+def test_token_budget_is_corrected_from_usage():
+    limit = KeyLimit(tpm=6000)
+    first = limit.reserve(6000)
+    assert first.delay == 0.0
+    assert limit.reserve(600).delay == pytest.approx(6, abs=0.1)
+
+    limit = KeyLimit(tpm=6000)
+    first = limit.reserve(6000)
+    first.settle(1000)  # the request was smaller than estimated
+    assert limit.reserve(5000).delay == 0.0
+
+
+def test_estimate_uses_max_tokens():
+    limiter = RateLimiter(default_completion_tokens=100)
+    assert limiter.estimate({}, b"x" * 400) == 200
+    assert limiter.estimate({"max_tokens": 10}, b"x" * 400) == 110
+
+
+def test_unlimited_keys_are_not_delayed():
+    limiter = RateLimiter()
+    limiter.configure("http://a/v1", "sk-a", rpm=1)
+    assert limiter.reserve("http://a/v1", "sk-b", 100) is None
+    assert limiter.reserve("http://b/v1", "sk-a", 100) is None
+    assert limiter.reserve("http://a/v1/", "sk-a", 100).delay == 0.0
+
+
+def test_swarm_settles_from_reported_usage():
+    # each request is estimated at ~40k tokens; only the settled (tiny)
+    # usage lets the next ones through without waiting
+    limiter = RateLimiter(default_completion_tokens=40_000)
+    with StubServer(script=["hi"], cycle=True) as server:
+        limit = limiter.configure(server.base_url, tpm=60_000)
+        client = Swarm(client=httpx.Client(), rate_limiter=limiter)
+        agent = Agent(base_url=server.base_url)
+        start = time.perf_counter()
+        client.run(agent, [{"role": "user", "content": "hi"}])
+        list(client.run(agent, [{"role": "user", "content": "hi"}], stream=True))
+        client.run(agent, [{"role": "user", "content": "hi"}])
+    assert time.perf_counter() - start < 2
+    assert limit.waits == 0
+
+
+def test_limiter_configured_after_construction_is_used():
+    limiter = RateLimiter()
+    client = Swarm(client=httpx.Client(), rate_limiter=limiter)
+    assert client.rate_limiter is limiter
+    assert AsyncSwarm(client=httpx.AsyncClient(), rate_limiter=limiter).rate_limiter is limiter
+
+    with StubServer(script=["hi"], cycle=True) as server:
+        limit = limiter.configure(server.base_url, rpm=60)
+        for _ in range(60):
+            limit.reserve(0)  # use up the burst
+        start = time.perf_counter()
+        client.run(Agent(base_url=server.base_url), [{"role": "user", "content": "hi"}])
+    assert limit.waits == 1
+    assert time.perf_counter() - start > 0.9
+
+
+def test_error_responses_are_refunded():
+    limiter = RateLimiter(default_completion_tokens=50_000)
+    with StubServer(error_rate=1.0, error_status=400) as server:
+        limit = limiter.configure(server.base_url, tpm=60_000)
+        client = Swarm(client=httpx.Client(), rate_limiter=limiter)
+        for _ in range(2):
+            with pytest.raises(Exception, match="400"):
+                client.run(Agent(base_url=server.base_url), [])
+    assert limit.waits == 0
+
+
+def test_async_requests_wait_their_turn():
+    limiter = RateLimiter()
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient(), rate_limiter=limiter)
+        agent = Agent(base_url=base_url)
+        return await asyncio.gather(*(
+            client.arun(agent, [{"role": "user", "content": "hi"}]) for _ in range(3)))
+
+    with StubServer(script=["hi"], cycle=True) as server:
+        limit = limiter.configure(server.base_url, rpm=120)
+        # use up the burst so each further request waits 0.5s
+        for _ in range(119):
+            limit.reserve(0)
+        start = time.perf_counter()
+        responses = asyncio.run(main(server.base_url))
+        elapsed = time.perf_counter() - start
+    assert [r.messages[-1]["content"] for r in responses] == ["hi"] * 3
+    assert limit.waits == 2
+    assert 0.9 < elapsed < 2
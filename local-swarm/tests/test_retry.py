@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.retry import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    RetryPolicy,
+    parse_retry_after,
+)
+from swarm.stub_server import StubServer
+from tests.conftest import scripted_transport
+
+
+def fast_policy(**kwargs):
+    return RetryPolicy(base_delay=0.001, max_delay=0.01, **kwargs)
+
+
+def test_retries_transient_failures():
+    policy = fast_policy()
+    client = Swarm(
+        client=httpx.Client(transport=scripted_transport([
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.ConnectError("connection refused"),
+            "ok",
+        ])),
+        retry_policy=policy,
+        circuit_breakers=CircuitBreakerRegistry(),
+    )
+    response = client.run(Agent(), [{"role": "user", "content": "hi"}])
+
+    assert response.messages[-1]["content"] == "ok"
+    assert policy.stats.retries == 2
+    assert policy.stats.reasons == {"429": 1, "ConnectError": 1}
+
+
+def test_gives_up_after_max_attempts_and_skips_client_errors():
+    policy = fast_policy(max_attempts=2)
+    client = Swarm(
+        client=httpx.Client(transport=scripted_transport([httpx.Response(502)] * 3)),
+        retry_policy=policy,
+        circuit_breakers=CircuitBreakerRegistry(),
+    )
+    with pytest.raises(Exception, match="502"):
+        client.run(Agent(), [{"role": "user", "content": "hi"}])
+    assert (policy.stats.retries, policy.stats.gave_up) == (1, 1)
+
+    client.client = httpx.Client(transport=scripted_transport([httpx.Response(400)]))
+    with pytest.raises(Exception, match="400"):
+        client.run(Agent(), [{"role": "user", "content": "hi"}])
+    assert policy.stats.retries == 1
+
+
+def test_retry_after_is_honored():
+    policy = RetryPolicy(max_retry_after=5)
+    assert policy.next_delay(0, httpx.Response(429, headers={"Retry-After": "3"})) == 3
+    assert policy.next_delay(0, httpx.Response(429, headers={"Retry-After": "60"})) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker("http://upstream", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_request()  # the single trial request
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert (breaker.trips, breaker.rejected) == (1, 2)
+
+
+def test_async_fails_fast_while_circuit_open():
+    calls = []
+    breakers = CircuitBreakerRegistry(failure_threshold=2, reset_timeout=60)
+    client = AsyncSwarm(
+        client=httpx.AsyncClient(transport=scripted_transport([httpx.Response(503)] * 5, calls)),
+        retry_policy=fast_policy(max_attempts=5),
+        circuit_breakers=breakers,
+    )
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.arun(Agent(), [{"role": "user", "content": "hi"}]))
+    assert len(calls) == 2
+    assert breakers.states()[Agent().base_url]["state"] == "open"
+
+
+def test_cancelled_trial_releases_the_half_open_slot():
+    breakers = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=0)
+    client = AsyncSwarm(
+        client=httpx.AsyncClient(),
+        retry_policy=fast_policy(max_attempts=1),
+        circuit_breakers=breakers,
+    )
+
+    async def main(agent):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.arun(agent, [{"role": "user", "content": "hi"}]), 0.05)
+        return await client.arun(agent, [{"role": "user", "content": "hi"}])
+
+    with StubServer(script=["ok"], cycle=True, ttft=0.2) as server:
+        agent = Agent(base_url=server.base_url)
+        breakers.get(agent.base_url).record_failure()  # open; trial allowed right away
+        response = asyncio.run(main(agent))
+
+    assert response.messages[-1]["content"] == "ok"
+    assert breakers.states()[agent.base_url]["state"] == "closed"
+
+
+def test_released_trial_does_not_free_a_newer_one():
+    breaker = CircuitBreaker("http://upstream", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    first = breaker.before_request()
+    breaker.record_failure()  # the first trial failed; a new one may start
+    second = breaker.before_request()
+    breaker.release_trial(first)  # late cleanup of the first must not free the second
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.release_trial(second)
+    assert breaker.before_request() is not None
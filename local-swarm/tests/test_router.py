@@ -0,0 +1,176 @@
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.retry import RetryPolicy
+from swarm.router import Endpoint, Router
+from swarm.stub_server import StubServer
+from tests.conftest import call
+
+DEAD = "http://127.0.0.1:1/v1"
+
+
+def get_weather(city):
+    return f"sunny in {city}"
+
+
+def test_fails_over_within_a_turn():
+    with StubServer(script=[call("get_weather", city="Paris"), "done"]) as healthy, \
+            StubServer(error_rate=1.0, error_status=503) as failing:
+        router = Router([DEAD, failing.base_url, healthy.base_url])
+        client = Swarm(client=httpx.Client(), router=router,
+                       retry_policy=RetryPolicy(max_attempts=1))
+        agent = Agent(functions=[get_weather])
+        response = client.run(agent, [{"role": "user", "content": "weather?"}])
+
+    # the tool call and the final answer came from the healthy endpoint,
+    # with the full conversation re-sent to it on the second turn
+    assert [m["content"] for m in response.messages[1:]] == ["sunny in Paris", "done"]
+    assert [m["role"] for m in healthy.received[1]["messages"]] == [
+        "system", "user", "assistant", "tool"]
+    assert router.failovers["ConnectError"] >= 1
+    assert router.failovers["503"] >= 1
+    stats = router.as_dict()["endpoints"]
+    assert stats[healthy.base_url]["errors"] == 0
+    assert stats[DEAD]["errors"] >= 1
+
+
+def test_last_endpoint_error_is_raised():
+    router = Router([DEAD])
+    client = Swarm(client=httpx.Client(), router=router,
+                   retry_policy=RetryPolicy(max_attempts=1))
+    with pytest.raises(httpx.ConnectError):
+        client.run(Agent(), [{"role": "user", "content": "hi"}])
+
+
+def test_latency_strategy_prefers_the_fast_endpoint():
+    with StubServer(script=["fast"], cycle=True) as fast, \
+            StubServer(script=["slow"], cycle=True, ttft=0.05) as slow:
+        router = Router([slow.base_url, fast.base_url])
+        client = Swarm(client=httpx.Client(), router=router)
+        answers = Counter(
+            client.run(Agent(), [{"role": "user", "content": "hi"}]).messages[-1]["content"]
+            for _ in range(10)
+        )
+    # each endpoint is tried once, then the fast one wins
+    assert answers == {"fast": 9, "slow": 1}
+
+
+def test_weighted_round_robin():
+    router = Router([Endpoint("http://a/v1", weight=3), Endpoint("http://b/v1", weight=1)],
+                    strategy="weighted_round_robin")
+    picks = [router.plan()[0].base_url for _ in range(8)]
+    assert Counter(picks) == {"http://a/v1": 6, "http://b/v1": 2}
+    # smooth: b is not starved until the end of the cycle
+    assert "http://b/v1" in picks[:4]
+
+
+def test_least_outstanding():
+    a, b = Endpoint("http://a/v1"), Endpoint("http://b/v1")
+    router = Router([a, b], strategy="least_outstanding")
+    start = router.begin(router.plan()[0])
+    assert router.plan()[0] is b
+    router.end(a, start, ok=True)
+    assert a.outstanding == 0
+
+
+def test_unhealthy_endpoints_go_last():
+    a, b = Endpoint("http://a/v1"), Endpoint("http://b/v1")
+    router = Router([a, b], min_samples=2)
+    for _ in range(2):
+        router.end(a, router.begin(a), ok=False)
+    assert router.plan() == [b, a]
+
+
+def test_endpoint_key_replaces_agent_key():
+    with StubServer(script=["ok"]) as server:
+        seen = []
+
+        def record(request):
+            seen.append(request.headers.get("authorization"))
+
+        client = Swarm(client=httpx.Client(event_hooks={"request": [record]}),
+                       router=Router([Endpoint(server.base_url, api_key="sk-endpoint")]))
+        client.run(Agent(api_key="sk-agent"), [])
+    assert seen == ["Bearer sk-endpoint"]
+
+
+def test_async_failover():
+    async def main(router):
+        client = AsyncSwarm(client=httpx.AsyncClient(), router=router)
+        return await client.arun(Agent(), [{"role": "user", "content": "hi"}])
+
+    with StubServer(script=["async ok"]) as healthy:
+        router = Router([DEAD, healthy.base_url])
+        response = asyncio.run(main(router))
+    assert response.messages[-1]["content"] == "async ok"
+    assert router.failovers["ConnectError"] == 1
+
+
+def test_unhealthy_endpoint_gets_a_trial_after_the_cooldown():
+    a, b = Endpoint("http://a/v1"), Endpoint("http://b/v1")
+    router = Router([a, b], min_samples=2, cooldown=0.05)
+    for _ in range(6):
+        router.end(a, router.begin(a), ok=False)
+    assert [router.plan()[0] for _ in range(100)] == [b] * 100
+
+    time.sleep(0.06)
+    trial = router.plan()
+    assert trial == [a, b]
+    # one trial at a time
+    assert router.plan() == [b, a]
+    router.end(a, router.begin(a), ok=True)
+    assert router.healthy(a) and a.error_rate == 0.0
+
+    # a failed trial waits for another cooldown
+    for _ in range(2):
+        router.end(a, router.begin(a), ok=False)
+    time.sleep(0.06)
+    assert router.plan()[0] is a
+    router.end(a, router.begin(a), ok=False)
+    assert router.plan() == [b, a]
+
+
+def test_stale_latency_samples_are_re_measured():
+    idle, busy = Endpoint("http://idle/v1", max_age=0.05), Endpoint("http://busy/v1", max_age=10)
+    idle._latencies.append((time.monotonic(), 0.5))
+    busy._latencies.append((time.monotonic(), 0.1))
+    router = Router([idle, busy])
+    assert router.plan()[0] is busy
+    time.sleep(0.06)
+    # the idle endpoint's samples aged out, so it is tried again
+    assert idle.latency is None
+    assert router.plan()[0] is idle
+
+
+def test_cancelled_requests_are_not_left_outstanding():
+    async def main(base_url):
+        router = Router([base_url])
+        client = AsyncSwarm(client=httpx.AsyncClient(), router=router)
+        task = asyncio.create_task(client.arun(Agent(), [{"role": "user", "content": "hi"}]))
+        while router.endpoints[0].outstanding == 0:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return router.endpoints[0]
+
+    with StubServer(script=["late"], ttft=1.0) as server:
+        endpoint = asyncio.run(main(server.base_url))
+    assert endpoint.outstanding == 0
+    assert endpoint.errors == 1
+
+
+def test_unexpected_errors_end_the_attempt():
+    def broken(request):
+        raise ValueError("bad transport")
+
+    router = Router(["http://a/v1", "http://b/v1"])
+    client = Swarm(client=httpx.Client(transport=httpx.MockTransport(broken)), router=router)
+    with pytest.raises(ValueError):
+        client.run(Agent(), [])
+    assert [e.outstanding for e in router.endpoints] == [0, 0]
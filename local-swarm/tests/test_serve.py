@@ -0,0 +1,152 @@
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from swarm import Agent
+from swarm.serve import StoredSessions, SwarmServer, load_agent
+from swarm.store import ConversationStore
+from swarm.stub_server import StubServer
+
+
+def events(response: httpx.Response):
+    """Parses a server-sent event stream into (event, data) pairs."""
+    parsed = []
+    for block in response.text.split("\n\n"):
+        if not block.strip():
+            continue
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def post(base_url, session_id, content, **body):
+    with httpx.Client(timeout=10) as client:
+        return client.post(f"{base_url}/sessions/{session_id}/messages",
+                           json={"content": content, **body})
+
+
+def test_turns_stream_deltas_and_keep_the_session():
+    with StubServer(script=["Hello there!", "You said hi."]) as upstream:
+        agent = Agent(name="Greeter", base_url=upstream.base_url)
+        with SwarmServer(agent, port=0) as server:
+            first = post(server.base_url, "s1", "hi")
+            second = post(server.base_url, "s1", "what did I say?", stream=False)
+            with httpx.Client() as client:
+                stored = client.get(f"{server.base_url}/sessions/s1").json()
+                deleted = client.delete(f"{server.base_url}/sessions/s1").status_code
+                missing = client.get(f"{server.base_url}/sessions/s1").status_code
+        upstream_messages = upstream.received[-1]["messages"]
+
+    assert first.headers["content-type"] == "text/event-stream"
+    parsed = events(first)
+    content = "".join(data.get("content") or "" for event, data in parsed if event == "delta")
+    assert content == "Hello there!"
+    assert parsed[-1][0] == "response"
+    assert parsed[-1][1]["messages"][-1]["sender"] == "Greeter"
+
+    assert second.json()["messages"][-1]["content"] == "You said hi."
+    assert [m["content"] for m in upstream_messages[1:]] == [
+        "hi", "Hello there!", "what did I say?"]
+    assert [m["role"] for m in stored["messages"]] == ["user", "assistant"] * 2
+    assert (deleted, missing) == (200, 404)
+
+
+def test_turns_beyond_max_concurrency_are_queued():
+    with StubServer(script=["ok"], cycle=True, ttft=0.2) as upstream:
+        agent = Agent(base_url=upstream.base_url)
+        with SwarmServer(agent, port=0, max_concurrency=2) as server:
+            with ThreadPoolExecutor(6) as pool:
+                responses = list(pool.map(
+                    lambda i: post(server.base_url, f"s{i}", "hi"), range(6)))
+            stats = server.stats.as_dict()
+
+    assert all(events(r)[-1][0] == "response" for r in responses)
+    assert stats["max_active"] == 2
+    assert stats["completed"] == 6
+    assert stats["mean_queue_wait"] > 0.1
+
+
+def test_full_queue_is_rejected():
+    with StubServer(script=["ok"], cycle=True, ttft=0.3) as upstream:
+        agent = Agent(base_url=upstream.base_url)
+        with SwarmServer(agent, port=0, max_concurrency=1, max_queue=0) as server:
+            with ThreadPoolExecutor(3) as pool:
+                statuses = sorted(pool.map(
+                    lambda i: post(server.base_url, f"s{i}", "hi").status_code, range(3)))
+            rejected = server.stats.rejected
+
+    assert statuses == [200, 503, 503]
+    assert rejected == 2
+
+
+def test_stored_sessions_survive_restarts_and_handoffs():
+    store = ConversationStore()
+
+    def transfer_to_sales():
+        return sales
+
+    sales = Agent(name="Sales")
+    triage = Agent(name="Triage", functions=[transfer_to_sales])
+    script = [{"tool_calls": [{"name": "transfer_to_sales", "arguments": {}}]},
+              "Sales here.", "Still sales."]
+    with StubServer(script=script) as upstream:
+        triage.base_url = sales.base_url = upstream.base_url
+        with SwarmServer(triage, [sales], sessions=StoredSessions(store), port=0) as server:
+            first = post(server.base_url, "s1", "buy", context_variables={"user": 7})
+        with SwarmServer(triage, [sales], sessions=StoredSessions(store), port=0) as server:
+            second = post(server.base_url, "s1", "again", stream=False)
+        upstream_messages = upstream.received[-1]["messages"]
+
+    assert events(first)[-1][1]["agent"] == "Sales"
+    assert second.json()["agent"] == "Sales"
+    assert second.json()["context_variables"] == {"user": 7}
+    # the restarted server continued with the handed-off agent and full history
+    assert upstream_messages[0]["content"] == "You are a helpful agent."
+    assert [m["role"] for m in upstream_messages[1:]] == [
+        "user", "assistant", "tool", "assistant", "user"]
+
+
+def test_load_agent_collects_the_module_agents():
+    agent, agents = load_agent("examples.triage_agent.agents:triage_agent")
+    assert agent.name == "Triage Agent"
+    assert {a.name for a in agents} >= {"Triage Agent", "Sales Agent", "Refunds Agent"}
+
+
+def raw_request(base_url, head: bytes) -> bytes:
+    host, port = base_url.rsplit("/", 1)[-1].split(":")
+    with socket.create_connection((host, int(port)), timeout=5) as sock:
+        sock.sendall(head)
+        return sock.recv(4096)
+
+
+def test_oversized_and_malformed_bodies_are_rejected():
+    with SwarmServer(Agent(), port=0, max_body=64) as server:
+        too_large = post(server.base_url, "s1", "x" * 100)
+        negative = raw_request(server.base_url, b"POST /sessions/s1/messages HTTP/1.1\r\n"
+                                                 b"Content-Length: -5\r\n\r\n")
+        malformed = raw_request(server.base_url, b"POST /sessions/s1/messages HTTP/1.1\r\n"
+                                                  b"Content-Length: 1_0\r\n\r\n")
+        sessions = len(server.sessions)
+
+    assert too_large.status_code == 413
+    assert negative.startswith(b"HTTP/1.1 400 ")
+    assert malformed.startswith(b"HTTP/1.1 400 ")
+    assert sessions == 0
+
+
+def test_turns_waiting_on_their_session_count_against_the_queue():
+    with StubServer(script=["ok"], cycle=True, ttft=0.3) as upstream:
+        agent = Agent(base_url=upstream.base_url)
+        with SwarmServer(agent, port=0, max_concurrency=8, max_queue=1) as server:
+            with ThreadPoolExecutor(4) as pool:
+                statuses = sorted(pool.map(
+                    lambda i: post(server.base_url, "hot", "hi").status_code, range(4)))
+            rejected = server.stats.rejected
+            queued = server.stats.queued
+
+    # one turn runs, one waits for it, the rest are turned away
+    assert statuses == [200, 200, 503, 503]
+    assert rejected == 2
+    assert queued == 0
@@ -0,0 +1,50 @@
+import json
+
+from swarm.sse import ChatStreamDecoder, SSEDecoder, iter_chunk_deltas, stdlib_loads
+
+
+def chunk(content, index=0):
+    return {"choices": [{"index": index, "delta": {"content": content}}]}
+
+
+def test_sse_framing_across_arbitrary_splits():
+    stream = (
+        b": keep-alive\r\n"
+        b"event: update\r\nid: 7\r\ndata: first\r\ndata: second\r\n\r\n"
+        b"data:no-space\n\n"
+        b"data: cr only\r\r"
+    )
+    expected = [
+        ("update", b"first\nsecond", "7"),
+        ("message", b"no-space", "7"),
+        ("message", b"cr only", "7"),
+    ]
+    for size in (1, 2, 3, 7, len(stream)):
+        decoder = SSEDecoder()
+        events = []
+        for i in range(0, len(stream), size):
+            events.extend(decoder.feed(stream[i:i + size]))
+        events.extend(decoder.flush())
+        assert [(e.event, e.data, e.id) for e in events] == expected, size
+
+
+def test_chat_stream_decoder():
+    body = (
+        f"data: {json.dumps(chunk('Hel'))}\n\n"
+        "data: {not json}\n\n"
+        f"data: {json.dumps(chunk('lo'))}\n\n"
+        f"data: {json.dumps({'choices': [], 'usage': {'prompt_tokens': 3}})}\n\n"
+        "data: [DONE]\n\n"
+    ).encode()
+    decoder = ChatStreamDecoder(loads=stdlib_loads)
+    deltas = decoder.feed(body[:17]) + decoder.feed(body[17:]) + decoder.flush()
+
+    assert [d.delta for d in deltas if d.index == 0] == [{"content": "Hel"}, {"content": "lo"}]
+    assert deltas[-1].index is None and deltas[-1].usage == {"prompt_tokens": 3}
+    assert decoder.errors == 1
+    assert decoder.done
+
+
+def test_unterminated_final_event_is_flushed():
+    body = f"data: {json.dumps(chunk('end'))}".encode()
+    assert [d.delta for d in iter_chunk_deltas([body])] == [{"content": "end"}]
@@ -0,0 +1,226 @@
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.store import ConversationStore, pending_tool_calls
+from swarm.stub_server import StubServer
+from tests.conftest import call, calls
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+def test_append_load_and_tail(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    with ConversationStore(path) as store:
+        assert store.append("a", user("1"), user("2")) == 2
+        assert store.append("a", user("3")) == 3
+        store.append("b", user("other"))
+
+    with ConversationStore(path) as store:
+        assert store.length("a") == 3
+        assert [m["content"] for m in store.load("a")] == ["1", "2", "3"]
+        assert [m["content"] for m in store.tail("a", 2)] == ["2", "3"]
+        assert store.append("a", user("4")) == 4
+        assert sorted(store.conversations()) == ["a", "b"]
+        store.delete("b")
+        assert store.load("b") == [] and store.checkpoint("b") is None
+
+
+def test_checkpoint_moves_with_its_messages():
+    store = ConversationStore()
+    store.record("a", [user("hi")], "Triage", {"user_id": 7})
+    checkpoint = store.checkpoint("a")
+    assert (checkpoint.agent, checkpoint.context_variables, checkpoint.done,
+            checkpoint.length) == ("Triage", {"user_id": 7}, False, 1)
+
+    # a record that fails part-way leaves neither messages nor checkpoint behind
+    store._lengths["a"] = 0  # makes the second row collide with the stored one
+    with pytest.raises(sqlite3.IntegrityError):
+        store.record("a", [user("new"), user("collides")], "Sales", done=True)
+    del store._lengths["a"]
+    assert [m["content"] for m in store.load("a")] == ["hi"]
+    assert store.checkpoint("a").agent == "Triage"
+
+    store.record("a", [user("ok")], "Sales", done=True)
+    assert store.length("a") == 2
+    assert store.checkpoint("a").agent == "Sales" and store.checkpoint("a").done
+
+
+def test_pending_tool_calls():
+    assistant = {"role": "assistant", "tool_calls": [{"id": "1"}, {"id": "2"}]}
+    answered = {"role": "tool", "tool_call_id": "1", "content": "ok"}
+    assert [c["id"] for c in pending_tool_calls([user("x"), assistant])] == ["1", "2"]
+    assert [c["id"] for c in pending_tool_calls([assistant, answered])] == ["2"]
+    assert pending_tool_calls([assistant, answered, user("y")]) == []
+    assert pending_tool_calls([{"role": "assistant", "content": "done"}]) == []
+
+
+def test_runs_continue_a_stored_conversation():
+    store = ConversationStore()
+    with StubServer(script=["Hello!", "You said hi."]) as server:
+        client = Swarm(client=httpx.Client(), store=store)
+        agent = Agent(base_url=server.base_url)
+        client.run(agent, [user("hi")], conversation_id="c1")
+        response = client.run(agent, [user("what did I say?")], conversation_id="c1")
+        last_request = server.received[-1]["messages"]
+
+    assert [m["content"] for m in response.messages] == ["You said hi."]
+    # the second request carried the stored conversation
+    assert [m["content"] for m in last_request[1:]] == [
+        "hi", "Hello!", "what did I say?"]
+    assert store.length("c1") == 4
+    assert store.checkpoint("c1").done
+
+
+def test_streamed_runs_are_stored():
+    store = ConversationStore()
+    with StubServer(script=["Streaming works."]) as server:
+        client = Swarm(client=httpx.Client(), store=store)
+        list(client.run(Agent(base_url=server.base_url), [user("hi")], stream=True,
+                        conversation_id="s1"))
+    assert [m["content"] for m in store.load("s1")] == ["hi", "Streaming works."]
+
+
+def test_resume_runs_only_the_unfinished_tool_calls():
+    store = ConversationStore()
+    calls = []
+
+    def lookup_order():
+        calls.append("lookup")
+        return "order 42"
+
+    def book_refund(context_variables):
+        calls.append("book")
+        if len(calls) == 2:
+            raise RuntimeError("worker crashed")
+        context_variables["refunded"] = True
+        return "refund booked"
+
+    script = [call("lookup_order"), call("book_refund", id="call_2"), "Refund booked."]
+    with StubServer(script=script) as server:
+        client = Swarm(client=httpx.Client(), store=store)
+        agent = Agent(name="Refunds", base_url=server.base_url,
+                      functions=[lookup_order, book_refund])
+        with pytest.raises(RuntimeError, match="worker crashed"):
+            client.run(agent, [user("refund please")], {"user_id": 7}, conversation_id="r1")
+        assert store.checkpoint("r1").length == 4  # user, call, result, call
+
+        response = Swarm(client=httpx.Client(), store=store).resume("r1", [agent])
+        requests = server.stats["requests"]
+
+    assert calls == ["lookup", "book", "book"]
+    assert requests == 3
+    assert [m["role"] for m in response.messages] == ["tool", "assistant"]
+    assert response.messages[-1]["content"] == "Refund booked."
+    assert response.context_variables == {"user_id": 7, "refunded": True}
+    assert store.checkpoint("r1").done
+
+    # a finished conversation has nothing left to resume
+    assert Swarm(client=httpx.Client(), store=store).resume("r1", [agent]).messages == []
+    with pytest.raises(KeyError):
+        client.resume("missing", [agent])
+
+
+@pytest.mark.parametrize("options", [
+    {}, {"parallel_tool_execution": True}, {"early_tool_dispatch": True}])
+def test_tool_results_are_stored_as_each_call_finishes(options):
+    store = ConversationStore()
+    ran = []
+
+    def transfer_to_billing():
+        ran.append("transfer")
+        return billing
+
+    def book_refund():
+        ran.append("book")
+        if ran.count("book") == 1:
+            raise RuntimeError("worker crashed")
+        return "refund booked"
+
+    billing = Agent(name="Billing")
+    triage = Agent(name="Triage", functions=[transfer_to_billing, book_refund])
+    script = [calls("transfer_to_billing", "book_refund"), "Billing here."]
+    with StubServer(script=script) as server:
+        triage.base_url = billing.base_url = server.base_url
+        client = Swarm(client=httpx.Client(), store=store, **options)
+        with pytest.raises(RuntimeError, match="worker crashed"):
+            # early dispatch only applies to streamed runs
+            list(client.run(triage, [user("refund please")], conversation_id="r1",
+                            stream="early_tool_dispatch" in options))
+        # the finished handoff was stored although its batch failed
+        assert [m["role"] for m in store.load("r1")] == ["user", "assistant", "tool"]
+        assert store.checkpoint("r1").agent == "Billing"
+
+        response = client.resume("r1", [triage, billing])
+
+    assert ran == ["transfer", "book", "book"]
+    assert response.agent.name == "Billing"
+    assert [m["role"] for m in response.messages] == ["tool", "assistant"]
+    assert response.messages[-1]["content"] == "Billing here."
+
+
+@pytest.mark.parametrize("options", [
+    {}, {"parallel_tool_execution": True}, {"early_tool_dispatch": True}])
+def test_async_runs_are_stored_and_resumed(options):
+    store = ConversationStore()
+    ran = []
+
+    def transfer_to_billing():
+        ran.append("transfer")
+        return billing
+
+    async def book_refund():
+        ran.append("book")
+        if ran.count("book") == 1:
+            raise RuntimeError("worker crashed")
+        return "refund booked"
+
+    billing = Agent(name="Billing")
+    triage = Agent(name="Triage", functions=[transfer_to_billing, book_refund])
+    client = AsyncSwarm(client=httpx.AsyncClient(), store=store, **options)
+
+    async def main():
+        with pytest.raises(RuntimeError, match="worker crashed"):
+            if "early_tool_dispatch" in options:
+                async for _ in client.arun_and_stream(
+                        triage, [user("refund please")], conversation_id="r1"):
+                    pass
+            else:
+                await client.arun(triage, [user("refund please")], conversation_id="r1")
+        # the finished handoff was stored although its batch failed
+        assert [m["role"] for m in store.load("r1")] == ["user", "assistant", "tool"]
+        assert store.checkpoint("r1").agent == "Billing"
+        return await client.aresume("r1", [triage, billing])
+
+    script = [calls("transfer_to_billing", "book_refund"), "Billing here."]
+    with StubServer(script=script) as server:
+        triage.base_url = billing.base_url = server.base_url
+        response = asyncio.run(main())
+
+    assert ran == ["transfer", "book", "book"]
+    assert response.agent.name == "Billing"
+    assert [m["role"] for m in response.messages] == ["tool", "assistant"]
+    assert store.checkpoint("r1").done
+
+
+def test_resume_without_executing_tools_does_not_send_unanswered_calls():
+    store = ConversationStore()
+
+    def lookup_order():
+        raise RuntimeError("worker crashed")
+
+    with StubServer(script=[call("lookup_order"), "unused"]) as server:
+        client = Swarm(client=httpx.Client(), store=store)
+        agent = Agent(base_url=server.base_url, functions=[lookup_order])
+        with pytest.raises(RuntimeError):
+            client.run(agent, [user("where is my order?")], conversation_id="r1")
+        with pytest.raises(ValueError, match="execute_tools=True"):
+            client.resume("r1", [agent], execute_tools=False)
+        requests = server.stats["requests"]
+
+    assert requests == 1
@@ -0,0 +1,111 @@
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, Agent
+from swarm.retry import RetryPolicy
+from swarm.sse import iter_chunk_deltas
+from swarm.stub_server import StubReply, StubServer, split_tokens
+from swarm.types import DEFAULT_BASE_URL
+
+
+def test_split_tokens_round_trips():
+    text = "  Hello,  world!\nBye "
+    assert "".join(split_tokens(text)) == text
+    assert split_tokens(None) == []
+
+
+def test_non_streaming_completion_and_echo():
+    with StubServer(script=["scripted"]) as server:
+        url = server.base_url + "/chat/completions"
+        body = {"model": "m", "messages": [{"role": "user", "content": "ping"}]}
+        first = httpx.post(url, json=body).json()
+        second = httpx.post(url, json=body).json()
+
+    assert first["choices"][0]["message"]["content"] == "scripted"
+    assert second["choices"][0]["message"]["content"] == "Echo: ping"
+    assert first["usage"]["completion_tokens"] == 1
+    assert server.stats["requests"] == 2
+    assert server.received[0] == body
+
+
+def test_stream_timing_and_usage():
+    script = [StubReply(content="one two three four")]
+    with StubServer(script=script, ttft=0.2, token_delay=0.05) as server:
+        body = {"model": "m", "stream": True, "messages": [],
+                "stream_options": {"include_usage": True}}
+        start = time.perf_counter()
+        arrivals = []
+        with httpx.stream("POST", server.base_url + "/chat/completions", json=body) as r:
+            deltas = []
+            for delta in iter_chunk_deltas(r.iter_bytes()):
+                arrivals.append(time.perf_counter() - start)
+                deltas.append(delta)
+
+    content = "".join(d.delta.get("content") or "" for d in deltas if d.index == 0)
+    assert content == "one two three four"
+    assert arrivals[0] >= 0.2
+    assert arrivals[-1] >= 0.2 + 3 * 0.05
+    assert deltas[-1].usage["completion_tokens"] == 4
+
+
+def test_scripted_tool_calls_drive_a_swarm_run():
+    def get_weather(location):
+        return f"sunny in {location}"
+
+    script = [
+        {"tool_calls": [{"name": "get_weather", "arguments": {"location": "Paris"}}]},
+        "It is sunny.",
+    ] * 2
+    with StubServer(script=script, token_delay=0.001) as server:
+        agent = Agent(functions=[get_weather], base_url=server.base_url)
+        client = Swarm(client=httpx.Client())
+        response = client.run(agent, [{"role": "user", "content": "weather?"}])
+        chunks = list(client.run(agent, [{"role": "user", "content": "weather?"}], stream=True))
+
+    assert response.messages[1]["content"] == "sunny in Paris"
+    assert response.messages[-1]["content"] == "It is sunny."
+    streamed = chunks[-1]["response"].messages
+    assert streamed[0]["tool_calls"][0]["function"]["arguments"] == '{"location": "Paris"}'
+    assert streamed[-1]["content"] == "It is sunny."
+
+
+def test_error_injection_is_retried():
+    script = [StubReply(status=503, retry_after=0), "recovered"]
+    with StubServer(script=script) as server:
+        client = Swarm(client=httpx.Client(), retry_policy=RetryPolicy(base_delay=0.01))
+        response = client.run(Agent(base_url=server.base_url), [])
+
+    assert response.messages[-1]["content"] == "recovered"
+    assert server.stats["errors"] == 1
+    assert server.stats["requests"] == 2
+
+
+def test_error_rate_and_disconnect():
+    with StubServer(error_rate=1.0, error_status=429, retry_after=1, seed=0) as server:
+        r = httpx.post(server.base_url + "/chat/completions", json={"messages": []})
+        assert r.status_code == 429
+        assert r.headers["retry-after"] == "1"
+
+    script = [StubReply(content="a b c d", disconnect_after=2)]
+    with StubServer(script=script) as server:
+        body = {"stream": True, "messages": []}
+        with pytest.raises(httpx.RemoteProtocolError):
+            with httpx.stream("POST", server.base_url + "/chat/completions", json=body) as r:
+                r.read()
+        assert server.stats["disconnects"] == 1
+
+
+def test_base_url_env_redirects_agents(monkeypatch):
+    with StubServer(script=["offline"]) as server:
+        monkeypatch.setenv("SWARM_BASE_URL", server.base_url)
+        response = Swarm(client=httpx.Client()).run(Agent(), [])
+    assert response.messages[-1]["content"] == "offline"
+
+
+def test_generic_openai_env_does_not_redirect_agents(monkeypatch):
+    monkeypatch.delenv("SWARM_BASE_URL", raising=False)
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://elsewhere/v1")
+    monkeypatch.setenv("OPENAI_API_BASE", "http://elsewhere/v1")
+    assert Agent().base_url == DEFAULT_BASE_URL
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.stub_server import StubServer
+from swarm.timeouts import TimeoutStats, tool_timeout, with_timeout
+from tests.conftest import call
+
+
+def test_hung_sync_tool_is_abandoned_and_the_run_continues():
+    release = threading.Event()
+
+    def fetch_resources():
+        release.wait(5)
+        return "late"
+
+    try:
+        with StubServer(script=[call("fetch_resources"), "carrying on"]) as server:
+            client = Swarm(client=httpx.Client())
+            agent = Agent(base_url=server.base_url, functions=[fetch_resources],
+                          tool_timeout=0.1)
+            start = time.perf_counter()
+            response = client.run(agent, [{"role": "user", "content": "resources?"}])
+            elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    assert elapsed < 2
+    error = json.loads(response.messages[1]["content"])
+    assert error["error"] == "timeout"
+    assert error["tool"] == "fetch_resources"
+    assert error["timeout_seconds"] == 0.1
+    assert response.messages[-1]["content"] == "carrying on"
+    assert client.tool_timeouts.as_dict() == {"total": 1, "by_tool": {"fetch_resources": 1}}
+
+
+def test_function_timeout_overrides_agent_timeout():
+    @tool_timeout(1)
+    def slow():
+        time.sleep(0.2)
+        return "finished"
+
+    with StubServer(script=[call("slow"), "done"]) as server:
+        client = Swarm(client=httpx.Client())
+        agent = Agent(base_url=server.base_url, functions=[slow], tool_timeout=0.05)
+        response = client.run(agent, [])
+    assert response.messages[1]["content"] == "finished"
+    assert client.tool_timeouts.total == 0
+
+
+def test_async_tool_is_cancelled():
+    cancelled = []
+
+    async def query_basescan():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main(base_url):
+        client = AsyncSwarm(client=httpx.AsyncClient())
+        agent = Agent(base_url=base_url, functions=[query_basescan], tool_timeout=0.1)
+        response = await client.arun(agent, [])
+        return client, response
+
+    with StubServer(script=[call("query_basescan"), "done"]) as server:
+        client, response = asyncio.run(main(server.base_url))
+    assert cancelled == [True]
+    assert "cancelled" in json.loads(response.messages[1]["content"])["message"]
+    assert client.tool_timeouts.by_tool["query_basescan"] == 1
+
+
+def test_errors_within_the_limit_propagate():
+    def broken():
+        raise KeyError("missing")
+
+    limited = with_timeout(broken, "broken", 1, TimeoutStats())
+    with pytest.raises(KeyError, match="missing"):
+        limited()
+
+
+def test_no_limit_by_default():
+    def fast():
+        return "ok"
+
+    with StubServer(script=[call("fast"), "done"]) as server:
+        client = Swarm(client=httpx.Client())
+        response = client.run(Agent(base_url=server.base_url, functions=[fast]), [])
+    assert response.messages[1]["content"] == "ok"
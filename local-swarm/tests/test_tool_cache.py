@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from swarm import Swarm, Agent
+from swarm.stub_server import StubServer
+from swarm.tool_cache import cached_tool, tool_caches
+from swarm.util import function_to_json
+
+
+def test_equivalent_calls_share_an_entry():
+    calls = []
+
+    @cached_tool
+    def lookup(city, unit="celsius"):
+        calls.append(city)
+        return f"{city} in {unit}"
+
+    assert lookup("Paris") == "Paris in celsius"
+    assert lookup(city="Paris") == "Paris in celsius"
+    assert lookup("Paris", unit="celsius") == "Paris in celsius"
+    assert lookup("Paris", "fahrenheit") == "Paris in fahrenheit"
+    assert calls == ["Paris", "Paris"]
+    assert lookup.tool_cache.stats.hits == 2
+
+
+def test_context_variables_excluded_unless_named():
+    calls = []
+
+    @cached_tool
+    def plain(order_id, context_variables):
+        calls.append(order_id)
+        return order_id
+
+    @cached_tool(context_keys=["user_id"])
+    def per_user(order_id, context_variables):
+        calls.append(context_variables["user_id"])
+        return context_variables["user_id"]
+
+    plain("o1", context_variables={"user_id": 1})
+    plain("o1", context_variables={"user_id": 2})
+    assert calls == ["o1"]
+
+    assert per_user("o1", context_variables={"user_id": 1, "noise": "a"}) == 1
+    assert per_user("o1", context_variables={"user_id": 1, "noise": "b"}) == 1
+    assert per_user("o1", context_variables={"user_id": 2}) == 2
+    assert calls == ["o1", 1, 2]
+
+
+def test_ttl_and_lru_eviction():
+    calls = []
+
+    @cached_tool(ttl=0.05, max_entries=2)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square(1), square(2), square(1), square(3)  # evicts 2, the least recently used
+    square(1)
+    square(2)
+    assert calls == [1, 2, 3, 2]
+    assert square.tool_cache.stats.evictions == 2
+
+    time.sleep(0.06)
+    square(1)
+    assert calls == [1, 2, 3, 2, 1]
+    assert square.tool_cache.stats.expirations == 1
+
+
+def test_exceptions_are_not_cached():
+    attempts = []
+
+    @cached_tool
+    def flaky(x):
+        attempts.append(x)
+        if len(attempts) == 1:
+            raise RuntimeError("unavailable")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        flaky(1)
+    assert flaky(1) == "ok"
+    assert flaky(1) == "ok"
+    assert attempts == [1, 1]
+
+
+def test_async_function():
+    calls = []
+
+    @cached_tool(ttl=60)
+    async def fetch(url):
+        calls.append(url)
+        await asyncio.sleep(0)
+        return url.upper()
+
+    async def main():
+        return [await fetch("a"), await fetch("a"), await fetch(url="b")]
+
+    assert asyncio.run(main()) == ["A", "A", "B"]
+    assert calls == ["a", "b"]
+
+
+def test_schema_is_unchanged():
+    def get_weather(location, context_variables, time="now"):
+        """Get the weather."""
+
+    assert function_to_json(cached_tool(ttl=1)(get_weather)) == function_to_json(get_weather)
+
+
+def test_cached_results_in_a_run():
+    calls = []
+
+    @cached_tool(ttl=60)
+    def get_weather(location, context_variables):
+        calls.append(location)
+        return f"sunny in {location}"
+
+    call = {"name": "get_weather", "arguments": {"location": "Paris"}}
+    script = [{"tool_calls": [call]}, "done", {"tool_calls": [call]}, "done"]
+    spans = []
+    with StubServer(script=script) as server:
+        client = Swarm(client=httpx.Client(), hooks=[spans.append])
+        agent = Agent(base_url=server.base_url, functions=[get_weather])
+        for _ in range(2):
+            response = client.run(agent, [{"role": "user", "content": "weather?"}],
+                                  context_variables={"turn": _})
+            assert response.messages[1]["content"] == "sunny in Paris"
+
+    assert calls == ["Paris"]
+    assert [s.attributes["cached"] for s in spans if s.kind == "tool"] == [False, True]
+    stats = tool_caches.stats()[f"{__name__}.{get_weather.__qualname__}"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_cache_hits_are_traced_through_tool_timeouts():
+    calls = []
+
+    @cached_tool
+    def get_rate(pair):
+        calls.append(pair)
+        return "1.08"
+
+    @cached_tool
+    async def aget_rate(pair):
+        calls.append(pair)
+        return "1.08"
+
+    call = {"name": "get_rate", "arguments": {"pair": "EURUSD"}}
+    acall = {"name": "aget_rate", "arguments": {"pair": "EURUSD"}}
+    script = [{"tool_calls": [call]}, {"tool_calls": [call]}, "done",
+              {"tool_calls": [acall]}, {"tool_calls": [acall]}, "done"]
+    spans = []
+    with StubServer(script=script) as server:
+        # with a time limit, the tools run on a watchdog thread / in a new task
+        agent = Agent(base_url=server.base_url, functions=[get_rate, aget_rate],
+                      tool_timeout=5)
+        Swarm(client=httpx.Client(), hooks=[spans.append]).run(agent, [])
+        Swarm(client=httpx.Client(), hooks=[spans.append]).run(agent, [])
+
+    assert calls == ["EURUSD", "EURUSD"]
+    assert [s.attributes["cached"] for s in spans if s.kind == "tool"] == [
+        False, True, False, True]
@@ -0,0 +1,35 @@
+from swarm import Agent
+from swarm.tools import compile_tools
+
+
+def greet(context_variables, language: str):
+    """Greets the user."""
+    return "Hello"
+
+
+def transfer():
+    return Agent()
+
+
+def test_compile_tools_hides_context_variables():
+    compiled = compile_tools([greet, transfer])
+
+    greet_params = compiled.tools[0]["function"]["parameters"]
+    assert greet_params["properties"] == {"language": {"type": "string"}}
+    assert greet_params["required"] == ["language"]
+    assert compiled.function_map == {"greet": greet, "transfer": transfer}
+    assert compiled.takes_context == frozenset({"greet"})
+
+
+def test_compile_tools_is_memoized_and_invalidated():
+    agent = Agent(functions=[greet])
+    first = compile_tools(agent.functions)
+    assert compile_tools(agent.functions) is first
+
+    agent.functions.append(transfer)
+    second = compile_tools(agent.functions)
+    assert second is not first
+    assert [t["function"]["name"] for t in second.tools] == ["greet", "transfer"]
+
+    agent.functions = [transfer]
+    assert list(compile_tools(agent.functions).function_map) == ["transfer"]
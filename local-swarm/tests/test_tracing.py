@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.core import to_tool_calls
+from swarm.stub_server import StubReply, StubServer
+from swarm.tracing import JSONLExporter, LatencySummary, percentile
+from tests.conftest import call
+
+USAGE = {"prompt_tokens": 50, "completion_tokens": 10}
+SCRIPT = [
+    {**call("lookup"), "usage": USAGE},
+    {**call("transfer"), "usage": USAGE},
+    {"content": "done", "usage": USAGE},
+]
+
+
+def make_agents(**options):
+    specialist = Agent(name="Specialist", **options)
+
+    def transfer():
+        return specialist
+
+    def lookup():
+        return "found"
+
+    return Agent(name="Triage", functions=[transfer, lookup], **options)
+
+
+def test_run_emits_llm_tool_handoff_and_run_spans():
+    spans = []
+    client = Swarm(client=httpx.Client(), hooks=[spans.append])
+    with StubServer(script=SCRIPT) as server:
+        client.run(make_agents(base_url=server.base_url), [{"role": "user", "content": "hi"}])
+
+    kinds = [(span.kind, span.name, span.agent) for span in spans]
+    assert kinds == [
+        ("llm", "gpt-4o-mini", "Triage"),
+        ("tool", "lookup", "Triage"),
+        ("llm", "gpt-4o-mini", "Triage"),
+        ("tool", "transfer", "Triage"),
+        ("handoff", "Specialist", "Triage"),
+        ("llm", "gpt-4o-mini", "Specialist"),
+        ("run", "Triage", "Triage"),
+    ]
+    llm = spans[0].attributes
+    assert llm["completion_tokens"] == 10 and llm["build_time"] >= 0
+    assert spans[-1].attributes["turns"] == 3
+    assert spans[-1].attributes["handoffs"] == 1
+
+
+def test_stream_spans_report_ttft():
+    spans = []
+    client = Swarm(client=httpx.Client(), hooks=[spans.append])
+    with StubServer(script=SCRIPT) as server:
+        triage = make_agents(base_url=server.base_url, stream_usage=True)
+        list(client.run(triage, [{"role": "user", "content": "hi"}], stream=True))
+
+    llm_spans = [span for span in spans if span.kind == "llm"]
+    assert len(llm_spans) == 3
+    assert all(0 <= span.attributes["ttft"] <= span.duration for span in llm_spans)
+    assert llm_spans[0].attributes["prompt_tokens"] == 50
+
+
+def test_async_run_emits_spans():
+    spans = []
+    client = AsyncSwarm(client=httpx.AsyncClient(), hooks=[spans.append])
+    with StubServer(script=SCRIPT) as server:
+        triage = make_agents(base_url=server.base_url)
+        asyncio.run(client.arun(triage, [{"role": "user", "content": "hi"}]))
+    assert [span.kind for span in spans].count("tool") == 2
+    assert spans[-1].kind == "run"
+
+
+def test_no_hooks_leaves_tools_unwrapped():
+    triage = make_agents()
+    client = Swarm(client=httpx.Client())
+    tool_calls = to_tool_calls(StubReply(**call("lookup")).tool_calls)
+
+    assert not client.hooks
+    calls = client.prepare_tool_calls(tool_calls, triage.functions, {}, False)
+    assert calls[0][1] is triage.functions[1]
+
+
+def test_failing_tool_and_handler_are_reported(recwarn):
+    spans = []
+
+    def broken(span):
+        raise RuntimeError("exporter down")
+
+    def explode():
+        raise ValueError("boom")
+
+    client = Swarm(client=httpx.Client(), hooks=[broken, spans.append])
+    with StubServer(script=[call("explode")]) as server:
+        agent = Agent(base_url=server.base_url, functions=[explode])
+        with pytest.raises(ValueError):
+            client.run(agent, [{"role": "user", "content": "hi"}])
+    tool_span = next(span for span in spans if span.kind == "tool")
+    assert "boom" in tool_span.attributes["error"]
+    assert any("exporter down" in str(w.message) for w in recwarn)
+
+
+def test_jsonl_export_and_summary(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    summary = LatencySummary()
+    with JSONLExporter(str(path)) as exporter, StubServer(script=SCRIPT) as server:
+        client = Swarm(client=httpx.Client(), hooks=[exporter, summary])
+        client.run(make_agents(base_url=server.base_url), [{"role": "user", "content": "hi"}])
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 7
+    assert records[0]["kind"] == "llm"
+
+    live = summary.summary()
+    loaded = LatencySummary.from_jsonl(str(path)).summary()
+    assert live == loaded
+    assert live["llm"]["Triage"]["count"] == 2
+    assert set(live["tool"]) == {"lookup", "transfer"}
+    assert live["handoffs"] == 1
+    assert "p95" in str(summary)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
@@ -0,0 +1,42 @@
+import asyncio
+import importlib.util
+
+import httpx
+import pytest
+
+from swarm import AsyncSwarm, Swarm
+from swarm.transport import Transport, TransportConfig, get_default_transport
+
+
+def test_swarms_share_the_default_pool():
+    assert Swarm().client is Swarm().client is get_default_transport().client
+
+
+def test_explicit_client_and_transport():
+    own = httpx.Client()
+    assert Swarm(client=own).client is own
+
+    transport = Transport(max_connections=7, read_timeout=60.0)
+    client = Swarm(transport=transport).client
+    assert client is transport.client
+    assert client.timeout.read == 60.0
+    assert client.timeout.connect == TransportConfig().connect_timeout
+
+
+def test_async_client_per_event_loop():
+    transport = Transport()
+    swarm = AsyncSwarm(transport=transport)
+
+    async def clients():
+        return swarm.client, swarm.client
+
+    first, again = asyncio.run(clients())
+    assert first is again
+    second, _ = asyncio.run(clients())
+    assert second is not first
+
+
+@pytest.mark.skipif(importlib.util.find_spec("h2") is not None, reason="h2 installed")
+def test_http2_requires_h2():
+    with pytest.raises(ImportError, match="h2"):
+        Transport(http2=True).client
@@ -0,0 +1,79 @@
+import json
+
+import httpx
+
+from swarm import Swarm, Agent
+from swarm.core import build_request, encode_request
+from swarm.stub_server import StubServer
+from swarm.usage import UsageStats, cached_prompt_tokens
+
+
+def lookup_order(order_id):
+    return order_id
+
+
+def cancel_order(order_id):
+    return order_id
+
+
+def test_requests_are_byte_identical_across_function_order():
+    a = Agent(functions=[lookup_order, cancel_order])
+    b = Agent(functions=[cancel_order, lookup_order])
+    history = [{"role": "user", "content": "hi"}]
+
+    data_a = build_request(a, history, {}, None, False)
+    data_b = build_request(b, history, {}, None, False)
+
+    assert [t["function"]["name"] for t in data_a["tools"]] == ["cancel_order", "lookup_order"]
+    assert encode_request(data_a) == encode_request(data_b)
+    assert json.loads(encode_request(data_a)) == data_a
+
+
+def test_dynamic_instructions_follow_the_static_prefix():
+    agent = Agent(instructions="Follow the policy.", dynamic_instructions="User: {user}")
+
+    alice = build_request(agent, [], {"user": "alice"}, None, False)["messages"]
+    bob = build_request(agent, [], {"user": "bob"}, None, False)["messages"]
+
+    assert alice[0] == bob[0] == {"role": "system", "content": "Follow the policy."}
+    assert alice[1] == {"role": "system", "content": "User: alice"}
+    assert bob[1]["content"] == "User: bob"
+
+    callable_agent = Agent(dynamic_instructions=lambda cv: f"Tier: {cv['tier']}")
+    messages = build_request(callable_agent, [], {}, None, False)["messages"]
+    assert messages[1]["content"] == "Tier: "
+
+
+def test_cached_prompt_tokens_formats():
+    assert cached_prompt_tokens({"prompt_tokens_details": {"cached_tokens": 1024}}) == 1024
+    assert cached_prompt_tokens({"prompt_cache_hit_tokens": 64}) == 64
+    assert cached_prompt_tokens({"prompt_tokens": 10}) == 0
+
+    stats = UsageStats()
+    stats.record({"prompt_tokens": 2000, "completion_tokens": 10,
+                  "prompt_tokens_details": {"cached_tokens": 1500}})
+    stats.record(None)
+    assert stats.as_dict()["completions"] == 1
+    assert stats.prompt_cache_rate == 0.75
+
+
+def test_run_records_usage_from_completions_and_streams():
+    usage = {"prompt_tokens": 100, "completion_tokens": 5,
+             "prompt_tokens_details": {"cached_tokens": 80}}
+    client = Swarm(client=httpx.Client())
+    with StubServer(script=[{"content": "hi", "usage": usage}], cycle=True) as server:
+        agent = Agent(base_url=server.base_url)
+        client.run(agent, [{"role": "user", "content": "hello"}])
+        # opt-in: backends that reject unknown fields get the plain request
+        plain = list(client.run(agent, [{"role": "user", "content": "hello"}], stream=True))
+        streaming = Agent(base_url=server.base_url, stream_usage=True)
+        list(client.run(streaming, [{"role": "user", "content": "hello"}], stream=True))
+        requests = server.received
+
+    assert [r.get("stream_options") for r in requests if r["stream"]] == [
+        None, {"include_usage": True}]
+    assert plain[-1]["response"].messages[-1]["content"] == "hi"
+
+    assert client.usage.completions == 2
+    assert client.usage.prompt_tokens == 200
+    assert client.usage.cached_prompt_tokens == 160
@@ -48,3 +48,43 @@ def test_complex_function():
             },
         },
     }
+
+
+def test_stream_accumulator_joins_fields_and_tool_calls():
+    from swarm.util import StreamAccumulator
+
+    accumulator = StreamAccumulator("Agent")
+    deltas = [
+        {"role": "assistant", "content": "Hel"},
+        {"content": "lo"},
+        {
+            "tool_calls": [
+                {"index": 0, "id": "call_a", "type": "function",
+                 "function": {"name": "get_weather", "arguments": '{"loc'}},
+                {"index": 1, "id": "call_b", "type": "function",
+                 "function": {"name": "get_time", "arguments": ""}},
+            ]
+        },
+        {"tool_calls": [{"index": 1, "function": {"arguments": "{}"}},
+                        {"index": 0, "function": {"arguments": '": "SF"}'}}]},
+    ]
+    for delta in deltas:
+        accumulator.add(delta)
+
+    message = accumulator.message()
+    assert message["content"] == "Hello"
+    assert message["sender"] == "Agent"
+    assert message["tool_calls"] == [
+        {"function": {"arguments": '{"loc": "SF"}', "name": "get_weather"},
+         "id": "call_a", "type": "function"},
+        {"function": {"arguments": "{}", "name": "get_time"},
+         "id": "call_b", "type": "function"},
+    ]
+
+
+def test_stream_accumulator_without_tool_calls():
+    from swarm.util import StreamAccumulator
+
+    message = StreamAccumulator("Agent").message()
+    assert message["content"] == ""
+    assert message["tool_calls"] is None